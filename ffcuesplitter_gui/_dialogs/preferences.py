@@ -29,7 +29,13 @@ import os
 import sys
 import wx
 from ffcuesplitter_gui._utils.utils import detect_binaries
+from ffcuesplitter_gui._utils.finalise import CONFLICT_POLICIES
+from ffcuesplitter_gui._utils.probecache import ProbeCache, CACHE_DIRNAME
 from ffcuesplitter_gui._sys.settings_manager import ConfigManager
+from ffcuesplitter_gui._utils.priority import (IONICE_CLASSES,
+                                               parse_cpulist,
+                                               ionice_available,
+                                               affinity_available)
 
 
 class SetUp(wx.Dialog):
@@ -45,6 +51,7 @@ class SetUp(wx.Dialog):
         ("verbose (Same as `info`, except more verbose.)"),
         ("debug (Show everything, including debugging info.)")
         )
+    SPLIT_ENGINES = ('track', 'single')
     # -----------------------------------------------------------------
 
     def __init__(self, parent, appdata):
@@ -89,6 +96,24 @@ class SetUp(wx.Dialog):
                                          _("Show hidden menu items")))
         sizer_gen.Add(self.ckbx_mnhiden, 0, wx.ALL, 5)
 
+        sizer_gen.Add((0, 15))
+        grid_cache = wx.FlexGridSizer(1, 3, 0, 0)
+        sizer_gen.Add(grid_cache, 0, wx.ALL, 0)
+        lab_cache = wx.StaticText(tab_one, wx.ID_ANY,
+                                  _('Size of the cache of the CUE sheets '
+                                    'already opened,\nin MiB (0 to '
+                                    'disable):'))
+        grid_cache.Add(lab_cache, 0, wx.ALL | wx.ALIGN_CENTER_VERTICAL, 5)
+        self.spin_cache = wx.SpinCtrl(tab_one, wx.ID_ANY, "32",
+                                      min=0, max=1024, size=(80, -1),
+                                      style=wx.SP_ARROW_KEYS
+                                      )
+        grid_cache.Add(self.spin_cache, 0, wx.ALL | wx.ALIGN_CENTER_VERTICAL,
+                       5)
+        self.btn_cache = wx.Button(tab_one, wx.ID_ANY, _("Clear"))
+        grid_cache.Add(self.btn_cache, 0, wx.ALL | wx.ALIGN_CENTER_VERTICAL,
+                       5)
+
         tab_one.SetSizer(sizer_gen)
         notebook.AddPage(tab_one, _("Miscellanea"))
 
@@ -112,7 +137,68 @@ class SetUp(wx.Dialog):
                           wx.ALIGN_CENTER_VERTICAL |
                           wx.ALIGN_CENTER_HORIZONTAL, 5
                           )
-        # sizer_files.Add((0, 15))
+        sizer_files.Add((0, 15))
+        conflictchoice = [_('Ask once before starting'),
+                          _('Overwrite the existing file'),
+                          _('Keep the existing file'),
+                          _('Keep both files (rename the new one)')]
+        self.rdbx_conflict = wx.RadioBox(tab_two, wx.ID_ANY,
+                                         (_("If a track already exists in "
+                                            "the output directory")),
+                                         choices=conflictchoice,
+                                         majorDimension=1,
+                                         style=wx.RA_SPECIFY_COLS
+                                         )
+        sizer_files.Add(self.rdbx_conflict, 0, wx.ALL | wx.EXPAND, 5)
+        sizer_files.Add((0, 15))
+        self.ckbx_tempauto = wx.CheckBox(tab_two, wx.ID_ANY, (
+            _('Process the tracks on the same disk as the output '
+              'directory,\nso that they are moved without copying them '
+              '(recommended)')))
+        sizer_files.Add(self.ckbx_tempauto, 0, wx.ALL, 5)
+        labtemp = wx.StaticText(tab_two, wx.ID_ANY,
+                                _('Otherwise, directory where the tracks '
+                                  'are processed (empty for the\n'
+                                  'configuration directory):'))
+        sizer_files.Add(labtemp, 0, wx.ALL | wx.EXPAND, 5)
+        sizetempdir = wx.BoxSizer(wx.HORIZONTAL)
+        sizer_files.Add(sizetempdir, 0, wx.EXPAND)
+        self.txt_tempdir = wx.TextCtrl(tab_two, wx.ID_ANY, "",
+                                       style=wx.TE_READONLY
+                                       )
+        sizetempdir.Add(self.txt_tempdir, 1, wx.ALL, 5)
+        self.btn_tempdir = wx.Button(tab_two, wx.ID_ANY, _("Browse.."))
+        sizetempdir.Add(self.btn_tempdir, 0, wx.RIGHT |
+                        wx.ALIGN_CENTER_VERTICAL, 5)
+        self.btn_tempclear = wx.Button(tab_two, wx.ID_ANY, _("Clear"))
+        sizetempdir.Add(self.btn_tempclear, 0, wx.RIGHT |
+                        wx.ALIGN_CENTER_VERTICAL, 5)
+        sizer_files.Add((0, 15))
+        self.ckbx_ram = wx.CheckBox(tab_two, wx.ID_ANY, (
+            _('Process the tracks in RAM (tmpfs) when they fit, saving a '
+              'round trip\nto disk with "Copy codec" and lossless '
+              'formats')))
+        sizer_files.Add(self.ckbx_ram, 0, wx.ALL, 5)
+        sizeramdir = wx.BoxSizer(wx.HORIZONTAL)
+        sizer_files.Add(sizeramdir, 0, wx.EXPAND)
+        self.txt_ramdir = wx.TextCtrl(tab_two, wx.ID_ANY, "",
+                                      style=wx.TE_READONLY
+                                      )
+        sizeramdir.Add(self.txt_ramdir, 1, wx.ALL, 5)
+        self.btn_ramdir = wx.Button(tab_two, wx.ID_ANY, _("Browse.."))
+        sizeramdir.Add(self.btn_ramdir, 0, wx.RIGHT |
+                       wx.ALIGN_CENTER_VERTICAL, 5)
+        grid_ram = wx.FlexGridSizer(1, 2, 0, 0)
+        sizer_files.Add(grid_ram, 0, wx.ALL, 0)
+        lab_ram = wx.StaticText(tab_two, wx.ID_ANY,
+                                _('Maximum percentage of the free memory '
+                                  'to use, otherwise on disk:'))
+        grid_ram.Add(lab_ram, 0, wx.ALL | wx.ALIGN_CENTER_VERTICAL, 5)
+        self.spin_ram = wx.SpinCtrl(tab_two, wx.ID_ANY, "50",
+                                    min=10, max=90, size=(80, -1),
+                                    style=wx.SP_ARROW_KEYS
+                                    )
+        grid_ram.Add(self.spin_ram, 0, wx.ALL | wx.ALIGN_CENTER_VERTICAL, 5)
         tab_two.SetSizer(sizer_files)
         notebook.AddPage(tab_two, _("File"))
 
@@ -230,6 +316,141 @@ class SetUp(wx.Dialog):
         sizer_log.Add(self.rdbx_log_ffmpeg, 0, wx.ALL | wx.EXPAND, 5)
         tab_five.SetSizer(sizer_log)
         notebook.AddPage(tab_five, _("Logging levels"))
+
+        # -----tab 6
+        tab_six = wx.Panel(notebook, wx.ID_ANY)
+        sizer_proc = wx.BoxSizer(wx.VERTICAL)
+        sizer_proc.Add((0, 15))
+        lab_workers = wx.StaticText(tab_six, wx.ID_ANY,
+                                    _('Parallel processing'))
+        sizer_proc.Add(lab_workers, 0, wx.ALL | wx.EXPAND, 5)
+        grid_workers = wx.FlexGridSizer(0, 2, 0, 5)
+        sizer_proc.Add(grid_workers, 0, wx.ALL, 5)
+        lab1_workers = wx.StaticText(tab_six, wx.ID_ANY,
+                                     _('Maximum number of tracks to '
+                                       'process at the same time:'))
+        grid_workers.Add(lab1_workers, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.spin_workers = wx.SpinCtrl(tab_six, wx.ID_ANY, "1",
+                                        min=1, max=os.cpu_count() or 1,
+                                        size=(80, -1),
+                                        style=wx.SP_ARROW_KEYS
+                                        )
+        grid_workers.Add(self.spin_workers, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        lab2_workers = wx.StaticText(tab_six, wx.ID_ANY,
+                                     _('Seconds to wait before killing the '
+                                       'processes on abort:'))
+        grid_workers.Add(lab2_workers, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.spin_grace = wx.SpinCtrl(tab_six, wx.ID_ANY, "5",
+                                      min=1, max=60,
+                                      size=(80, -1),
+                                      style=wx.SP_ARROW_KEYS
+                                      )
+        grid_workers.Add(self.spin_grace, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        lab3_workers = wx.StaticText(tab_six, wx.ID_ANY,
+                                     _('Seconds without progress before '
+                                       'killing a stalled process\n'
+                                       '(0 to disable):'))
+        grid_workers.Add(lab3_workers, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.spin_stall = wx.SpinCtrl(tab_six, wx.ID_ANY, "60",
+                                      min=0, max=3600,
+                                      size=(80, -1),
+                                      style=wx.SP_ARROW_KEYS
+                                      )
+        grid_workers.Add(self.spin_stall, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        lab4_workers = wx.StaticText(tab_six, wx.ID_ANY,
+                                     _('Retries of a failed or stalled '
+                                       'track:'))
+        grid_workers.Add(lab4_workers, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.spin_retries = wx.SpinCtrl(tab_six, wx.ID_ANY, "2",
+                                        min=0, max=10,
+                                        size=(80, -1),
+                                        style=wx.SP_ARROW_KEYS
+                                        )
+        grid_workers.Add(self.spin_retries, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        lab5_workers = wx.StaticText(tab_six, wx.ID_ANY,
+                                     _('Minutes beyond which an Opus or MP3 '
+                                       'track is encoded in\nparallel '
+                                       'chunks (0 to disable):'))
+        grid_workers.Add(lab5_workers, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.spin_chunk = wx.SpinCtrl(tab_six, wx.ID_ANY, "20",
+                                      min=0, max=600,
+                                      size=(80, -1),
+                                      style=wx.SP_ARROW_KEYS
+                                      )
+        grid_workers.Add(self.spin_chunk, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.ckbx_adaptive = wx.CheckBox(tab_six, wx.ID_ANY, (
+            _('Adjust the number of tracks processed at the same time to '
+              'the system load\n(up to the maximum number above)')))
+        sizer_proc.Add(self.ckbx_adaptive, 0, wx.ALL, 5)
+        sizer_proc.Add((0, 15))
+        enginechoice = [_('One FFmpeg process for each track (default)'),
+                        _('One FFmpeg process for each CD image (the '
+                          'source audio is decoded only once, or read\n'
+                          'in a single pass with "Copy codec")')]
+        self.rdbx_engine = wx.RadioBox(tab_six, wx.ID_ANY,
+                                       (_("Split engine")),
+                                       choices=enginechoice,
+                                       majorDimension=1,
+                                       style=wx.RA_SPECIFY_COLS
+                                       )
+        sizer_proc.Add(self.rdbx_engine, 0, wx.ALL | wx.EXPAND, 5)
+        sizer_proc.Add((0, 15))
+        self.ckbx_uptodate = wx.CheckBox(tab_six, wx.ID_ANY, (
+            _('Skip the tracks already up to date in the output directory\n'
+              '(same source audio, track boundaries, format, compression '
+              'and tags)')))
+        sizer_proc.Add(self.ckbx_uptodate, 0, wx.ALL, 5)
+        tab_six.SetSizer(sizer_proc)
+        notebook.AddPage(tab_six, _("Processing"))
+
+        # -----tab 7
+        tab_seven = wx.Panel(notebook, wx.ID_ANY)
+        sizer_prio = wx.BoxSizer(wx.VERTICAL)
+        sizer_prio.Add((0, 15))
+        lab_prio = wx.StaticText(tab_seven, wx.ID_ANY,
+                                 _('Priority of the FFmpeg processes, to '
+                                   'leave room for the other\nworkloads '
+                                   'of the machine (the application keeps '
+                                   'its normal priority)'))
+        sizer_prio.Add(lab_prio, 0, wx.ALL | wx.EXPAND, 5)
+        grid_prio = wx.FlexGridSizer(0, 2, 5, 5)
+        sizer_prio.Add(grid_prio, 0, wx.ALL, 5)
+        lab1_prio = wx.StaticText(tab_seven, wx.ID_ANY,
+                                  _('Nice level (0 normal, 19 lowest):'))
+        grid_prio.Add(lab1_prio, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.spin_nice = wx.SpinCtrl(tab_seven, wx.ID_ANY, "0",
+                                     min=0, max=19,
+                                     size=(80, -1),
+                                     style=wx.SP_ARROW_KEYS
+                                     )
+        grid_prio.Add(self.spin_nice, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        lab2_prio = wx.StaticText(tab_seven, wx.ID_ANY,
+                                  _('I/O priority:'))
+        grid_prio.Add(lab2_prio, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.cmbx_ionice = wx.ComboBox(tab_seven, wx.ID_ANY,
+                                       choices=[_('Default'),
+                                                _('Best-effort (lowest)'),
+                                                _('Idle'),
+                                                ],
+                                       size=(200, -1),
+                                       style=wx.CB_DROPDOWN | wx.CB_READONLY
+                                       )
+        grid_prio.Add(self.cmbx_ionice, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        lab3_prio = wx.StaticText(tab_seven, wx.ID_ANY,
+                                  _('Run on CPUs (e.g. 0-3,6, empty '
+                                    'for all):'))
+        grid_prio.Add(lab3_prio, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        self.txt_cpus = wx.TextCtrl(tab_seven, wx.ID_ANY, "",
+                                    size=(200, -1))
+        grid_prio.Add(self.txt_cpus, 0, wx.ALIGN_CENTER_VERTICAL, 0)
+        if not ionice_available():
+            self.cmbx_ionice.Disable()
+            lab2_prio.Disable()
+        if not affinity_available():
+            self.txt_cpus.Disable()
+            lab3_prio.Disable()
+        tab_seven.SetSizer(sizer_prio)
+        notebook.AddPage(tab_seven, _("Priority"))
         # ------ btns bottom
         grd_btns = wx.GridSizer(1, 2, 0, 0)
         grdhelp = wx.GridSizer(1, 1, 0, 0)
@@ -262,15 +483,19 @@ class SetUp(wx.Dialog):
             lab_theme.SetFont(wx.Font(12, wx.DEFAULT, wx.NORMAL, wx.BOLD))
             lab_tbar.SetFont(wx.Font(12, wx.DEFAULT, wx.NORMAL, wx.BOLD))
             lab_log.SetFont(wx.Font(11, wx.SWISS, wx.NORMAL, wx.NORMAL))
+            lab_workers.SetFont(wx.Font(12, wx.DEFAULT, wx.NORMAL, wx.BOLD))
         else:
             labfile.SetFont(wx.Font(9, wx.DEFAULT, wx.NORMAL, wx.BOLD))
             lab_ffexec.SetFont(wx.Font(9, wx.DEFAULT, wx.NORMAL, wx.BOLD))
             lab_theme.SetFont(wx.Font(9, wx.DEFAULT, wx.NORMAL, wx.BOLD))
             lab_tbar.SetFont(wx.Font(9, wx.DEFAULT, wx.NORMAL, wx.BOLD))
             lab_log.SetFont(wx.Font(8, wx.SWISS, wx.NORMAL, wx.NORMAL))
+            lab_workers.SetFont(wx.Font(9, wx.DEFAULT, wx.NORMAL, wx.BOLD))
 
         # ----------------------Binding (EVT)----------------------#
         self.Bind(wx.EVT_CHECKBOX, self.exit_warn, self.ckbx_exit)
+        self.Bind(wx.EVT_SPINCTRL, self.on_cache_size, self.spin_cache)
+        self.Bind(wx.EVT_BUTTON, self.on_cache_clear, self.btn_cache)
         self.Bind(wx.EVT_CHECKBOX, self.clear_logs, self.ckbx_logclear)
         self.Bind(wx.EVT_CHECKBOX, self.show_hiden_menu, self.ckbx_mnhiden)
 
@@ -288,6 +513,25 @@ class SetUp(wx.Dialog):
 
         self.Bind(wx.EVT_RADIOBOX, self.logging_ffmpeg, self.rdbx_log_ffmpeg)
 
+        self.Bind(wx.EVT_SPINCTRL, self.on_workers, self.spin_workers)
+        self.Bind(wx.EVT_SPINCTRL, self.on_grace_period, self.spin_grace)
+        self.Bind(wx.EVT_SPINCTRL, self.on_nice, self.spin_nice)
+        self.Bind(wx.EVT_COMBOBOX, self.on_ionice, self.cmbx_ionice)
+        self.Bind(wx.EVT_TEXT, self.on_cpus, self.txt_cpus)
+        self.Bind(wx.EVT_CHECKBOX, self.on_adaptive, self.ckbx_adaptive)
+        self.Bind(wx.EVT_SPINCTRL, self.on_stall_timeout, self.spin_stall)
+        self.Bind(wx.EVT_SPINCTRL, self.on_track_retries, self.spin_retries)
+        self.Bind(wx.EVT_SPINCTRL, self.on_chunk_minutes, self.spin_chunk)
+        self.Bind(wx.EVT_RADIOBOX, self.on_split_engine, self.rdbx_engine)
+        self.Bind(wx.EVT_CHECKBOX, self.on_skip_uptodate, self.ckbx_uptodate)
+        self.Bind(wx.EVT_RADIOBOX, self.on_output_conflict, self.rdbx_conflict)
+        self.Bind(wx.EVT_CHECKBOX, self.on_tempdir_auto, self.ckbx_tempauto)
+        self.Bind(wx.EVT_BUTTON, self.on_tempdir, self.btn_tempdir)
+        self.Bind(wx.EVT_BUTTON, self.on_tempdir_clear, self.btn_tempclear)
+        self.Bind(wx.EVT_CHECKBOX, self.on_ram_scratch, self.ckbx_ram)
+        self.Bind(wx.EVT_BUTTON, self.on_ram_dir, self.btn_ramdir)
+        self.Bind(wx.EVT_SPINCTRL, self.on_ram_percent, self.spin_ram)
+
         self.Bind(wx.EVT_BUTTON, self.on_help, btn_help)
         self.Bind(wx.EVT_BUTTON, self.on_cancel, btn_cancel)
         self.Bind(wx.EVT_BUTTON, self.on_ok, btn_ok)
@@ -330,6 +574,29 @@ class SetUp(wx.Dialog):
         self.ckbx_logclear.SetValue(self.appdata['clearlogfiles'])
         self.ckbx_exit.SetValue(self.appdata['warnexiting'])
         self.ckbx_mnhiden.SetValue(self.appdata['showhidenmenu'])
+        self.spin_cache.SetValue(self.appdata['cache_size_mb'])
+        self.spin_workers.SetValue(self.appdata['ffmpeg_workers'])
+        self.spin_grace.SetValue(self.appdata['kill_grace_period'])
+        self.ckbx_adaptive.SetValue(self.appdata['adaptive_workers'])
+        self.spin_nice.SetValue(self.appdata['ffmpeg_nice'])
+        ionice = list(IONICE_CLASSES).index(self.appdata['ffmpeg_ionice'])
+        self.cmbx_ionice.SetSelection(ionice)
+        self.txt_cpus.ChangeValue(self.appdata['ffmpeg_cpus'])
+        self.spin_stall.SetValue(self.appdata['stall_timeout'])
+        self.spin_retries.SetValue(self.appdata['track_retries'])
+        self.spin_chunk.SetValue(self.appdata['chunk_minutes'])
+        engine = SetUp.SPLIT_ENGINES.index(self.appdata['split_engine'])
+        self.rdbx_engine.SetSelection(engine)
+        self.ckbx_uptodate.SetValue(self.appdata['skip_uptodate'])
+        conflict = CONFLICT_POLICIES.index(self.appdata['output_conflict'])
+        self.rdbx_conflict.SetSelection(conflict)
+        self.ckbx_tempauto.SetValue(self.appdata['tempdir_auto'])
+        self.txt_tempdir.SetValue(self.appdata['tempdir'])
+        self.enable_tempdir(not self.appdata['tempdir_auto'])
+        self.ckbx_ram.SetValue(self.appdata['ram_scratch'])
+        self.txt_ramdir.SetValue(self.appdata['ram_scratch_dir'])
+        self.spin_ram.SetValue(self.appdata['ram_scratch_percent'])
+        self.enable_ram_scratch(self.appdata['ram_scratch'])
     # --------------------------------------------------------------------#
 
     def on_output_path(self, event):
@@ -440,6 +707,193 @@ class SetUp(wx.Dialog):
                     self.settings['ffprobe_cmd'] = getpath
     # --------------------------------------------------------------------#
 
+    def on_workers(self, event):
+        """
+        Set the maximum number of ffmpeg processes
+        running at the same time
+        """
+        self.settings['ffmpeg_workers'] = self.spin_workers.GetValue()
+    # --------------------------------------------------------------------#
+
+    def on_adaptive(self, event):
+        """
+        Enable or disable the adjustment of the number of
+        ffmpeg processes to the system load
+        """
+        if self.ckbx_adaptive.IsChecked():
+            self.settings['adaptive_workers'] = True
+        else:
+            self.settings['adaptive_workers'] = False
+    # --------------------------------------------------------------------#
+
+    def on_nice(self, event):
+        """
+        Set the nice level of the ffmpeg processes
+        """
+        self.settings['ffmpeg_nice'] = self.spin_nice.GetValue()
+    # --------------------------------------------------------------------#
+
+    def on_ionice(self, event):
+        """
+        Set the I/O scheduling class of the ffmpeg processes
+        """
+        ionice = list(IONICE_CLASSES)[self.cmbx_ionice.GetSelection()]
+        self.settings['ffmpeg_ionice'] = ionice
+    # --------------------------------------------------------------------#
+
+    def on_cpus(self, event):
+        """
+        Set the CPUs the ffmpeg processes are pinned to,
+        see `on_ok` for the validation.
+        """
+        self.settings['ffmpeg_cpus'] = self.txt_cpus.GetValue().strip()
+    # --------------------------------------------------------------------#
+
+    def on_grace_period(self, event):
+        """
+        Set the seconds to wait before killing the ffmpeg
+        processes that do not terminate on abort
+        """
+        self.settings['kill_grace_period'] = self.spin_grace.GetValue()
+    # --------------------------------------------------------------------#
+
+    def on_stall_timeout(self, event):
+        """
+        Set the seconds without progress before killing
+        a stalled ffmpeg process
+        """
+        self.settings['stall_timeout'] = self.spin_stall.GetValue()
+    # --------------------------------------------------------------------#
+
+    def on_track_retries(self, event):
+        """
+        Set the number of times a failed or stalled
+        track is processed again before it fails
+        """
+        self.settings['track_retries'] = self.spin_retries.GetValue()
+    # --------------------------------------------------------------------#
+
+    def on_chunk_minutes(self, event):
+        """
+        Set the minutes beyond which a track is encoded in
+        chunks by parallel processes, see `_utils.split_engines`
+        """
+        self.settings['chunk_minutes'] = self.spin_chunk.GetValue()
+    # --------------------------------------------------------------------#
+
+    def on_split_engine(self, event):
+        """
+        Set the split engine, see `_utils.split_engines`
+        """
+        engine = SetUp.SPLIT_ENGINES[self.rdbx_engine.GetSelection()]
+        self.settings['split_engine'] = engine
+    # --------------------------------------------------------------------#
+
+    def on_skip_uptodate(self, event):
+        """
+        Enable or disable the skipping of the tracks already
+        up to date in the output directory
+        """
+        if self.ckbx_uptodate.IsChecked():
+            self.settings['skip_uptodate'] = True
+        else:
+            self.settings['skip_uptodate'] = False
+    # --------------------------------------------------------------------#
+
+    def on_output_conflict(self, event):
+        """
+        Set what to do with the tracks which already exist
+        in the output directory, see `_utils.finalise`
+        """
+        policy = CONFLICT_POLICIES[self.rdbx_conflict.GetSelection()]
+        self.settings['output_conflict'] = policy
+    # --------------------------------------------------------------------#
+
+    def enable_tempdir(self, enable):
+        """
+        Enable or disable the controls of the directory
+        where the tracks are processed
+        """
+        self.txt_tempdir.Enable(enable)
+        self.btn_tempdir.Enable(enable)
+        self.btn_tempclear.Enable(enable)
+    # --------------------------------------------------------------------#
+
+    def on_tempdir_auto(self, event):
+        """
+        Enable or disable processing the tracks on the
+        filesystem of the output directory
+        """
+        if self.ckbx_tempauto.IsChecked():
+            self.settings['tempdir_auto'] = True
+        else:
+            self.settings['tempdir_auto'] = False
+        self.enable_tempdir(not self.settings['tempdir_auto'])
+    # --------------------------------------------------------------------#
+
+    def on_tempdir(self, event):
+        """
+        Set a custom directory where the tracks are processed
+        """
+        dlg = wx.DirDialog(self, _("Choose the directory where the tracks "
+                                   "are processed"), "", wx.DD_DEFAULT_STYLE)
+        if dlg.ShowModal() == wx.ID_OK:
+            getpath = self.appdata['getpath'](dlg.GetPath())
+            self.txt_tempdir.SetValue(getpath)
+            self.settings['tempdir'] = getpath
+        dlg.Destroy()
+    # --------------------------------------------------------------------#
+
+    def on_tempdir_clear(self, event):
+        """
+        Process the tracks in the configuration directory
+        """
+        self.txt_tempdir.SetValue('')
+        self.settings['tempdir'] = ''
+    # --------------------------------------------------------------------#
+
+    def enable_ram_scratch(self, enable):
+        """
+        Enable or disable the controls of the RAM-backed
+        working directory
+        """
+        self.txt_ramdir.Enable(enable)
+        self.btn_ramdir.Enable(enable)
+        self.spin_ram.Enable(enable)
+    # --------------------------------------------------------------------#
+
+    def on_ram_scratch(self, event):
+        """
+        Enable or disable processing the tracks in RAM,
+        see `_utils.scratch`
+        """
+        if self.ckbx_ram.IsChecked():
+            self.settings['ram_scratch'] = True
+        else:
+            self.settings['ram_scratch'] = False
+        self.enable_ram_scratch(self.settings['ram_scratch'])
+    # --------------------------------------------------------------------#
+
+    def on_ram_dir(self, event):
+        """
+        Set the mount point of a RAM-backed filesystem (tmpfs)
+        """
+        dlg = wx.DirDialog(self, _("Choose a RAM-backed filesystem (tmpfs)"),
+                           self.txt_ramdir.GetValue(), wx.DD_DEFAULT_STYLE)
+        if dlg.ShowModal() == wx.ID_OK:
+            self.txt_ramdir.SetValue(dlg.GetPath())
+            self.settings['ram_scratch_dir'] = dlg.GetPath()
+        dlg.Destroy()
+    # --------------------------------------------------------------------#
+
+    def on_ram_percent(self, event):
+        """
+        Set the maximum percentage of the available memory
+        taken by the working directories
+        """
+        self.settings['ram_scratch_percent'] = self.spin_ram.GetValue()
+    # --------------------------------------------------------------------#
+
     def on_iconthemes(self, event):
         """
         Set themes of icons
@@ -483,6 +937,24 @@ class SetUp(wx.Dialog):
             self.settings['warnexiting'] = False
     # --------------------------------------------------------------------#
 
+    def on_cache_size(self, event):
+        """
+        Set the maximum size of the cache of the CUE sheets,
+        see `_utils.probecache`
+        """
+        self.settings['cache_size_mb'] = self.spin_cache.GetValue()
+    # --------------------------------------------------------------------#
+
+    def on_cache_clear(self, event):
+        """
+        Removes all the CUE sheets from the cache
+        """
+        ProbeCache(os.path.join(self.appdata['confdir'], CACHE_DIRNAME),
+                   0).clear()
+        wx.MessageBox(_("The cache of the CUE sheets has been cleared"),
+                      _('Settings'), wx.ICON_INFORMATION, self)
+    # --------------------------------------------------------------------#
+
     def clear_logs(self, event):
         """
         if checked, set to clear all log files on exit
@@ -537,6 +1009,15 @@ class SetUp(wx.Dialog):
         Applies all changes writing the new entries on
         `settings.json` file aka file configuration.
         """
+        try:
+            parse_cpulist(self.settings['ffmpeg_cpus'])
+        except ValueError:
+            wx.MessageBox(_('Invalid list of CPUs: "{}"\n\nUse CPU numbers '
+                            'and ranges separated by commas, e.g. 0-3,6'
+                            ).format(self.settings['ffmpeg_cpus']),
+                          _('Settings'),
+                          wx.ICON_WARNING, self)
+            return
         self.confmanager.write_options(**self.settings)
 
         event.Skip()
@@ -32,10 +32,12 @@ import wx
 class ShowLogs(wx.Dialog):
     """
     Displays log text and includes refreshing
-    and clearing features.
+    and clearing features. Also lists the logs of
+    each track of the last job (see TRACKLOGS).
     """
     # list of logs files to include
-    LOGNAMES = ('ffmpeg.log',)
+    LOGNAMES = ('ffmpeg.log', 'jobs.jsonl')
+    TRACKLOGS = 'tracks'  # directory of the track logs
 
     def __init__(self, parent, dirlog):
         """
@@ -158,13 +160,19 @@ class ShowLogs(wx.Dialog):
         self.logdata.clear()
         self.log_select.DeleteAllItems()
         index = 0
-        for files in os.listdir(self.dirlog):
-            if os.path.basename(files) in ShowLogs.LOGNAMES:  # listed only
-                with open(os.path.join(self.dirlog, files),
-                          'r', encoding='utf8') as log:
-                    self.logdata[files] = log.read()  # set value
-                    self.log_select.InsertItem(index, files)
-                index += 1
+        logfiles = [name for name in ShowLogs.LOGNAMES
+                    if os.path.isfile(os.path.join(self.dirlog, name))]
+        tracklogs = os.path.join(self.dirlog, ShowLogs.TRACKLOGS)
+        if os.path.isdir(tracklogs):
+            logfiles += [os.path.join(ShowLogs.TRACKLOGS, name) for name
+                         in sorted(os.listdir(tracklogs))
+                         if name.endswith('.log')]
+        for files in logfiles:
+            with open(os.path.join(self.dirlog, files),
+                      'r', encoding='utf8', errors='replace') as log:
+                self.logdata[files] = log.read()  # set value
+                self.log_select.InsertItem(index, files)
+            index += 1
 
         if index:
             self.log_select.Focus(0)  # make the line the current line
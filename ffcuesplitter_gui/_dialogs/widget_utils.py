@@ -72,6 +72,23 @@ def notification_area(title, message, flag, timeout=5):
     # notify.Close()       # Hides the notification.
 
 
+class FileDrop(wx.FileDropTarget):
+    """
+    Accepts files and directories dropped onto a window
+    and passes their pathnames to the given `callback`.
+    """
+    def __init__(self, callback):
+        wx.FileDropTarget.__init__(self)
+        self.callback = callback
+
+    def OnDropFiles(self, x, y, filenames):
+        """
+        Called when files are dropped onto the window
+        """
+        self.callback(filenames)
+        return True
+
+
 class PopupDialog(wx.Dialog):
     """
     A pop-up dialog box for temporary user messages that tell the user
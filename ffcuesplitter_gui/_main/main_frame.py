@@ -36,6 +36,7 @@ from ffcuesplitter_gui._dialogs.cd_info import CdInfo
 from ffcuesplitter_gui._dialogs.track_info import TrackInfo
 from ffcuesplitter_gui._dialogs import check_new_version
 from ffcuesplitter_gui._dialogs.showlogs import ShowLogs
+from ffcuesplitter_gui._dialogs.widget_utils import FileDrop
 from ffcuesplitter_gui._panels import cuesplitter_panel
 from ffcuesplitter_gui._io import io_tools
 from ffcuesplitter_gui._sys.info import __version__
@@ -62,6 +63,7 @@ class MainFrame(wx.Frame):
         self.main_sizer = wx.BoxSizer(wx.VERTICAL)  # sizer base global
         # Layout externals panels:
         self.main_sizer.Add(self.gui_panel, 1, wx.EXPAND)
+        self.SetDropTarget(FileDrop(self.gui_panel.add_to_queue))
 
         # ----------------------Set Properties----------------------#
         self.SetTitle("FFcuesplitter-GUI")
@@ -156,8 +158,11 @@ class MainFrame(wx.Frame):
     def on_kill(self):
         """
         In some cases you need to exit the application
-        without any confirm dialog.
+        without any confirm dialog. The processes still
+        running are stopped.
         """
+        if self.gui_panel.thread_type is not None:
+            self.gui_panel.thread_type.stop()
         self.Destroy()
 
     # -------------   BUILD THE MENU BAR  ----------------###
@@ -26,39 +26,89 @@ This file is part of FFcuesplitter-GUI.
    along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
 """
 import os
-import shutil
-import tempfile
+import time
 import datetime
+import platform
 import wx
 import wx.lib.scrolledpanel as scrolled
+import wx.lib.dialogs
 from pubsub import pub
-from ffcuesplitter.cuesplitter import FFCueSplitter
-from ffcuesplitter.utils import makeoutputdirs
 from ffcuesplitter_gui._utils.utils import get_codec_quality_items
 from ffcuesplitter_gui._threads.ffmpeg_processing import Processing
+from ffcuesplitter_gui._threads.cuesheet_loader import LoadCueSheets
+from ffcuesplitter_gui._threads.finaliser import Finaliser
+from ffcuesplitter_gui._threads.job_checker import CheckJobs
 from ffcuesplitter_gui._dialogs.widget_utils import notification_area
-from ffcuesplitter_gui._utils.utils import move_files_to_outputdir
-
-
-class CueGui(wx.Panel):
+from ffcuesplitter_gui._dialogs.widget_utils import FileDrop
+from ffcuesplitter_gui._utils.finalise import work_root
+from ffcuesplitter_gui._utils.scratch import estimate_scratch, ram_root
+from ffcuesplitter_gui._utils.job_queue import JobQueue
+from ffcuesplitter_gui._panels.job_progress import JobProgressMixin
+from ffcuesplitter_gui._utils.progress import format_size
+from ffcuesplitter_gui._utils.split_engines import (build_recipes,
+                                                    merge_recipes,
+                                                    schedule_recipes)
+
+
+class CueGui(JobProgressMixin, wx.Panel):
     """
     Represents the only one main panel for FFcuesplitter-gui
     implemented on main_frame.
+
+    Several CUE sheets can be imported at once, they are loaded
+    in background and added to a queue of albums. The Start
+    button processes all the queued albums with a single
+    Processing thread, so that the ffmpeg worker pool is shared
+    by all albums and discs are split back-to-back.
+
+    Each album is split in the working directory of its own
+    job journal (see `_utils.journal`), which records the
+    completed tracks: an interrupted job is kept and can be
+    resumed, also after restarting the application. Each
+    completed track is moved to the output directory by the
+    Finaliser thread while the other tracks are processed.
+
+    The queue and the state of the job are kept by the
+    `_utils.job_queue.JobQueue` class, the running job is
+    shown and controlled by `JobProgressMixin`.
     """
+    REFRESH_MS = 250  # refresh rate of the progress, in milliseconds
+    STATES = {'loading': _('Loading...'),
+              'invalid': _('Invalid CUE sheet'),
+              'ready': _('Queued'),
+              'processing': _('Processing'),
+              'done': _('Done'),
+              'partial': _('Done with errors'),
+              'failed': _('Failed'),
+              'interrupted': _('Interrupted'),
+              }
+    # ----------------------------------------------------------------------
+
     def __init__(self, parent):
         """
-        This constructor subscribes three listener of pubsub
+        This constructor subscribes five listener of pubsub
         package. All references to subscribed callables are
-        located on the Processing class thread.
+        located on the Processing and LoadCueSheets class
+        threads.
         """
         self.parent = parent  # main_frame
         get = wx.GetApp()
         self.appdata = get.appset  # current appdata
         self.thread_type = None  # the instantiated thread
+        self.finaliser = None  # the thread moving the completed tracks
+        self.checking = None  # (albums, signature, workroot) being checked
+        self.finalising = False  # if True the processing is terminated
+        self.policy = None  # output conflict policy of the current job
         self.abort = False  # if True set to abort current process
         self.error = False  # if True set to error current process
-        self.data = None  # it is the ffcuesplitter instance
-        self.tmpdir = None  # path to tempdir folder
+        self.data = None  # ffcuesplitter instance of the selected album
+        self.selected = None  # the album displayed on self.tracklist
+        self.queue = JobQueue(self.appdata['confdir'],
+                              self.appdata['cache_size_mb'] << 20)
+        self.workers = 1  # number of concurrent ffmpeg processes
+        self.overall = False  # if True show the overall progress
+        self.running = {}  # track label: stats of the processes running
+        self.started = 0  # start time of processing, see time.monotonic
 
         wx.Panel.__init__(self, parent, -1, style=wx.TAB_TRAVERSAL)
 
@@ -142,6 +192,15 @@ class CueGui(wx.Panel):
         panelscroll.SetupScrolling()
 
         # -------------listctrl
+        self.queuelist = wx.ListCtrl(self, wx.ID_ANY, style=wx.LC_REPORT |
+                                     wx.SUNKEN_BORDER | wx.LC_SINGLE_SEL
+                                     )
+        self.queuelist.SetMinSize((-1, 130))
+        boxlistctrl.Add(self.queuelist, 0, wx.ALL | wx.EXPAND, 5)
+        self.queuelist.InsertColumn(0, (_('CUE sheet')), width=250)
+        self.queuelist.InsertColumn(1, (_('Album')), width=180)
+        self.queuelist.InsertColumn(2, (_('Tracks')), width=60)
+        self.queuelist.InsertColumn(3, (_('Status')), width=160)
         self.tracklist = wx.ListCtrl(self, wx.ID_ANY, style=wx.LC_REPORT |
                                      wx.SUNKEN_BORDER | wx.LC_SINGLE_SEL
                                      )
@@ -151,6 +210,7 @@ class CueGui(wx.Panel):
         self.tracklist.InsertColumn(2, (_('Title')), width=130)
         self.tracklist.InsertColumn(3, (_('Length')), width=80)
         self.tracklist.InsertColumn(4, (_('Album')), width=180)
+        self.tracklist.InsertColumn(5, (_('Progress')), width=80)
 
         sizer_cuefile = wx.BoxSizer(wx.HORIZONTAL)
         sizer_base.Add(sizer_cuefile, 0, wx.EXPAND | wx.ALL, 5)
@@ -164,26 +224,61 @@ class CueGui(wx.Panel):
                           | wx.ALIGN_CENTER_HORIZONTAL
                           | wx.ALIGN_CENTER_VERTICAL, 2
                           )
+        self.btn_remove = wx.Button(self, wx.ID_ANY, _("Remove"))
+        self.btn_remove.Disable()
+        sizer_cuefile.Add(self.btn_remove, 0, wx.LEFT
+                          | wx.ALIGN_CENTER_HORIZONTAL
+                          | wx.ALIGN_CENTER_VERTICAL, 2
+                          )
+        self.btn_clear = wx.Button(self, wx.ID_ANY, _("Clear"))
+        self.btn_clear.Disable()
+        sizer_cuefile.Add(self.btn_clear, 0, wx.LEFT
+                          | wx.ALIGN_CENTER_HORIZONTAL
+                          | wx.ALIGN_CENTER_VERTICAL, 2
+                          )
+        self.btn_pause = wx.Button(self, wx.ID_ANY, _("Pause"))
+        self.btn_pause.Disable()
+        sizer_cuefile.Add(self.btn_pause, 0, wx.LEFT
+                          | wx.ALIGN_CENTER_HORIZONTAL
+                          | wx.ALIGN_CENTER_VERTICAL, 2
+                          )
         self.barprog = wx.Gauge(self, wx.ID_ANY, range=0)
         sizer_base.Add(self.barprog, 0, wx.EXPAND | wx.ALL, 5)
         sizer_base.Add((0, 10))
         self.SetMinSize(tuple(self.appdata['panel_size']))
         self.SetSizer(sizer_base)
         self.Layout()
+        self.queuelist.SetDropTarget(FileDrop(self.add_to_queue))
+        self.tracklist.SetDropTarget(FileDrop(self.add_to_queue))
 
         # ----------------------Binder (EVT)----------------------#
         self.Bind(wx.EVT_BUTTON, self.on_import_cuefile, self.btn_import)
+        self.Bind(wx.EVT_BUTTON, self.on_remove, self.btn_remove)
+        self.Bind(wx.EVT_BUTTON, self.on_clear, self.btn_clear)
+        self.Bind(wx.EVT_BUTTON, self.on_pause, self.btn_pause)
+        self.tracklist.Bind(wx.EVT_CONTEXT_MENU, self.on_track_menu)
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_refresh, self.timer)
+        self.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_select_album,
+                  self.queuelist)
         self.Bind(wx.EVT_BUTTON, self.on_output_dir, self.btn_out)
 
         self.Bind(wx.EVT_COMBOBOX, self.on_formats, self.cmbx_formats)
+        self.Bind(wx.EVT_COMBOBOX, self.on_quality, self.cmbx_quality)
         self.Bind(wx.EVT_CHECKBOX, self.on_codec_copy, self.ckbx_codec_copy)
         self.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_select, self.tracklist)
         self.Bind(wx.EVT_LIST_ITEM_DESELECTED, self.on_deselect,
                   self.tracklist)
         # -----------------------------------------------------------------#
-        pub.subscribe(self.update_progress_bar, "UPDATE_EVT")
+        pub.subscribe(self.update_status, "UPDATE_EVT")
         pub.subscribe(self.update_count_items, "COUNT_EVT")
         pub.subscribe(self.end_processing, "END_EVT")
+        pub.subscribe(self.update_loaded_album, "LOAD_EVT")
+        pub.subscribe(self.update_journal, "TRACK_EVT")
+        pub.subscribe(self.update_finalised, "FINAL_EVT")
+        pub.subscribe(self.end_finalise, "FINAL_END_EVT")
+        pub.subscribe(self.end_check, "CHECK_EVT")
+        wx.CallAfter(self.check_journals)
         # ---------------------------------------- #
 
     def on_output_dir(self, event):
@@ -209,25 +304,159 @@ class CueGui(wx.Panel):
             dlg.Destroy()
     # -----------------------------------------------------------------#
 
-    def load_cuefile(self, newincoming):
+    def add_to_queue(self, pathnames):
         """
-        Load the imported CUE file using FFCueSplitter package
+        Adds to queue the CUE sheets found on the given list of
+        files and directories, these are loaded in background
+        by the LoadCueSheets thread. Returns True.
         """
-        self.txt_path_cue.SetValue(newincoming)
+        items = []
+        for album in self.queue.add(pathnames):
+            row = self.queuelist.InsertItem(self.queuelist.GetItemCount(),
+                                            os.path.basename(album['cuefile']))
+            self.queuelist.SetItem(row, 3, CueGui.STATES['loading'])
+            items.append((album['key'], album['cuefile']))
 
-        kwargs = {'filename': newincoming,
-                  'ffprobe_cmd': self.appdata['ffprobe_cmd'],
+        if not items:
+            return True
+
+        kwargs = {'ffprobe_cmd': self.appdata['ffprobe_cmd'],
                   'ffmpeg_cmd': self.appdata['ffmpeg_cmd'],
                   'ffmpeg_loglevel': self.appdata['ffmpegloglev'],
                   'progress_meter': 'tqdm',
                   }  # instance
-        try:
-            self.data = FFCueSplitter(**kwargs)
-        except Exception as err:
-            wx.MessageBox(f'{err}', "ERROR", wx.ICON_ERROR, self)
+        self.queue.probecache.maxsize = self.appdata['cache_size_mb'] << 20
+        LoadCueSheets(items, kwargs, self.queue.probecache)
+        self.btn_clear.Enable(self.thread_type is None)
+        return True
+    # -----------------------------------------------------------------#
+
+    def update_loaded_album(self, key, data, error):
+        """
+        Receives the FFCueSplitter instance (or the error
+        message) of a CUE sheet loaded by the LoadCueSheets
+        thread. The first album loaded is also displayed.
+        """
+        album = self.queue.get(key)
+        if album is None:  # removed from queue while loading
+            return
+        row = self.queue.albums.index(album)
+        if error:
+            album['state'] = 'invalid'
+            album['errmsg'] = error
+            self.queuelist.SetItem(row, 3, CueGui.STATES['invalid'])
+            self.parent.statusbar_msg(f"{os.path.basename(album['cuefile'])}"
+                                      f": {error}", 'RED', 'WHITE')
             return
 
-        self.set_data_list_ctrl()
+        album['data'] = data
+        album['state'] = 'ready'
+        journal = self.queue.journal(album)
+        if journal is not None:
+            if wx.MessageBox(_('A previous job of this album was '
+                               'interrupted before completion:\n"{}"'
+                               '\n\nDo you want to resume it? Choose '
+                               '"No" to discard the tracks already '
+                               'split.').format(album['cuefile']),
+                             _('FFcuesplitter-GUI - Resume'),
+                             wx.ICON_QUESTION | wx.YES_NO,
+                             self) == wx.YES:
+                album['journal'] = journal
+            else:
+                journal.remove()
+        cd_info = data.cue.meta.data
+        self.queuelist.SetItem(row, 1, cd_info.get('ALBUM', 'N/A'))
+        self.queuelist.SetItem(row, 2, str(len(data.audiotracks)))
+        self.queuelist.SetItem(row, 3, CueGui.STATES['ready'])
+
+        if self.selected is None or self.selected is album:
+            self.queuelist.Select(row)
+        self.enable_start()
+    # -----------------------------------------------------------------#
+
+    def check_journals(self):
+        """
+        Offers to resume the jobs interrupted before completion
+        (e.g. by aborting or by a crash), adding their CUE sheets
+        to queue.
+        """
+        cuefiles = self.queue.interrupted()
+        if not cuefiles:
+            return
+        if wx.MessageBox(_('{} jobs were interrupted before completion.\n\n'
+                           'Do you want to add them to the queue to resume '
+                           'them? Choose "No" to discard the tracks already '
+                           'split.').format(len(cuefiles)),
+                         _('FFcuesplitter-GUI - Resume'),
+                         wx.ICON_QUESTION | wx.YES_NO, self) == wx.YES:
+            self.queue.resume += cuefiles
+            self.add_to_queue(cuefiles)
+        else:
+            self.queue.discard(cuefiles)
+    # -----------------------------------------------------------------#
+
+    def preflight(self, report):
+        """
+        Shows a single report of the problems found by the
+        CheckJobs thread in all the albums to be processed,
+        see `_utils.preflight`. Returns True if there are no
+        problems.
+        """
+        if not report:
+            return True
+        lines = []
+        for name, errors in report:
+            lines.append(name or 'FFmpeg')
+            lines.extend(f'    {err}' for err in errors)
+            lines.append('')
+        dlg = wx.lib.dialogs.ScrolledMessageDialog(
+            self, _('Nothing has been processed, please fix the following '
+                    'problems and try again:\n\n{}').format('\n'.join(lines)),
+            _('Pre-flight check'), size=(700, 400))
+        dlg.ShowModal()
+        dlg.Destroy()
+        return False
+    # -----------------------------------------------------------------#
+
+    def conflict_policy(self, conflicts):
+        """
+        Returns the policy for the tracks which already exist
+        in the output directory (see `_utils.finalise`), given
+        the list of their pathnames (`conflicts`). If set to
+        'ask', the user is asked once, before starting, only
+        if there are conflicts. Returns None to cancel.
+        """
+        policy = self.appdata['output_conflict']
+        if policy != 'ask':
+            return policy
+        if not conflicts:
+            return 'overwrite'
+        more = (_('\n...and {} more').format(len(conflicts) - 1)
+                if len(conflicts) > 1 else '')
+        dlg = wx.MessageDialog(self, _('File already exists:\n"{}"{}\n\n'
+                                       'Do you want to overwrite all '
+                                       'files?\n\nChoose "No" to keep the '
+                                       'existing files.'
+                                       ).format(conflicts[0], more),
+                               _("Warning"),
+                               wx.ICON_WARNING | wx.YES_NO | wx.CANCEL)
+        answer = dlg.ShowModal()
+        dlg.Destroy()
+        if answer == wx.ID_YES:
+            return 'overwrite'
+        if answer == wx.ID_NO:
+            return 'skip'
+        return None
+    # -----------------------------------------------------------------#
+
+    def enable_start(self):
+        """
+        Enables the Start button on toolbar if there are albums
+        to process and no process is running.
+        """
+        enable = (self.thread_type is None and self.checking is None
+                  and bool(self.queue.pending(selected=self.selected)))
+        self.parent.toolbar.EnableTool(12, enable)  # start
     # -----------------------------------------------------------------#
 
     def on_import_cuefile(self, event, loadlast=None):
@@ -237,15 +466,72 @@ class CueGui(wx.Panel):
 
         wildcard = "Source (*.cue;*.CUE)|*.cue;*.CUE|All files (*.*)|*.*"
 
-        with wx.FileDialog(self, _("Open a CUE sheet"),
+        with wx.FileDialog(self, _("Open CUE sheets"),
                            "", "", wildcard, wx.FD_OPEN |
+                           wx.FD_MULTIPLE |
                            wx.FD_FILE_MUST_EXIST) as filedlg:
 
             if filedlg.ShowModal() == wx.ID_CANCEL:
                 return
-            newincoming = filedlg.GetPath()
+            newincoming = filedlg.GetPaths()
 
-        self.load_cuefile(newincoming)
+        self.add_to_queue(newincoming)
+    # -----------------------------------------------------------------#
+
+    def on_select_album(self, event):
+        """
+        self.queuelist selection event. Displays the tracks
+        of the selected album.
+        """
+        album = self.queue.albums[event.GetIndex()]
+        self.selected = album
+        self.data = album['data']
+        self.txt_path_cue.SetValue(album['cuefile'])
+        self.btn_remove.Enable(self.thread_type is None)
+
+        if self.data is None:
+            self.tracklist.DeleteAllItems()
+            self.parent.toolbar.EnableTool(8, False)  # audio CD
+            self.parent.toolbar.EnableTool(14, False)  # track tag
+            if album['state'] == 'invalid':
+                wx.MessageBox(album['errmsg'], "ERROR", wx.ICON_ERROR, self)
+            return
+
+        self.set_data_list_ctrl()
+        self.show_estimate()
+    # -----------------------------------------------------------------#
+
+    def on_remove(self, event):
+        """
+        Removes the selected album from queue.
+        """
+        row = self.queuelist.GetFirstSelected()
+        if row == -1:
+            return
+        del self.queue.albums[row]
+        self.queuelist.DeleteItem(row)
+        if self.queue.albums:
+            self.queuelist.Select(min(row, len(self.queue.albums) - 1))
+        else:
+            self.on_clear(None)
+        self.enable_start()
+    # -----------------------------------------------------------------#
+
+    def on_clear(self, event):
+        """
+        Removes all albums from queue.
+        """
+        self.queue.albums = []
+        self.queuelist.DeleteAllItems()
+        self.tracklist.DeleteAllItems()
+        self.selected = None
+        self.data = None
+        self.txt_path_cue.SetValue('*.cue')
+        self.btn_remove.Disable()
+        self.btn_clear.Disable()
+        self.parent.toolbar.EnableTool(8, False)  # audio CD
+        self.parent.toolbar.EnableTool(14, False)  # track tag
+        self.enable_start()
     # -----------------------------------------------------------------#
 
     def set_data_list_ctrl(self):
@@ -253,6 +539,8 @@ class CueGui(wx.Panel):
         Populates listctrl and enable/disable some btns
         """
         self.tracklist.DeleteAllItems()
+        rows = {row: index for index, (album, row) in self.queue.jobmap.items()
+                if album is self.selected}
 
         for num, item in enumerate(self.data.audiotracks):
             self.tracklist.InsertItem(num, item.get('TRACK_NUM', 'N/A'))
@@ -262,11 +550,23 @@ class CueGui(wx.Panel):
             sec = str(datetime.timedelta(seconds=dur))[2:7]
             self.tracklist.SetItem(num, 3, sec)
             self.tracklist.SetItem(num, 4, item.get('ALBUM', 'N/A'))
-
-        self.parent.toolbar.EnableTool(12, True)  # start
+            if (self.selected is not None
+                    and num in self.selected.get('failed', ())):
+                self.tracklist.SetItem(num, 5, _('Failed'))
+            elif (self.selected is not None
+                  and num in self.selected.get('skipped', ())):
+                self.tracklist.SetItem(num, 5, _('Skipped'))
+            elif rows.get(num) in self.queue.progress:
+                percent = self.queue.progress[rows[num]]
+                self.tracklist.SetItem(num, 5, f'{round(percent)}%')
+            else:
+                self.tracklist.SetItem(num, 5, '')
+
+        self.enable_start()
         self.parent.toolbar.EnableTool(8, True)  # audio CD
         self.parent.toolbar.EnableTool(14, False)  # track tag
-        self.parent.statusbar_msg(_("Ready"))
+        if self.thread_type is None:
+            self.parent.statusbar_msg(_("Ready"))
     # -----------------------------------------------------------------#
 
     def on_formats(self, event):
@@ -290,6 +590,14 @@ class CueGui(wx.Panel):
 
         elif self.cmbx_formats.GetValue() == 'ogg':
             self.cmbx_quality.SetSelection(5)
+        self.show_estimate()
+    # -----------------------------------------------------------------#
+
+    def on_quality(self, event):
+        """
+        Audio compression selection
+        """
+        self.show_estimate()
     # -----------------------------------------------------------------#
 
     def on_codec_copy(self, event):
@@ -306,6 +614,73 @@ class CueGui(wx.Panel):
             self.cmbx_quality.Enable()
             self.lbl_quality.Enable()
             self.lbl_formats.Enable()
+        self.show_estimate()
+    # -----------------------------------------------------------------#
+
+    def output_settings(self):
+        """
+        Returns the (outputformat, ffmpeg_add_params) tuple
+        of the current settings
+        """
+        if self.ckbx_codec_copy.IsChecked() is True:
+            return 'copy', ''
+        outputformat = self.cmbx_formats.GetValue()
+        items = get_codec_quality_items(outputformat)
+        return outputformat, items[self.cmbx_quality.GetValue()]
+    # -----------------------------------------------------------------#
+
+    def check_space(self, albums, workroot):
+        """
+        Warns before starting if the estimated size of the
+        tracks to process exceeds the free space of the output
+        or working directories. Returns False to cancel.
+        """
+        msg, lacking = self.queue.estimate(
+            [(album, set(range(len(album['data'].audiotracks)))
+              - album['skip']) for album in albums],
+            ' '.join(self.output_settings()),
+            (self.appdata['outputfile'], self.appdata['ffmpeg_workers']),
+            workroot)
+        if lacking:
+            dirs = '\n'.join(_('{}: {} free').format(dirname,
+                                                     format_size(free))
+                             for dirname, free in lacking)
+            dlg = wx.MessageDialog(self, _('Not enough free space for the '
+                                           'tracks to process:\n\n{}\n\n{}'
+                                           '\n\nDo you want to start '
+                                           'anyway?').format(msg, dirs),
+                                   _("Warning"),
+                                   wx.ICON_WARNING | wx.YES_NO | wx.NO_DEFAULT)
+            answer = dlg.ShowModal()
+            dlg.Destroy()
+            if answer != wx.ID_YES:
+                return False
+        self.parent.statusbar_msg(msg)
+        return True
+    # -----------------------------------------------------------------#
+
+    def show_estimate(self):
+        """
+        Shows on the status bar the estimated size and time
+        of processing the pending albums, see
+        `_utils.job_queue.JobQueue.estimate`.
+        """
+        if self.thread_type is not None:
+            return
+        albums = [(album, range(len(album['data'].audiotracks)))
+                  for album in self.queue.pending(selected=self.selected)
+                  if album['data'] is not None]
+        if not albums:
+            return
+        msg, lacking = self.queue.estimate(
+            albums, ' '.join(self.output_settings()),
+            (self.appdata['outputfile'], self.appdata['ffmpeg_workers']))
+        if lacking:
+            msg = _("{} | Not enough free space: {}").format(
+                msg, format_size(min(free for dirname, free in lacking)))
+            self.parent.statusbar_msg(msg, 'GOLDENROD', 'BLACK')
+        else:
+            self.parent.statusbar_msg(msg)
     # -----------------------------------------------------------------#
 
     def on_select(self, event):
@@ -324,116 +699,241 @@ class CueGui(wx.Panel):
         self.parent.toolbar.EnableTool(14, False)
     # ----------------------------------------------------------------------
 
-    def update_attributes_of_ffcuesplitter_api(self, tmpdir):
+    def update_attributes_of_ffcuesplitter_api(self, data, tmpdir):
         """
         Set required arguments on ffcuesplitter API
         """
-        self.data.kwargs['ffmpeg_cmd'] = self.appdata['ffmpeg_cmd']
-        self.data.kwargs['ffmpeg_loglevel'] = self.appdata['ffmpegloglev']
-        self.data.kwargs['outputdir'] = self.appdata['outputfile']
-        self.data.kwargs['tempdir'] = tmpdir
+        data.kwargs['ffmpeg_cmd'] = self.appdata['ffmpeg_cmd']
+        data.kwargs['ffmpeg_loglevel'] = self.appdata['ffmpegloglev']
+        data.kwargs['outputdir'] = self.appdata['outputfile']
+        data.kwargs['tempdir'] = tmpdir
+        outputformat, compression = self.output_settings()
+        data.kwargs['outputformat'] = outputformat
+        data.kwargs['ffmpeg_add_params'] = compression
+    # ----------------------------------------------------------------------
 
-        if self.ckbx_codec_copy.IsChecked() is True:
-            self.data.kwargs['ffmpeg_add_params'] = ""
-            self.data.kwargs['outputformat'] = 'copy'
-        else:
-            self.data.kwargs['outputformat'] = self.cmbx_formats.GetValue()
-            items = get_codec_quality_items(self.cmbx_formats.GetValue())
-            compression = items[self.cmbx_quality.GetValue()]
-            self.data.kwargs['ffmpeg_add_params'] = compression
+    def work_root(self):
+        """
+        Returns the directory where the working directory of
+        a new job is created: by default on the filesystem of
+        the output directory (see `_utils.finalise.work_root`),
+        or the directory set in the preferences, if any.
+        Returns None for the directory of the journals.
+        """
+        if self.appdata['tempdir_auto']:
+            return work_root(self.appdata['outputfile'], self.queue.journaldir)
+        return self.appdata['tempdir'] or None
     # ----------------------------------------------------------------------
 
-    def on_start(self):
+    def ram_root(self, albums):
         """
-        Prepares and updates the required operations
-        for thread instance
+        Returns the directory on RAM where the working
+        directories of the new jobs of `albums` are created,
+        see `_utils.scratch`, or None if disabled or if they
+        would take too much memory.
         """
-        self.tmpdir = tempfile.mkdtemp(suffix=None,
-                                       prefix='FFcuesplitterGUI_',
-                                       dir=None)
-        self.update_attributes_of_ffcuesplitter_api(self.tmpdir)  # set all
+        if not self.appdata['ram_scratch']:
+            return None
+        size = 0
+        for album in albums:
+            if album['journal'] is None:
+                self.update_attributes_of_ffcuesplitter_api(album['data'], '')
+                size += estimate_scratch(album['data'],
+                                         self.appdata['split_engine'],
+                                         self.appdata['ffmpeg_workers'])
+        if not size:
+            return None
+        root = ram_root(self.appdata['ram_scratch_dir'], size,
+                        self.appdata['ram_scratch_percent'] / 100)
+        if root is None:
+            self.parent.statusbar_msg(_("Not enough free memory for the "
+                                        "working directory, the tracks are "
+                                        "processed on disk"),
+                                      'GOLDENROD', 'BLACK')
+        return root
+    # ----------------------------------------------------------------------
 
-        try:
-            args = self.data.commandargs(self.data.audiotracks)
-        except Exception as err:
-            wx.MessageBox(f'{err}', "ERROR", wx.ICON_ERROR, self)
+    def on_start(self, auto=False):
+        """
+        Prepares and updates the required operations
+        for thread instance. All the pending albums
+        of queue are processed by the same thread.
+        The tracks completed by previous jobs are
+        first checked by the CheckJobs thread, see
+        `end_check`.
+        """
+        albums = self.queue.pending(auto, self.selected)
+        if not albums or self.checking is not None:
             return
-
-        self.parent.toolbar.EnableTool(13, True)  # stop
         self.parent.toolbar.EnableTool(12, False)  # start
         self.parent.toolbar.EnableTool(5, False)  # setup
-
-        logfile = os.path.join(self.appdata['logdir'], 'ffmpeg.log')
-        self.thread_type = Processing(args, logfile)
+        self.parent.statusbar_msg(_("Checking the albums..."))
+        ramroot = self.ram_root(albums)
+        signature = ' '.join(self.output_settings())
+        for album in albums:
+            self.update_attributes_of_ffcuesplitter_api(album['data'], '')
+        self.checking = (albums, signature, ramroot or self.work_root())
+        CheckJobs(albums, signature, self.appdata['ffmpeg_cmd'],
+                  self.appdata['skip_uptodate'])
     # ----------------------------------------------------------------------
 
-    def on_stop(self, event):
+    def end_check(self, results, preflight, error):
         """
-        The user changes his mind and wants to abort
-        the ongoing process.
+        Receives from the CheckJobs thread the tracks not to
+        be processed of each album being checked (completed by
+        previous jobs or up to date) and the pre-flight checks
+        (see `_utils.preflight`), or the error message, then
+        starts the job. Nothing is written before the checks
+        of `start_job` are passed.
         """
-        self.abort = True
-        self.thread_type.stop()
-        self.parent.statusbar_msg(_("wait... I'm aborting"),
-                                  'GOLDENROD',
-                                  'BLACK')
-        self.thread_type.join()
+        albums, signature, workroot = self.checking
+        self.checking = None
+        if error:
+            wx.MessageBox(error, "ERROR", wx.ICON_ERROR, self)
+        for album, result in zip(albums, results or ()):
+            (album['skip'], album['manifest'],
+             album['keys'], album['uptodate']) = result
+        albums = [album for album in albums if album in self.queue.albums]
+        if results and albums and self.preflight(preflight[0]):
+            self.start_job(albums, signature, workroot, preflight[1])
+        if self.thread_type is None:  # not started
+            self.parent.statusbar_msg('')
+            self.parent.toolbar.EnableTool(5, True)  # setup
+            self.enable_start()
     # ----------------------------------------------------------------------
 
-    def update_progress_bar(self, output, duration, track, status):
+    def start_job(self, albums, signature, workroot, conflicts):
         """
-        Update progress bar by receving ffmpeg stdout pipe on
-        thread loop. If `status` is not 0 means an error is
-        occurred. This is usually a syntax error or some
-        incompatibility in the arguments passed to the FFmpeg
-        command.
+        Checks the free space and the output `conflicts` (the
+        tracks already in the output directory), then creates
+        or resumes the job journals, whose new working
+        directories are created on `workroot`, and starts the
+        Processing thread.
         """
-        if not status == 0:
-            self.error = True
+        if not self.check_space(albums, workroot or self.queue.journaldir):
+            return
+        self.policy = self.conflict_policy(conflicts)
+        if self.policy is None:
             return
 
-        secs = round(int(output.split('=')[1]) / 1_000_000)
-        percent = secs / round(duration) * 100
-        msg = _("Processing... File number: {} | Status "
-                "Progress: {}%").format(track, round(percent))
-        self.barprog.SetValue(round(percent))
-        self.parent.statusbar_msg(msg, bgrd='BLACK', fgrd='GREEN YELLOW')
+        albumrecipes = []
+        for album in albums:
+            try:
+                self.queue.open_journal(album, signature, workroot)
+                albumrecipes.append(build_recipes(
+                    album['data'],
+                    self.appdata['split_engine'],
+                    self.appdata['ffmpeg_workers'],
+                    album['skip'],
+                    self.appdata['chunk_minutes'] * 60))
+            except Exception as err:
+                wx.MessageBox(f"{album['cuefile']}\n\n{err}", "ERROR",
+                              wx.ICON_ERROR, self)
+                return
+        args = schedule_recipes(merge_recipes(albumrecipes),
+                                self.appdata['ffmpeg_workers'])
+
+        self.parent.toolbar.EnableTool(13, True)  # stop
+        self.parent.toolbar.EnableTool(12, False)  # start
+        self.parent.toolbar.EnableTool(5, False)  # setup
+        self.btn_remove.Disable()
+        self.btn_clear.Disable()
+        self.btn_pause.SetLabel(_("Pause"))
+        self.btn_pause.Enable(platform.system() != 'Windows')
+
+        self.queue.start(albums, signature)
+        for album in albums:
+            self.queuelist.SetItem(self.queue.albums.index(album), 3,
+                                   CueGui.STATES['processing'])
+        self.finaliser = Finaliser()
+        for index, journal, row, path, outputdir, checksum in (
+                self.queue.unfinalised()):  # not moved by a previous job
+            self.finaliser.put(index, journal, row, path, outputdir,
+                               self.policy, checksum)
+
+        self.workers = self.appdata['ffmpeg_workers']
+        self.overall = (self.workers > 1
+                        or self.appdata['split_engine'] != 'track'
+                        or len(albums) > 1)
+        if self.selected is not None and self.data is not None:
+            self.set_data_list_ctrl()
+
+        self.running = {}
+        self.started = time.monotonic()
+        self.thread_type = Processing(args,
+                                      self.appdata['logdir'],
+                                      self.workers,
+                                      self.appdata['kill_grace_period'],
+                                      self.appdata['stall_timeout'],
+                                      self.appdata['track_retries'],
+                                      self.appdata['adaptive_workers'])
+        self.timer.Start(CueGui.REFRESH_MS)
     # ----------------------------------------------------------------------
 
-    def update_count_items(self, msg, end):
+    def end_processing(self, busy):
         """
-        Counts occurences for each loop and sets barprog range
-        to max percentage starting to 0 (min) value. Note that
-        when `msg` argument is equal to str('error') it means
-        that an exception is raised by thread with one of the
-        exceptions of class OSError, FileNotFoundError.
+        At the end of the process waits for the Finaliser
+        thread to move the last completed tracks and to clean
+        up the working directories, see `end_finalise`. The
+        working directory of an album is kept to resume the
+        job if the album is interrupted or some of its tracks
+        failed, so that only these are processed again. `busy` is
+        the sum of the wall times of the ffmpeg processes,
+        recorded on the history of the jobs.
         """
-        if end == 'error':
-            self.error = True
-            wx.MessageBox(f'{msg}', "FFcuesplitter-GUI", wx.ICON_ERROR, self)
-        else:
-            self.barprog.SetRange(100)  # set overall percentage range
-            self.barprog.SetValue(0)  # reset bar progress to 0
+        self.on_refresh(None)  # the latest progress
+        self.finalising = True
+        self.parent.toolbar.EnableTool(13, False)  # stop
+        self.btn_pause.SetLabel(_("Pause"))
+        self.btn_pause.Disable()
+        self.finaliser.finish(self.queue.cleanup(
+            self.abort is True or self.error is True, busy))
+        if self.abort is not True:
+            self.barprog.SetValue(0)
+            self.parent.statusbar_msg(_("Moving the last tracks to the "
+                                        "output directory..."))
     # ----------------------------------------------------------------------
 
-    def end_processing(self):
+    def end_finalise(self):
         """
-        At the end of the process
+        Once the tracks successfully processed are moved to
+        the output directory, also when other tracks of the
+        same album are failed (the failed tracks are listed in
+        the job log), updates the state of the albums. Albums
+        queued in the meantime are then processed automatically.
         """
+        self.timer.Stop()
+        self.finaliser = None
+        self.finalising = False
+        failed = self.queue.finish(self.abort is True, self.error is True)
+        for album in self.queue.jobs:
+            self.queuelist.SetItem(self.queue.albums.index(album), 3,
+                                   CueGui.STATES[album['state']])
+
         if self.abort is True:
             self.parent.statusbar_msg(_("...Interrupted"),
                                       'BLUE VIOLET', 'WHITE')
-        elif self.error is True:
-            self.parent.statusbar_msg(_("ERROR: Please open the Logs "
-                                        "window to get more details."),
-                                      'RED', 'WHITE')
+        elif [album for album in self.queue.jobs
+              if album['state'] in ('failed', 'partial')]:
+            if failed:
+                msg = _("ERROR: {} of {} tracks failed, please open the "
+                        "Logs window to get more details."
+                        ).format(failed, len(self.queue.jobmap))
+            else:
+                msg = _("ERROR: Please open the Logs "
+                        "window to get more details.")
+            self.parent.statusbar_msg(msg, 'RED', 'WHITE')
+            errors = [err for album in self.queue.jobs
+                      for err in album['errors']]
+            if errors:
+                wx.MessageBox(_('Some tracks could not be moved to the '
+                                'output directory:\n\n{}'
+                                ).format('\n'.join(errors)),
+                              "FFcuesplitter-GUI", wx.ICON_ERROR, self)
             notification_area(_("ERROR!"), _("An error has occurred.\n"
                                              "See Logs for details."),
                               wx.ICON_ERROR)
         else:
-            makeoutputdirs(self.data.kwargs['outputdir'])  # if doesn't exists
-            move_files_to_outputdir(self.data.kwargs['outputdir'],
-                                    self.data.kwargs['tempdir'])
             self.parent.statusbar_msg(_("...Finished!"),
                                       'DARK GREEN', 'WHITE')
             notification_area(_('Success!'), _("Get your files at the "
@@ -442,11 +942,18 @@ class CueGui(wx.Panel):
             self.barprog.SetValue(0)
 
         self.parent.toolbar.EnableTool(13, False)  # stop
-        self.parent.toolbar.EnableTool(12, True)  # start
         self.parent.toolbar.EnableTool(5, True)  # setup
+        self.btn_pause.SetLabel(_("Pause"))
+        self.btn_pause.Disable()
+        self.btn_remove.Enable(self.selected is not None)
+        self.btn_clear.Enable(bool(self.queue.albums))
+        aborted = self.abort
         self.thread_type = None
         self.abort = False
         self.error = False
+        self.queue.jobs = []
+        self.enable_start()
 
-        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        if not aborted and self.queue.pending(auto=True):
+            self.on_start(auto=True)  # albums added while processing
     # ----------------------------------------------------------------------
@@ -0,0 +1,313 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: job_progress.py
+Porpose: progress and control of the running job on the main panel
+Compatibility: Python3, wxPython4 Phoenix
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import time
+import wx
+from ffcuesplitter_gui._utils.progress import (ProgressParser,
+                                               format_stats)
+
+
+class JobProgressMixin:
+    """
+    Mixin of the main panel (see `_panels.cuesplitter_panel`)
+    which shows the progress of the running job and lets the
+    user control it: stop, pause, skip or move the pending
+    tracks (see `_threads.job_control`). It also receives
+    the tracks completed by the Processing thread and moved
+    by the Finaliser thread.
+
+    The state is shared with the panel: `thread_type`,
+    `finaliser`, `queue` (see `_utils.job_queue`), `running`,
+    `abort`, `error`, `finalising`, `overall`, `started`,
+    `policy`, `selected` and the widgets.
+    """
+    def on_stop(self, event):
+        """
+        The user changes his mind and wants to abort
+        the ongoing process. The thread is stopped
+        asynchronously, `end_processing` is called
+        as usual once it is terminated.
+        """
+        self.abort = True
+        self.thread_type.stop()
+        self.parent.toolbar.EnableTool(13, False)  # stop
+        self.btn_pause.Disable()
+        self.parent.statusbar_msg(_("wait... I'm aborting"),
+                                  'GOLDENROD',
+                                  'BLACK')
+    # ----------------------------------------------------------------------
+
+    def on_pause(self, event):
+        """
+        Suspends the ongoing process or resumes it, the
+        CPU is given back to the other programs in the
+        meantime (see `Processing.pause`).
+        """
+        if self.thread_type is None:
+            return
+        if self.thread_type.paused:
+            self.thread_type.resume()
+            self.btn_pause.SetLabel(_("Pause"))
+            self.parent.statusbar_msg(_("Processing..."),
+                                      bgrd='BLACK', fgrd='GREEN YELLOW')
+        else:
+            self.thread_type.pause()
+            self.btn_pause.SetLabel(_("Resume"))
+            self.parent.statusbar_msg(_("Paused"), 'GOLDENROD', 'BLACK')
+    # ----------------------------------------------------------------------
+
+    def on_track_menu(self, event):
+        """
+        self.tracklist context menu event. While processing,
+        the selected track can be skipped or moved at the top
+        or at the bottom of the pending tracks.
+        """
+        row = self.tracklist.GetFirstSelected()
+        if self.thread_type is None or self.abort or row < 0:
+            return
+        index = [key for key, (album, num) in self.queue.jobmap.items()
+                 if album is self.selected and num == row]
+        if not index or self.queue.progress.get(index[0], 0) >= 100:
+            return
+        menu = wx.Menu()
+        skip = menu.Append(wx.ID_ANY, _("Skip this track"))
+        first = menu.Append(wx.ID_ANY, _("Process next"))
+        last = menu.Append(wx.ID_ANY, _("Process last"))
+        menu.Bind(wx.EVT_MENU, lambda evt: self.on_skip_track(index[0]),
+                  skip)
+        menu.Bind(wx.EVT_MENU, lambda evt: self.on_move_track(index[0]),
+                  first)
+        menu.Bind(wx.EVT_MENU, lambda evt: self.on_move_track(index[0],
+                                                              False), last)
+        self.PopupMenu(menu)
+        menu.Destroy()
+    # ----------------------------------------------------------------------
+
+    def on_skip_track(self, index):
+        """
+        Skips the track at `index` of the ongoing process,
+        the tracks already completed are kept.
+        """
+        if self.thread_type is None:
+            return
+        if not self.thread_type.skip(index):
+            self.parent.statusbar_msg(_("This track cannot be skipped, it is "
+                                        "already processed or split along "
+                                        "with other tracks"),
+                                      'GOLDENROD', 'BLACK')
+            return
+        album, row = self.queue.jobmap[index]
+        album['skipped'].add(row)
+        self.queue.progress[index] = 100
+        if album is self.selected:
+            self.tracklist.SetItem(row, 5, _('Skipped'))
+    # ----------------------------------------------------------------------
+
+    def on_move_track(self, index, first=True):
+        """
+        Moves the pending track at `index` of the ongoing
+        process at the top of the queue, or at the bottom
+        if `first` is False.
+        """
+        if self.thread_type is None:
+            return
+        if not self.thread_type.move(index, first):
+            self.parent.statusbar_msg(_("This track is not pending"),
+                                      'GOLDENROD', 'BLACK')
+    # ----------------------------------------------------------------------
+
+    def update_status(self, output, duration, track, status, index):
+        """
+        Receives the error status of the ffmpeg processes from
+        thread. If `status` is not 0 means an error is occurred.
+        This is usually a syntax error or some incompatibility
+        in the arguments passed to the FFmpeg command. `index`
+        is the position of the track failed, the other tracks
+        of its album are still processed.
+        """
+        if not status == 0:
+            if index in self.queue.jobmap:
+                album, row = self.queue.jobmap[index]
+                album['failed'].add(row)
+                if album is self.selected:
+                    self.tracklist.SetItem(row, 5, _('Failed'))
+            else:
+                self.error = True
+    # ----------------------------------------------------------------------
+
+    def on_refresh(self, event):
+        """
+        self.timer event. Reads the progress of the tracks
+        from thread at a fixed refresh rate (see REFRESH_MS).
+        """
+        if self.abort:
+            return
+        if self.finalising:
+            moving = self.finaliser.get_progress()
+            if moving:
+                self.update_finalise_progress(*moving)
+        elif self.thread_type is not None:
+            pending = self.thread_type.get_progress()
+            if pending:
+                self.update_progress_bar(pending)
+    # ----------------------------------------------------------------------
+
+    def update_finalise_progress(self, name, copied, size, queued):
+        """
+        Updates the progress bar with the progress of the
+        track being moved to the output directory once the
+        processing is terminated, see `_threads.finaliser`.
+        """
+        percent = round(copied / size * 100) if size else 0
+        self.barprog.SetValue(percent)
+        msg = _("Moving to the output directory... File: {} | "
+                "Progress: {}%").format(name, percent)
+        if queued:
+            msg = _("{} | Queued: {}").format(msg, queued)
+        self.parent.statusbar_msg(msg, bgrd='BLACK', fgrd='GREEN YELLOW')
+    # ----------------------------------------------------------------------
+
+    def update_progress_bar(self, pending):
+        """
+        Update progress bar with the latest progress of each
+        track being processed, given by the ffmpeg stdout pipe
+        on thread loop. `pending` is a dict of {index: (position,
+        duration, track, stats)} items, where `index` is the
+        position of the track being processed. The progress bar
+        shows the overall percentage when several tracks are
+        processed at the same time, the status bar also shows
+        the speed, throughput and ETA (see `_utils.progress`)
+        of the last track of `pending`, see `update_status_bar`.
+        """
+        if not pending:
+            return
+        albums = []
+        for index, (position, duration, track, stats) in pending.items():
+            percent = min(position / max(duration, 1) * 100, 100)
+            if percent < 100 and not stats['end']:
+                self.running[track] = stats
+            else:
+                self.running.pop(track, None)
+            if index < 0:  # preparing the source audio
+                continue
+            album, row = self.queue.jobmap[index]
+            if row in album['skipped']:
+                continue
+            self.queue.progress[index] = percent
+            if album is self.selected:
+                self.tracklist.SetItem(row, 5, f'{round(percent)}%')
+            if album not in albums:
+                albums.append(album)
+
+        if len(self.queue.jobs) > 1:
+            for album in albums:
+                self.queuelist.SetItem(
+                    self.queue.albums.index(album), 3,
+                    f"{self.STATES['processing']} "
+                    f"{round(self.queue.album_progress(album))}%")
+
+        last, (position, duration, track, stats) = list(pending.items())[-1]
+        self.update_status_bar(last < 0, track,
+                               min(position / max(duration, 1) * 100, 100),
+                               stats)
+    # ----------------------------------------------------------------------
+
+    def update_status_bar(self, decoding, track, percent, stats):
+        """
+        Shows the progress of the given `track` on the status
+        bar and on the progress bar, or the overall progress
+        of the job if several tracks are processed at the same
+        time. `decoding` is True while preparing the source audio.
+        """
+        if decoding:
+            msg = _("Processing... Decoding the source audio | Status "
+                    "Progress: {}%").format(round(percent))
+            self.barprog.SetValue(round(percent))
+        elif self.overall:
+            overall = (sum(self.queue.progress.values())
+                       / len(self.queue.jobmap))
+            msg = _("Processing... File number: {} | Overall "
+                    "Progress: {}%").format(track, round(overall))
+            self.barprog.SetValue(round(overall))
+            elapsed = time.monotonic() - self.started
+            stats = {'speed': sum(item['speed'] or 0 for item in
+                                  self.running.values()),
+                     'rate': sum(item['rate'] or 0 for item in
+                                 self.running.values()),
+                     'eta': ProgressParser.eta(100, overall, elapsed),
+                     }
+        else:
+            msg = _("Processing... File number: {} | Status "
+                    "Progress: {}%").format(track, round(percent))
+            self.barprog.SetValue(round(percent))
+        figures = format_stats(stats)
+        if figures:
+            msg = f'{msg} | {figures}'
+        self.parent.statusbar_msg(msg, bgrd='BLACK', fgrd='GREEN YELLOW')
+    # ----------------------------------------------------------------------
+
+    def update_count_items(self, msg, end):
+        """
+        Counts occurences for each loop and sets barprog range
+        to max percentage starting to 0 (min) value. Note that
+        when `msg` argument is equal to str('error') it means
+        that an exception is raised by thread with one of the
+        exceptions of class OSError, FileNotFoundError.
+        """
+        if end == 'error':
+            self.error = True
+            wx.MessageBox(f'{msg}', "FFcuesplitter-GUI", wx.ICON_ERROR, self)
+        else:
+            self.barprog.SetRange(100)  # set overall percentage range
+            self.barprog.SetValue(0)  # reset bar progress to 0
+    # ----------------------------------------------------------------------
+
+    def update_journal(self, index, output, checksum):
+        """
+        Records on the album journal a track completed by
+        the Processing thread.
+        """
+        album, row = self.queue.record(index, output, checksum)
+        self.finaliser.put(index, album['journal'], row, output,
+                           album['data'].kwargs['outputdir'], self.policy,
+                           checksum)
+    # ----------------------------------------------------------------------
+
+    def update_finalised(self, index, output, error):
+        """
+        Updates the album with a track moved to the output
+        directory by the Finaliser thread. A track which
+        could not be moved is marked as failed.
+        """
+        album, row = self.queue.jobmap[index]
+        if error:
+            album['failed'].add(row)
+            album['errors'].append(error)
+            if album is self.selected:
+                self.tracklist.SetItem(row, 5, _('Failed'))
+        elif output:
+            album['moved'].append(os.path.basename(output))
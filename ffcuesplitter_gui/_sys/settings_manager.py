@@ -37,7 +37,7 @@ class ConfigManager:
     It represents the setting of the configuration file
     in its read and write aspects.
     """
-    VERSION = 4.1
+    VERSION = 5.4
     DEFAULT_OPTIONS = {
         "confversion": VERSION,
         "outputfile": f"{os.path.expanduser('~')}",
@@ -53,7 +53,25 @@ class ConfigManager:
         "toolbarpos": 2,
         "toolbartext": True,
         "showhidenmenu": False,
-        "panel_size": [890, 670]
+        "panel_size": [890, 670],
+        "ffmpeg_workers": 1,
+        "adaptive_workers": True,
+        "split_engine": "track",
+        "skip_uptodate": False,
+        "kill_grace_period": 5,
+        "stall_timeout": 60,
+        "track_retries": 2,
+        "chunk_minutes": 20,
+        "output_conflict": "ask",
+        "tempdir_auto": True,
+        "tempdir": "",
+        "ram_scratch": False,
+        "ram_scratch_dir": "/dev/shm",
+        "ram_scratch_percent": 50,
+        "cache_size_mb": 32,
+        "ffmpeg_nice": 0,
+        "ffmpeg_ionice": "default",
+        "ffmpeg_cpus": "",
         }
 
     def __init__(self, file_path):
@@ -0,0 +1,91 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: cuesheet_loader.py
+Porpose: load CUE sheets in background
+Compatibility: Python3, wxPython4 Phoenix
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+import wx
+from pubsub import pub
+from ffcuesplitter_gui._utils.cuesheet import CueSheet
+
+
+class LoadCueSheets(Thread):
+    """
+    This class represents a separate thread for loading
+    several CUE sheets at the same time (each loading runs
+    ffprobe on the source audio files, unless they are in the
+    given ProbeCache). A "LOAD_EVT" message is sent for each
+    CUE sheet once it is loaded.
+    """
+    MAX_WORKERS = 4  # max number of CUE sheets loaded at the same time
+    # ---------------------------------------------------------------
+
+    def __init__(self, items, kwargs, cache=None):
+        """
+        items: list of (key, pathname) tuples of CUE sheets.
+        kwargs: FFCueSplitter keyword arguments except `filename`.
+        cache: a ProbeCache instance or None
+        """
+        self.items = items
+        self.kwargs = kwargs
+        self.cache = cache
+
+        Thread.__init__(self)
+
+        self.start()  # start the thread
+    # --------------------------------------------------------------------#
+
+    def run(self):
+        """
+        Loads the CUE sheets on a pool of worker threads
+        """
+        workers = min(LoadCueSheets.MAX_WORKERS, len(self.items))
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            for key, filename in self.items:
+                pool.submit(self.load, key, filename)
+    # --------------------------------------------------------------------#
+
+    def load(self, key, filename):
+        """
+        Loads a single CUE sheet sending the new CueSheet
+        instance, or the error message if it fails.
+        """
+        try:
+            data = CueSheet(cache=self.cache, filename=filename,
+                            **self.kwargs)
+        except Exception as err:
+            wx.CallAfter(pub.sendMessage,
+                         "LOAD_EVT",
+                         key=key,
+                         data=None,
+                         error=f'{err}',
+                         )
+        else:
+            wx.CallAfter(pub.sendMessage,
+                         "LOAD_EVT",
+                         key=key,
+                         data=data,
+                         error='',
+                         )
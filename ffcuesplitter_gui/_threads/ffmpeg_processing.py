@@ -24,23 +24,76 @@ This file is part of FFcuesplitter-GUI.
    You should have received a copy of the GNU General Public License
    along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
 """
-from threading import Thread
+from threading import Thread, Lock, Event, Condition
+import os
+import shlex
+import shutil
 import time
 import subprocess
 import platform
-from ffcuesplitter.utils import Popen
 import wx
 from pubsub import pub
-if not platform.system() == 'Windows':
-    import shlex
+from ffcuesplitter_gui._threads.job_control import JobControlMixin
+from ffcuesplitter_gui._threads.job_log import JobLogMixin, timestamp
+from ffcuesplitter_gui._utils.journal import file_checksum
+from ffcuesplitter_gui._utils.concurrency import ConcurrencyController
+from ffcuesplitter_gui._utils.priority import ProcessPriority
+from ffcuesplitter_gui._utils.progress import ProgressParser
 
 
-class Processing(Thread):
+def wait_process(proc):
+    """
+    Waits for the given Popen process to terminate. Returns
+    a tuple (returncode, cputime), `cputime` is the user+system
+    CPU time in seconds of the process, or None if it is not
+    available on this platform.
+    """
+    if not hasattr(os, 'wait4') or proc.returncode is not None:
+        return proc.wait(), None
+    try:
+        status, rusage = os.wait4(proc.pid, 0)[1:]
+    except ChildProcessError:
+        return proc.wait(), None
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+    return proc.returncode, rusage.ru_utime + rusage.ru_stime
+
+
+class Processing(JobControlMixin, JobLogMixin, Thread):
     """
     This class represents a separate thread for running
     ffmpeg processes, which need to read the stdout/stderr
     in real time.
 
+    The recipes (see `_utils.split_engines.build_recipes`) are
+    processed by `STAGES`: the `prepare` recipes first and the
+    `join` recipes last. When `workers` is greater than 1, the
+    recipes of a stage are dispatched to a pool of worker
+    threads and up to `workers` ffmpeg processes run at the same
+    time, fewer if `adaptive` (see `_utils.concurrency`),
+    otherwise they are processed one at a time.
+
+    The `-progress` output of ffmpeg is parsed by the
+    `ProgressParser` class and only the latest progress of each
+    track is stored, the GUI reads it at a fixed refresh rate
+    by calling `get_progress`. A "TRACK_EVT" message is sent
+    for each completed track, with the checksum of its output
+    file, the "UPDATE_EVT" messages only for the errors and the
+    "END_EVT" message at the end, with the busy time of the
+    ffmpeg processes. The job can be controlled while running,
+    see `JobControlMixin`.
+
+    A failed or stalled recipe is run again up to `retries`
+    times, waiting `RETRY_DELAY` seconds before the first retry
+    and twice as long before each next one, then its tracks are
+    reported as failed. A failed `prepare` recipe fails only the
+    tracks depending on it, only a missing executable stops the
+    job.
+
+    The job is logged in the log directory, see `JobLogMixin`.
+
     NOTE MS Windows:
 
     subprocess.STARTUPINFO()
@@ -57,18 +110,63 @@ class Processing(Thread):
     get = wx.GetApp()  # get wx.App attribute
     appdata = get.appset
     NOT_EXIST_MSG = _("Is 'ffmpeg' installed on your system?")
+    RETRY_DELAY = 2  # seconds before the first retry, doubled each time
+    STAGES = ('prepare', 'recipes', 'join')  # processed in this order
     # ---------------------------------------------------------------
 
-    def __init__(self, args, logname):
+    def __init__(self, args, logdir, workers=1, grace=5,
+                 stall_timeout=0, retries=0, adaptive=False):
         """
         args: dict
-        logname: absolute path name of the file log.
+        logdir: path name of the log directory.
+        workers: max number of concurrent ffmpeg processes.
+        grace: seconds before killing the processes on stop.
+        stall_timeout: seconds without progress before killing
+                       a process, 0 disables the watchdog.
+        retries: times a failed or stalled recipe is run again.
+        adaptive: if True the number of concurrent processes
+                  is adjusted to the system load, up to `workers`.
         """
         self.stop_work_thread = False  # if True the process terminates
+        self.grace = grace  # grace period before SIGKILL
+        self.stall_timeout = stall_timeout
+        self.retries = max(0, int(retries))
+        self.watched = {}  # {proc: time of the latest progress}
+        self.stalled = set()  # the processes killed by watchdog
+        self.finished = Event()  # stops the watchdog
+        self.interrupt = Event()  # interrupts the retry delays on stop
+        self.results = {}  # {index: (name, result, attempts)} of tracks
+        self.procs = {}  # {proc: recipe data} of the processes running
+        self.queues = {}  # {stage: [(index, recipe)]} recipes pending
+        self.queue = []  # the pending recipes of the current stage
+        self.paused = False  # if True the processes are suspended
+        self.skipped = set()  # indexes of the tracks skipped by user
+        self.current = []  # the recipe data being processed
+        self.chunks = {}  # {index: {part: stats}} of the chunked tracks
+        self.labels = {}  # {index: track label} of the chunked tracks
+        self.broken = set()  # indexes of the chunked tracks failed
         self.args = args  # list of commands/aguments
-        self.logname = logname  # path name of file log
+        self.logname = os.path.join(logdir, Processing.LOGNAME)
+        self.jsonlog = os.path.join(logdir, Processing.JSONLOG)
+        self.tracklogs = os.path.join(logdir, Processing.TRACKLOGS)
+        self.numlogs = 0  # count of the track logs
+        self.workers = max(1, int(workers))  # pool size
+        self.controller = None  # adjusts the pool size, if adaptive
+        if adaptive and self.workers > 1:
+            self.controller = ConcurrencyController(self.workers)
+        self.slots = Condition()  # notified when a pool task ends
+        self.priority = ProcessPriority(self.appdata['ffmpeg_nice'],
+                                        self.appdata['ffmpeg_ionice'],
+                                        self.appdata['ffmpeg_cpus'])
+        self.active = 0  # pool tasks running
         self.count = 0  # count for loop
-        self.countmax = len(args['recipes'])  # length list
+        self.countmax = sum(len(recipe[1].get('tracks', ('',)))
+                            for stage in ('recipes', 'join')
+                            for recipe in args.get(stage, [])
+                            if 'chunk' not in recipe[1])  # num tracks
+        self.lock = Lock()  # protects count, pending and the shared log
+        self.pending = {}  # latest progress of tracks, see `get_progress`
+        self.busy = 0  # sum of the wall times of the ffmpeg processes
 
         Thread.__init__(self)
 
@@ -79,69 +177,676 @@ class Processing(Thread):
         """
         Subprocess initialize thread.
         """
-        for recipes in self.args['recipes']:
-            self.count += 1
-            track = f'{self.count}/{self.countmax}'
+        shutil.rmtree(self.tracklogs, ignore_errors=True)
+        os.makedirs(self.tracklogs, exist_ok=True)
+        self.write_event({'event': 'job_start',
+                          'tracks': self.countmax,
+                          'workers': self.workers,
+                          })
+        with self.slots:
+            self.queues = {stage: list(enumerate(self.args.get(stage, [])))
+                           for stage in Processing.STAGES}
+        if self.stall_timeout:
+            Thread(target=self.watchdog, daemon=True).start()
+        with open(self.logname, "w", encoding='utf-8') as log:
+            for stage in Processing.STAGES:
+                recipes = self.args.get(stage, [])
+                with self.slots:
+                    self.queue = self.queues[stage]
+                if self.workers > 1 and len(recipes) > 1:
+                    self.run_pool(log)
+                elif recipes:
+                    self.run_serial(log)
+                if self.stop_work_thread:
+                    break
+            self.write_summary(log)
+        self.finished.set()
+        for recipe in self.args.get('prepare', []):  # PCM intermediates
+            shutil.rmtree(recipe[1]['scratch'], ignore_errors=True)
+        self.write_event({'event': 'job_end',
+                          'stopped': self.stop_work_thread,
+                          'failed': sorted(index for index, item
+                                           in self.results.items()
+                                           if item[1] == 'failed'),
+                          })
 
+        time.sleep(.5)
+        wx.CallAfter(pub.sendMessage, "END_EVT", busy=self.busy)
+    # --------------------------------------------------------------------#
+
+    def run_serial(self, log):
+        """
+        Processes the pending recipes one at a time.
+        """
+        while True:
+            with self.slots:
+                while self.paused and not self.stop_work_thread:
+                    self.slots.wait()
+                item = self.next_recipe()
+            if item is None:
+                break
             wx.CallAfter(pub.sendMessage,
                          "COUNT_EVT",
                          msg='',
                          end='',
                          )
+            done = self.process_recipe(item[1], item[0], log)
+            with self.slots:
+                self.current.remove(item[1][1])
+            if not done or self.stop_work_thread:
+                break  # break 'while' loop
+    # --------------------------------------------------------------------#
+
+    def run_pool(self, log):
+        """
+        Processes the pending recipes on a pool of threads, one
+        for each ffmpeg process running. Up to `self.workers`
+        processes run at the same time, or less if the adaptive
+        controller (see `_utils.concurrency`) says so. The job
+        log is shared by all ffmpeg processes of the pool.
+        """
+        wx.CallAfter(pub.sendMessage,
+                     "COUNT_EVT",
+                     msg='',
+                     end='',
+                     )
+        limit = self.controller.limit if self.controller else self.workers
+        threads = []
+        while True:
+            with self.slots:
+                while True:
+                    if self.controller:
+                        limit = self.update_limit(limit, log)
+                    if self.stop_work_thread or (not self.paused
+                                                 and self.active < limit):
+                        break
+                    self.slots.wait(ConcurrencyController.INTERVAL)
+                item = self.next_recipe()
+                if item is None:
+                    break
+                self.active += 1
+            thread = Thread(target=self.pool_task,
+                            args=(item[1], item[0], log),
+                            daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+    # --------------------------------------------------------------------#
+
+    def next_recipe(self):
+        """
+        Pops the next pending recipe, leaving out the recipes
+        whose tracks are all skipped and the recipes of the
+        chunked tracks failed. Returns a tuple (index,
+        recipe), or None if there are no more recipes or the
+        thread was stopped. The caller must hold `self.slots`.
+        """
+        while self.queue and not self.stop_work_thread:
+            index, recipes = self.queue.pop(0)
+            if not self.cancelled(recipes[1]):
+                self.current.append(recipes[1])
+                return index, recipes
+        return None
+    # --------------------------------------------------------------------#
+
+    def pool_task(self, recipes, index, log):
+        """
+        Task executed by the pool threads.
+        """
+        try:
+            if not self.process_recipe(recipes, index, log):
+                self.stop_work_thread = True  # same as breaking serial loop
+        finally:
+            with self.slots:
+                self.current.remove(recipes[1])
+                self.active -= 1
+                self.slots.notify()
+    # --------------------------------------------------------------------#
+
+    def update_limit(self, limit, log):
+        """
+        Returns the max number of concurrent processes given
+        by the adaptive controller, reporting to the logs when
+        it is different from the previous `limit`.
+        """
+        newlimit = self.controller.update(self.active)
+        if newlimit != limit:
+            busy, iowait = self.controller.busy, self.controller.iowait
+            with self.lock:
+                log.write(f'\nCONCURRENCY: {newlimit} processes (CPU busy '
+                          f'{busy:.0%}, I/O wait {iowait:.0%})\n')
+                log.flush()
+            self.write_event({'event': 'concurrency',
+                              'limit': newlimit,
+                              'busy': round(busy, 3),
+                              'iowait': round(iowait, 3),
+                              })
+        return newlimit
+    # --------------------------------------------------------------------#
+
+    def process_recipe(self, recipes, index, log):
+        """
+        Runs the ffmpeg process of a single recipe sending
+        progress messages, up to `retries` more times if it
+        fails (see `run_attempts`), then reports its result.
+        Returns False if the executable could not be run,
+        True otherwise.
+        """
+        event = self.start_event(recipes, index, log)
+        if platform.system() == 'Windows':
+            cmdargs = recipes[0]
+        else:
+            cmdargs = shlex.split(recipes[0])
+        if self.controller:
+            cmdargs = self.set_threads(cmdargs, self.controller.threads())
+
+        if recipes[1].get('scratch'):
+            os.makedirs(recipes[1]['scratch'], exist_ok=True)
+        if recipes[1].get('join'):
+            self.write_concat_list(recipes[1])
+
+        with open(event['log'], "w", encoding='utf-8') as errlog:
+            result = self.run_attempts(cmdargs, recipes[1], event, log,
+                                       errlog)
+        if result is None:  # ffmpeg not found
+            return False
+        if result['error'] is None and result['attempt']:
+            self.report_done(recipes[1], event, result, log)
+        else:
+            self.report_failed(recipes[1], event, result, log)
+        self.remove_scratch(recipes[1])
+        return True
+    # --------------------------------------------------------------------#
+
+    def start_event(self, recipes, index, log):
+        """
+        Numbers the given recipe (a track, a range of tracks
+        or a part of a track) and writes its command to the
+        job log. Returns the dict of its event for the JSON
+        log (see `JobLogMixin.write_event`), whose `track` is
+        the label shown on the GUI and `log` the pathname of
+        its track log.
+        """
+        tracks = recipes[1].get('tracks')
+        with self.lock:
+            if recipes[1].get('prepare'):
+                track = _('decoding')
+                name = 'decoding'
+                index = -1
+            elif tracks:
+                track = f'{self.count + 1}-{self.count + len(tracks)}'
+                name = f'tracks {track}'
+                self.count += len(tracks)
+                index = tracks[0]['index']
+            elif 'chunk' in recipes[1] or 'join' in recipes[1]:
+                index = recipes[1]['index']
+                if index not in self.labels:  # the first chunk started
+                    self.count += 1
+                    self.labels[index] = f'{self.count}'
+                track = self.labels[index]
+                name = recipes[1]['titletrack']
+            else:
+                self.count += 1
+                track = f'{self.count}'
+                name = recipes[1]['titletrack']
+                index = recipes[1].get('index', index)
+            if index >= 0:
+                track = f'{track}/{self.countmax}'
+            part = None
+            if 'chunk' in recipes[1]:
+                part = (recipes[1]['chunk']['part'] + 1,
+                        recipes[1]['chunk']['parts'])
+                track = f'{track} part {part[0]}/{part[1]}'
+                name = f'{name} (part {part[0]} of {part[1]})'
+            self.numlogs += 1
+            tracklog = os.path.join(self.tracklogs,
+                                    f'{self.numlogs:03d} - {name}.log')
+            log.write(f'\nCOMMAND: {recipes[0]}\nLOG: {tracklog}\n')
+            log.flush()
+
+        event = {'event': 'track',
+                 'track': track,
+                 'index': index,
+                 'name': name,
+                 'start': timestamp(),
+                 'log': tracklog,
+                 }
+        if part:
+            event['part'] = f'{part[0]}/{part[1]}'
+        return event
+    # --------------------------------------------------------------------#
+
+    def run_attempts(self, cmdargs, recipe, event, log, errlog):
+        """
+        Runs the ffmpeg process of the given recipe data until
+        it is completed, up to `retries` more times if it fails
+        or stalls, waiting longer before each retry. Returns a
+        dict with the number of `attempt`, the last `error` (None
+        if completed), the exit `status`, the `parser` of the
+        progress, the `cputime` and the `wall` time, or None if
+        the executable could not be run.
+        """
+        started = time.monotonic()
+        result = {'attempt': 0, 'error': None, 'status': None,
+                  'parser': None, 'cputime': None}
+        while (result['attempt'] <= self.retries
+               and not self.cancelled(recipe)):
+            if result['attempt']:  # failed or stalled, retries with backoff
+                self.write_retry(log, errlog, event, result['attempt'],
+                                 result['error'])
+                self.remove_outputs(recipe)
+                self.interrupt.wait(Processing.RETRY_DELAY
+                                    * 2 ** (result['attempt'] - 1))
+                if self.cancelled(recipe):
+                    break
+            result['attempt'] += 1
+            try:
+                (result['parser'], result['status'],
+                 result['cputime'], stalled) = self.run_ffmpeg(
+                    cmdargs, recipe, event['track'], event['index'], errlog)
+            except FileNotFoundError as err:  # ffmpeg not found
+                excepterr = f"{err}\n  {Processing.NOT_EXIST_MSG}"
+                with self.lock:
+                    log.write(f'\nERROR: {excepterr}\n')
+                self.write_event({**event, 'exit': None,
+                                  'error': f'{err}'})
+                self.set_result(recipe, 'failed', result['attempt'])
+                wx.CallAfter(pub.sendMessage,
+                             "COUNT_EVT",
+                             msg=excepterr,
+                             end='error',
+                             )
+                return None
+            except OSError as err:
+                result['error'] = f'{err}'
+                errlog.write(f'\nERROR: {err}\n')
+                result['status'] = None
+                continue
+            if result['status'] == 0:
+                result['error'] = self.run_post_commands(recipe, log, errlog)
+                if result['error'] is None:
+                    break
+            elif stalled:
+                result['error'] = (f'no progress for {self.stall_timeout} '
+                                   f'sec., process killed')
+            else:
+                result['error'] = f"exit status {result['status']}"
+        result['wall'] = round(time.monotonic() - started, 3)
+        return result
+    # --------------------------------------------------------------------#
+
+    def report_done(self, recipe, event, result, log):
+        """
+        Reports to the logs and to the GUI the given recipe
+        data successfully completed, see `run_attempts`.
+        """
+        stats = result['parser'].stats
+        self.write_event({**event,
+                          'end': timestamp(),
+                          'exit': result['status'],
+                          'attempts': result['attempt'],
+                          'wall': result['wall'],
+                          'cpu': result['cputime']
+                          and round(result['cputime'], 3),
+                          'speed': stats['speed']
+                          and round(stats['speed'], 2),
+                          'size': self.output_size(recipe),
+                          })
+        self.write_stats(log, event['track'], stats)
+        if 'chunk' in recipe:  # completed by its join recipe
+            self.chunk_progress(recipe, {**stats,
+                                         'position': recipe['duration'],
+                                         'end': True})
+        else:
+            self.set_result(recipe, 'done', result['attempt'])
+            self.tracks_completed(recipe)
+    # --------------------------------------------------------------------#
+
+    def report_failed(self, recipe, event, result, log):
+        """
+        Reports to the logs and to the GUI the given recipe
+        data failed, skipped or stopped, see `run_attempts`.
+        Its partial output files are removed.
+        """
+        error = 'skipped' if self.is_skipped(recipe) else result['error']
+        reported = self.chunk_failed(recipe)
+        self.remove_outputs(recipe)
+        self.write_event({**event,
+                          'end': timestamp(),
+                          'exit': (result['status'] if result['attempt']
+                                   else None),
+                          'attempts': result['attempt'],
+                          'wall': result['wall'],
+                          'error': error or 'stopped',
+                          })
+        if reported:  # by another chunk of the track
+            pass
+        elif error == 'skipped':
+            with self.lock:
+                log.write(f"\nSKIPPED: track {event['track']}\n")
+            self.set_result(recipe, 'skipped', result['attempt'])
+        elif not self.stop_work_thread:
+            with self.lock:
+                log.write(f"\nERROR: track {event['track']}: {error}, "
+                          f"see \"{event['log']}\"\n")
+            if recipe.get('prepare'):
+                self.prepare_failed(recipe, result['status'],
+                                    result['attempt'])
+            else:
+                self.set_result(recipe, 'failed', result['attempt'])
+                self.send_error(recipe, result['status'])
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def remove_scratch(recipe):
+        """
+        Removes the scratch directory of the given recipe
+        data once processed, unless it is shared with the
+        other recipes (`prepare` and `chunk` recipes).
+        """
+        if recipe.get('scratch') and not (recipe.get('prepare')
+                                          or 'chunk' in recipe):
+            shutil.rmtree(recipe['scratch'], ignore_errors=True)
+    # --------------------------------------------------------------------#
+
+    def run_ffmpeg(self, cmdargs, recipe, track, index, errlog):
+        """
+        Runs a single attempt of the ffmpeg process of the given
+        recipe data, storing the progress of its tracks. The
+        process is watched by `watchdog` while running. Returns
+        a tuple (parser, status, cputime, stalled), `stalled` is
+        True if the process was killed by the watchdog.
+        """
+        tracks = recipe.get('tracks')
+        parser = ProgressParser(recipe['duration'])
+        started = time.monotonic()
+        with self.spawn(cmdargs,
+                        recipe,
+                        stdout=subprocess.PIPE,
+                        stderr=errlog,
+                        bufsize=1,
+                        encoding='utf8',
+                        universal_newlines=True) as proc:
+            self.watched[proc] = time.monotonic()
+            for line in proc.stdout:
+                if tracks and 'pts_time:' in line:
+                    position = float(line.split('pts_time:')[1])
+                    stats = parser.position(position)
+                else:
+                    stats = parser.feed(line)
+                if not stats:
+                    continue
+                self.watched[proc] = time.monotonic()  # not stalled
+                if tracks:
+                    tracks = self.position_progress(tracks, stats, track)
+                elif 'chunk' in recipe:
+                    self.chunk_progress(recipe, {
+                        **stats, 'position': min(stats['position'],
+                                                 recipe['duration'])})
+                elif not recipe.get('join'):  # completed by the chunks
+                    self.set_progress(index,
+                                      stats['position'],
+                                      recipe['duration'],
+                                      track,
+                                      stats)
+            status, cputime = wait_process(proc)
+            wall = time.monotonic() - started
+            with self.lock:
+                self.busy += wall
+            if self.controller:
+                self.controller.record(cputime, wall)
+            self.watched.pop(proc, None)
+            stalled = proc in self.stalled
+            self.stalled.discard(proc)
+
+        if tracks and not status:  # completes the remaining tracks
+            self.position_progress(tracks,
+                                   {**parser.stats, 'position': float('inf')},
+                                   track)
+        return parser, status, cputime, stalled
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def set_threads(cmdargs, threads):
+        """
+        Returns the given ffmpeg command (a string on MS Windows,
+        a list otherwise) with the number of `threads` set before
+        the input. Note that the audio encoders of FFmpeg are
+        single-threaded, only the decoders can use more threads.
+        """
+        if isinstance(cmdargs, str):
+            return cmdargs.replace(' -i ', f' -threads {threads} -i ', 1)
+        if '-i' not in cmdargs:
+            return cmdargs
+        pos = cmdargs.index('-i')
+        return cmdargs[:pos] + ['-threads', str(threads)] + cmdargs[pos:]
+    # --------------------------------------------------------------------#
+
+    def write_retry(self, log, errlog, event, attempt, error):
+        """
+        Reports to the logs that the failed (or stalled)
+        attempt of a recipe is going to be retried.
+        """
+        delay = Processing.RETRY_DELAY * 2 ** (attempt - 1)
+        line = (f"\nRETRY: track {event['track']}: {error} (attempt "
+                f"{attempt} of {self.retries + 1}), retrying in "
+                f"{delay} sec.\n")
+        errlog.write(line)
+        errlog.flush()
+        with self.lock:
+            log.write(line)
+            log.flush()
+        self.write_event({'event': 'retry',
+                          'track': event['track'],
+                          'index': event['index'],
+                          'name': event['name'],
+                          'attempt': attempt,
+                          'error': error,
+                          })
+    # --------------------------------------------------------------------#
+
+    def run_post_commands(self, recipe, log, errlog):
+        """
+        Runs the `post` commands of the given recipe data, if
+        any, writing their stderr to the `errlog` track log.
+        Returns a string with the error if a command fails or
+        the process was stopped, None otherwise.
+        """
+        for cmd in recipe.get('post', []):
+            if self.stop_work_thread:
+                return 'stopped'
+            with self.lock:
+                log.write(f'\nCOMMAND: {cmd}')
+                log.flush()
+            errlog.write(f'\nCOMMAND: {cmd}\n')
+            errlog.flush()
             if not platform.system() == 'Windows':
-                cmdargs = shlex.split(recipes[0])
+                cmd = shlex.split(cmd)
+            with self.spawn(cmd,
+                            recipe,
+                            stdout=subprocess.DEVNULL,
+                            stderr=errlog,
+                            encoding='utf8',
+                            universal_newlines=True) as proc:
+                if proc.wait():  # error
+                    return f'post command exit status {proc.wait()}'
+        return None
+    # --------------------------------------------------------------------#
+
+    def send_error(self, recipe, status):
+        """
+        Sends an "UPDATE_EVT" error message for each track
+        of the given failed recipe data.
+        """
+        for item in recipe.get('tracks', [recipe]):
+            wx.CallAfter(pub.sendMessage,
+                         "UPDATE_EVT",
+                         output='',
+                         duration=item['duration'],
+                         track='',
+                         status=status or 1,  # 0 if post command failed
+                         index=item.get('index', -1),
+                         )
+    # --------------------------------------------------------------------#
+
+    def tracks_completed(self, recipe):
+        """
+        Sends a "TRACK_EVT" message for each track written
+        by the given recipe data.
+        """
+        for item in recipe.get('tracks', [recipe]):
+            if 'output' not in item:
+                continue
+            try:
+                checksum = file_checksum(item['output'])
+            except OSError:
+                continue
+            wx.CallAfter(pub.sendMessage,
+                         "TRACK_EVT",
+                         index=item['index'],
+                         output=item['output'],
+                         checksum=checksum,
+                         )
+    # --------------------------------------------------------------------#
 
-            with open(self.logname, "w", encoding='utf-8') as log:
-                log.write(f'\nCOMMAND: {cmdargs}')
+    def prepare_failed(self, recipe, status, attempts):
+        """
+        Marks as failed the tracks depending on the given
+        failed `prepare` recipe data, whose recipes are then
+        left out. The tracks of the other sources and albums
+        are still processed.
+        """
+        depends = {'tracks': recipe['depends']}
+        with self.lock:
+            self.broken.update(item['index'] for item in depends['tracks'])
+        self.set_result(depends, 'failed', attempts)
+        self.send_error(depends, status)
+    # --------------------------------------------------------------------#
 
+    def chunk_failed(self, recipe):
+        """
+        Marks as failed the chunked track of the given failed
+        (or skipped) chunk recipe data, killing the other chunks
+        of the track still running. Returns True if the track
+        was already marked, i.e. its failure is already reported.
+        """
+        if 'chunk' not in recipe:
+            return False
+        with self.lock:
+            if recipe['index'] in self.broken:
+                return True
+            self.broken.add(recipe['index'])
+            procs = [proc for proc, item in self.procs.items()
+                     if 'chunk' in item and item['index'] == recipe['index']]
+        for proc in procs:
+            self.signal_process(proc, kill=True)
+        if not self.stop_work_thread:  # interrupts a retry delay, if any
+            self.interrupt.set()
+            self.interrupt.clear()
+        return False
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def remove_outputs(recipe):
+        """
+        Removes the output files, possibly partial, of the
+        given recipe data.
+        """
+        for item in recipe.get('tracks', [recipe]):
+            if os.path.isfile(item.get('output', '')):
                 try:
-                    with Popen(cmdargs,
-                               stdout=subprocess.PIPE,
-                               stderr=log,
-                               bufsize=1,
-                               encoding='utf8',
-                               universal_newlines=True) as proc:
-                        for line in proc.stdout:
-                            if "out_time_ms" in line.strip():
-                                wx.CallAfter(pub.sendMessage,
-                                             "UPDATE_EVT",
-                                             output=line,
-                                             duration=recipes[1]['duration'],
-                                             track=track,
-                                             status=0,
-                                             )
-                            if self.stop_work_thread:
-                                proc.terminate()
-                                break  # break second 'for' loop
-
-                        if proc.wait():  # error
-                            wx.CallAfter(pub.sendMessage,
-                                         "UPDATE_EVT",
-                                         output='',
-                                         duration=recipes[1]['duration'],
-                                         track='',
-                                         status=proc.wait(),
-                                         )
-                except (OSError, FileNotFoundError) as err:
-                    excepterr = f"{err}\n  {Processing.NOT_EXIST_MSG}"
-                    log.write(f'\nERROR: {excepterr}')
-                    wx.CallAfter(pub.sendMessage,
-                                 "COUNT_EVT",
-                                 msg=excepterr,
-                                 end='error',
-                                 )
-                    break
+                    os.remove(item['output'])
+                except OSError:
+                    pass
+    # --------------------------------------------------------------------#
 
-                if self.stop_work_thread:
-                    proc.terminate()
-                    break  # break second 'for' loop
+    def position_progress(self, tracks, stats, track):
+        """
+        Stores the progress of each track of a single process
+        recipe, given the `stats` of the process, whose
+        `position` is the position in seconds of the decoded
+        source audio. Returns the tracks not yet completed.
+        """
+        position = stats['position']
+        pending = []
+        for item in tracks:
+            if position < item['start']:
+                pending.append(item)
+                continue
+            secs = min(position - item['start'], item['duration'])
+            end = item['start'] + item['duration']
+            self.set_progress(item['index'],
+                              secs,
+                              item['duration'],
+                              track,
+                              {**stats, 'eta': ProgressParser.eta(
+                                  end, position, stats['elapsed'])})
+            if secs < item['duration']:
+                pending.append(item)
+        return pending
+    # --------------------------------------------------------------------#
 
-        time.sleep(.5)
-        wx.CallAfter(pub.sendMessage, "END_EVT")
+    def chunk_progress(self, recipe, stats):
+        """
+        Stores the progress of a chunked track, given the `stats`
+        of the process of one of its chunks (`recipe` data): the
+        position is the sum of the positions of the chunks and
+        the speed is the sum of the speeds of the chunks running.
+        """
+        chunk = recipe['chunk']
+        with self.lock:
+            parts = self.chunks.setdefault(recipe['index'], {})
+            parts[chunk['part']] = stats
+            items = list(parts.values())
+            track = f"{self.labels[recipe['index']]}/{self.countmax}"
+        running = [item for item in items if not item['end']]
+        ended = len(items) == chunk['parts'] and not running
+        position = chunk['length'] if ended else sum(item['position']
+                                                     for item in items)
+        speed = sum(item['speed'] or 0 for item in running)
+        rate = sum(item['rate'] or 0 for item in running)
+        self.set_progress(recipe['index'], position, chunk['length'], track,
+                          {**stats,
+                           'speed': speed or None,
+                           'size': sum(item['size'] or 0 for item in items),
+                           'rate': rate or None,
+                           'eta': ((chunk['length'] - position) / speed
+                                   if speed else None),
+                           'end': ended,
+                           })
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def write_concat_list(recipe):
+        """
+        Writes the list file of the concat demuxer, which joins
+        the chunks of the given `join` recipe data.
+        """
+        listfile, files = recipe['join']
+        with open(listfile, "w", encoding='utf-8') as chunks:
+            for name in files:
+                chunks.write(f"file '{name}'\n")
+    # --------------------------------------------------------------------#
+
+    def set_progress(self, index, position, duration, track, stats):
+        """
+        Stores the latest progress of the track at `index`,
+        replacing the one not yet read by the GUI.
+        """
+        with self.lock:
+            self.pending.pop(index, None)  # the most recent goes last
+            self.pending[index] = (position, duration, track, stats)
     # --------------------------------------------------------------------#
 
-    def stop(self):
+    def get_progress(self):
         """
-        Sets the stop work thread to terminate the process
+        Returns the progress stored since the last call as
+        dict of {index: (position, duration, track, stats)}
+        items, ordered from the least to the most recent.
+        `position` is the position in seconds of the track,
+        `stats` is the ProgressParser stats of its process.
         """
-        self.stop_work_thread = True
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        return pending
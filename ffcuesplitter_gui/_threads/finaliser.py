@@ -0,0 +1,170 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: finaliser.py
+Porpose: moves the completed tracks to the output directory in background
+Compatibility: Python3, wxPython4 Phoenix
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from threading import Thread
+from functools import partial
+import os
+import queue
+import wx
+from pubsub import pub
+from ffcuesplitter_gui._utils.finalise import finalise_file
+
+
+class Finaliser(Thread):
+    """
+    This class represents a separate thread which moves each
+    track to its output directory as soon as it is completed,
+    while the other tracks are still processed, instead of
+    moving all tracks at the end of the job. The tracks are
+    moved one at a time in the order they are queued, see
+    `_utils.finalise.finalise_file`, and recorded on the
+    journal of their album.
+
+    A "FINAL_EVT" message is sent for each track, with the
+    pathname of the destination (empty if the track is left
+    out by the conflict policy) or the error message. Once
+    `finish` is called and all queued tracks are moved, the
+    working directories of the albums are cleaned up and the
+    "FINAL_END_EVT" message is sent. All the file operations
+    are done here, so that the GUI never waits for a copy.
+
+    Usage:
+        >>> finaliser = Finaliser()
+        >>> finaliser.put(index, journal, row, source, outputdir,
+                          policy, checksum)
+        >>> finaliser.get_progress()  # from a timer
+        >>> finaliser.finish(cleanup)  # after the last track is queued
+    """
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.tracks = queue.Queue()  # tracks to move, None to finish
+        self.cleanup = []  # (journal, indexes, keep) of each album
+        self.failed = set()  # indexes of the tracks not moved
+        self.current = None  # (file name, bytes copied, size)
+
+        Thread.__init__(self, daemon=True)
+
+        self.start()  # start the thread
+    # --------------------------------------------------------------------#
+
+    def run(self):
+        """
+        Moves the queued tracks until `finish` is called,
+        then cleans up the working directories. Any error
+        is reported as a track not moved, the "FINAL_END_EVT"
+        message is always sent.
+        """
+        try:
+            self.move_tracks()
+            for journal, indexes, keep in self.cleanup:
+                try:
+                    if keep or self.failed & set(indexes):
+                        journal.clean()  # keeps the completed tracks
+                    else:
+                        journal.remove()
+                except OSError:
+                    pass  # cleaned up by the next job of the album
+        finally:
+            wx.CallAfter(pub.sendMessage, "FINAL_END_EVT")
+    # --------------------------------------------------------------------#
+
+    def move_tracks(self):
+        """
+        Moves the queued tracks one at a time, sending a
+        "FINAL_EVT" message for each one.
+        """
+        while True:
+            item = self.tracks.get()
+            if item is None:
+                break
+            index, journal, row, source, outputdir, policy, checksum = item
+            name = os.path.basename(source)
+            self.current = (name, 0, 0)
+            try:
+                output = finalise_file(source, outputdir, policy, checksum,
+                                       partial(self.update, name))
+                if output:
+                    journal.finalise(row, output)
+            except Exception as err:  # reported, the others are moved
+                self.failed.add(index)
+                output, error = '', f'{err}'
+            else:
+                error = ''
+            self.current = None
+            wx.CallAfter(pub.sendMessage,
+                         "FINAL_EVT",
+                         index=index,
+                         output=output or '',
+                         error=error,
+                         )
+    # --------------------------------------------------------------------#
+
+    def update(self, name, copied, size):
+        """
+        Updates the progress of the track being copied
+        """
+        self.current = (name, copied, size)
+    # --------------------------------------------------------------------#
+
+    def get_progress(self):
+        """
+        Returns a (file name, bytes copied, size, queued)
+        tuple of the track being moved, where `queued` is
+        the number of tracks waiting, or None if no track
+        is being moved.
+        """
+        current = self.current
+        if current is None:
+            return None
+        return (*current, self.tracks.qsize())
+    # --------------------------------------------------------------------#
+
+    def put(self, index, journal, row, source, outputdir, policy,
+            checksum=None):
+        """
+        Queues the completed track at `index` of the job,
+        whose file is `source`, to be moved to `outputdir`.
+        `row` is the position of the track on the album of
+        the given `journal`.
+        """
+        self.tracks.put((index, journal, row, source, outputdir, policy,
+                         checksum))
+    # --------------------------------------------------------------------#
+
+    def finish(self, cleanup=()):
+        """
+        Terminates the thread once the queued tracks are
+        moved. `cleanup` is a list of (journal, indexes, keep)
+        tuples: the working directory of each album is removed
+        with its journal, unless `keep` is True or some of its
+        tracks at `indexes` of the job could not be moved, in
+        which case only the completed tracks are kept to resume
+        the job. It does not block.
+        """
+        self.cleanup = list(cleanup)
+        self.tracks.put(None)
@@ -0,0 +1,140 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: job_checker.py
+Porpose: checks the tracks of the albums to be processed in background
+Compatibility: Python3, wxPython4 Phoenix
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+from threading import Thread
+import wx
+from pubsub import pub
+from ffcuesplitter_gui._utils.manifest import Manifest
+from ffcuesplitter_gui._utils.preflight import preflight
+
+
+class CheckJobs(Thread):
+    """
+    This class represents a separate thread which finds the
+    tracks already completed by the previous jobs of the albums
+    to be processed, see `_utils.journal.Journal.completed`,
+    and optionally the tracks already up to date in the output
+    directory, see `_utils.manifest.Manifest`. Both hash whole
+    files, which can take a while on large audio images, so
+    this is never done on the GUI. The tracks to be processed
+    are then checked at once, see `_utils.preflight`. Nothing
+    is written here.
+
+    A "CHECK_EVT" message is sent once all the albums are
+    checked, with the list of the (skip, manifest, keys,
+    uptodate) tuples of each album, see `check`, and the
+    (report, conflicts) tuple of `_utils.preflight.preflight`,
+    or the error message.
+    """
+    def __init__(self, albums, signature, ffmpeg_cmd, uptodate=False):
+        """
+        albums: list of the albums of queue to be processed
+        signature: output format and options of the job
+        ffmpeg_cmd: the FFmpeg executable
+        uptodate: if True find the tracks up to date
+        """
+        self.albums = albums
+        self.signature = signature
+        self.ffmpeg_cmd = ffmpeg_cmd
+        self.uptodate = uptodate
+
+        Thread.__init__(self, daemon=True)
+
+        self.start()  # start the thread
+    # --------------------------------------------------------------------#
+
+    def run(self):
+        """
+        Checks the albums one at a time, then the tracks
+        to be processed of all the albums at once.
+        """
+        results, checks = [], []
+        for album in self.albums:
+            try:
+                results.append(self.check(album))
+                checks.append(self.pending(album, results[-1]))
+            except Exception as err:
+                self.send_result(None, None, f"{album['cuefile']}\n\n{err}")
+                return
+        try:
+            checked = preflight(checks, self.ffmpeg_cmd)
+        except Exception as err:
+            self.send_result(None, None, f'{err}')
+            return
+        self.send_result(results, checked, '')
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def send_result(results, checked, error):
+        """
+        Sends the "CHECK_EVT" message.
+        """
+        wx.CallAfter(pub.sendMessage,
+                     "CHECK_EVT",
+                     results=results,
+                     preflight=checked,
+                     error=error,
+                     )
+    # --------------------------------------------------------------------#
+
+    def check(self, album):
+        """
+        Returns a (skip, manifest, keys, uptodate) tuple for
+        the given album: the set of indexes of the tracks not
+        to be processed, the Manifest of the output directory
+        (or None), the {index: (filename, key)} dict of the
+        tracks and the set of indexes of the tracks up to date.
+        """
+        data = album['data']
+        skip = (set() if album['journal'] is None else
+                album['journal'].completed(data.audiotracks, self.signature,
+                                           data.kwargs['outputdir']))
+        if not self.uptodate:
+            return skip, None, {}, set()
+        manifest = Manifest(data.kwargs['outputdir'])
+        keys = manifest.track_keys(data)
+        uptodate = {index for index, (name, key) in keys.items()
+                    if manifest.uptodate(name, key)}
+        return skip | uptodate, manifest, keys, uptodate
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def pending(album, result):
+        """
+        Returns the (name, data, rows) tuple of the given album
+        checked by `_utils.preflight`, given the `result` of
+        `check`: `rows` are the tracks to be processed or to
+        be moved to the output directory, the tracks already
+        up to date are left out.
+        """
+        data = album['data']
+        skip, uptodate = result[0], result[3]
+        rows = set(range(len(data.audiotracks))) - skip
+        if album['journal'] is not None:
+            rows |= {row for row, path, checksum
+                     in album['journal'].unfinalised() if row in skip}
+        return os.path.basename(album['cuefile']), data, rows - uptodate
@@ -0,0 +1,287 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: job_control.py
+Porpose: control of the FFmpeg processes of a running job
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from threading import Timer
+from contextlib import contextmanager
+import os
+import signal
+import time
+import subprocess
+import platform
+from ffcuesplitter.utils import Popen
+
+
+class JobControlMixin:
+    """
+    Mixin of the Processing thread which controls the ffmpeg
+    processes of the running job. Each ffmpeg process runs in
+    its own process group and is tracked from its start to its
+    end (see `spawn`), so that the job can be controlled while
+    running: `pause` suspends the processes (SIGSTOP, not on MS
+    Windows) and the start of the pending recipes until `resume`,
+    `skip` leaves out or kills the recipe of a track and `move`
+    reorders the pending recipes. The completed tracks are
+    never affected.
+
+    Stopping the job does not block: the process groups are
+    terminated at once (SIGTERM, or CTRL_BREAK_EVENT on MS
+    Windows) and killed if still running after `grace` seconds.
+    When `stall_timeout` is set, the `watchdog` thread kills
+    the processes which have not reported any progress for
+    that many seconds.
+
+    The state is shared with the Processing thread: `procs`,
+    `watched`, `stalled`, `queues`, `current`, `skipped`,
+    `broken`, `paused`, `stop_work_thread` and the `lock`
+    and `slots` which protect them.
+    """
+    if platform.system() == 'Windows':
+        GROUP = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        GROUP = {'start_new_session': True}
+    # ---------------------------------------------------------------
+
+    @contextmanager
+    def spawn(self, cmdargs, recipe, **kwargs):
+        """
+        Context manager which runs a ffmpeg process in its own
+        process group, with the priority set by the user, keeping
+        track of it until it is completed so that it can be
+        stopped by `stop`, paused by `pause` or killed by `skip`
+        (`recipe` is the recipe data the process belongs to).
+        """
+        group = dict(JobControlMixin.GROUP)
+        if 'creationflags' in group:  # MS Windows
+            group['creationflags'] |= self.priority.creationflags()
+        with Popen(self.priority.command(cmdargs),
+                   **group, **kwargs) as proc:
+            with self.lock:
+                self.procs[proc] = recipe
+            if self.stop_work_thread:  # stopped while starting
+                self.signal_process(proc)
+            elif self.paused:  # paused while starting
+                self.suspend_process(proc)
+            try:
+                yield proc
+            finally:
+                with self.lock:
+                    self.procs.pop(proc, None)
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def signal_process(proc, kill=False):
+        """
+        Terminates the process group of the given process, or
+        kills it if `kill` is True.
+        """
+        try:
+            if platform.system() == 'Windows':
+                if kill:
+                    proc.kill()
+                else:
+                    os.kill(proc.pid, signal.CTRL_BREAK_EVENT)
+            else:
+                os.killpg(proc.pid, signal.SIGKILL if kill
+                          else signal.SIGTERM)
+        except OSError:
+            pass  # already terminated
+    # --------------------------------------------------------------------#
+
+    def signal_processes(self, kill=False):
+        """
+        Terminates (or kills) all the processes running
+        """
+        with self.lock:
+            procs = list(self.procs)
+        for proc in procs:
+            self.signal_process(proc, kill)
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def suspend_process(proc, resume=False):
+        """
+        Suspends (SIGSTOP) the process group of the given
+        process, or resumes it (SIGCONT) if `resume` is True.
+        Not available on MS Windows.
+        """
+        try:
+            os.killpg(proc.pid, signal.SIGCONT if resume
+                      else signal.SIGSTOP)
+        except OSError:
+            pass  # already terminated
+    # --------------------------------------------------------------------#
+
+    def suspend_processes(self, resume=False):
+        """
+        Suspends (or resumes) all the processes running
+        """
+        with self.lock:
+            procs = list(self.procs)
+        for proc in procs:
+            self.suspend_process(proc, resume)
+    # --------------------------------------------------------------------#
+
+    def watchdog(self):
+        """
+        Watchdog thread, it kills the process group of the
+        ffmpeg processes which have not reported any progress
+        for `self.stall_timeout` seconds (e.g. a source on a
+        dead network mount), so that `run_ffmpeg` returns
+        instead of waiting forever. Any progress report is a
+        sign of life, also when the position does not move
+        (e.g. seeking into the input by decoding it).
+        """
+        while not self.finished.wait(1):
+            if self.paused:
+                continue
+            now = time.monotonic()
+            for proc, last in list(self.watched.items()):
+                if now - last > self.stall_timeout and proc.poll() is None:
+                    self.stalled.add(proc)
+                    self.watched.pop(proc, None)
+                    self.signal_process(proc, kill=True)
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def track_indexes(recipe):
+        """
+        Returns the list of the track indexes of the given
+        recipe data, empty for the `prepare` recipes.
+        """
+        return [item['index'] for item in recipe.get('tracks', [recipe])
+                if 'index' in item]
+    # --------------------------------------------------------------------#
+
+    def is_skipped(self, recipe):
+        """
+        Returns True if all the tracks of the given
+        recipe data are skipped.
+        """
+        indexes = self.track_indexes(recipe)
+        return bool(indexes) and self.skipped.issuperset(indexes)
+    # --------------------------------------------------------------------#
+
+    def cancelled(self, recipe):
+        """
+        Returns True if the given recipe data must not be
+        processed (again), i.e. the thread was stopped, its
+        tracks are skipped or its chunked track failed.
+        """
+        return (self.stop_work_thread or self.is_skipped(recipe)
+                or recipe.get('index') in self.broken)
+    # --------------------------------------------------------------------#
+
+    def pause(self):
+        """
+        Suspends the processes running and delays the start of
+        the pending recipes until `resume` is called. The time
+        spent in pause is not counted by the watchdog. Not
+        available on MS Windows.
+        """
+        with self.slots:
+            self.paused = True
+        self.suspend_processes()
+    # --------------------------------------------------------------------#
+
+    def resume(self):
+        """
+        Resumes the processes suspended by `pause` and the
+        start of the pending recipes.
+        """
+        with self.slots:
+            self.paused = False
+            now = time.monotonic()
+            for proc in list(self.watched):
+                self.watched[proc] = now  # the pause is not a stall
+            self.slots.notify_all()
+        self.suspend_processes(resume=True)
+    # --------------------------------------------------------------------#
+
+    def skip(self, index):
+        """
+        Skips the track at `index`: its recipe is left out if
+        pending, or its processes are killed if running, and
+        nothing of it is kept. A recipe which also processes
+        other tracks not skipped (see `_utils.split_engines`)
+        is not affected. Returns True if the track is skipped.
+        """
+        with self.slots:
+            recipes = [item[1][1] for queue in self.queues.values()
+                       for item in queue] + self.current
+            recipes = [recipe for recipe in recipes
+                       if index in self.track_indexes(recipe)]
+            if not recipes:  # already completed
+                return False
+            self.skipped.add(index)
+            if not self.is_skipped(recipes[0]):
+                self.skipped.discard(index)
+                return False
+        with self.lock:
+            procs = [proc for proc, recipe in self.procs.items()
+                     if any(recipe is item for item in recipes)]
+        for proc in procs:
+            self.signal_process(proc, kill=True)
+        if not self.stop_work_thread:  # interrupts a retry delay, if any
+            self.interrupt.set()
+            self.interrupt.clear()
+        return True
+    # --------------------------------------------------------------------#
+
+    def move(self, index, first=True):
+        """
+        Moves the pending recipes of the track at `index` (more
+        than one if the track is chunked) at the top of the queue
+        (to be processed next) or at the bottom if `first` is
+        False. Returns True if the recipes are moved.
+        """
+        with self.slots:
+            for queue in self.queues.values():
+                items = [item for item in queue
+                         if index in self.track_indexes(item[1][1])]
+                if items:
+                    others = [item for item in queue
+                              if not any(item is moved for moved in items)]
+                    queue[:] = items + others if first else others + items
+                    return True
+        return False
+    # --------------------------------------------------------------------#
+
+    def stop(self):
+        """
+        Sets the stop work thread to terminate the process,
+        then terminates the ffmpeg processes running and kills
+        them after the grace period. It does not block.
+        """
+        self.stop_work_thread = True
+        self.interrupt.set()
+        with self.slots:
+            self.slots.notify_all()
+        self.signal_processes()
+        if self.paused:  # the stopped processes must handle SIGTERM
+            self.suspend_processes(resume=True)
+        timer = Timer(self.grace, self.signal_processes, kwargs={'kill': True})
+        timer.daemon = True
+        timer.start()
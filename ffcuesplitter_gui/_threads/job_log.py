@@ -0,0 +1,133 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: job_log.py
+Porpose: logs of the FFmpeg processes of a job
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import datetime
+import json
+from ffcuesplitter_gui._utils.progress import format_size, format_time
+
+
+def timestamp():
+    """
+    Returns the current local time in ISO 8601 format
+    """
+    return datetime.datetime.now().isoformat(timespec='milliseconds')
+
+
+class JobLogMixin:
+    """
+    Mixin of the Processing thread which writes the logs of
+    the job, all files are written in the log directory:
+
+        `LOGNAME`: the job log, with the commands, the stats
+                   and the errors of all ffmpeg processes, and
+                   a per-track summary at the end.
+        `TRACKLOGS`: directory with the stderr of the ffmpeg
+                     processes, one file for each recipe. It
+                     is emptied at the start of each job.
+        `JSONLOG`: machine-readable job log, one JSON object
+                   per line for each event (job start and end,
+                   track processed). Each track event includes
+                   start/end timestamps, exit code, wall/CPU
+                   time and output size. This log is appended.
+
+    The state is shared with the Processing thread: `jsonlog`,
+    `results`, `countmax` and the `lock` which protects them
+    and the job log.
+    """
+    LOGNAME = 'ffmpeg.log'
+    JSONLOG = 'jobs.jsonl'
+    TRACKLOGS = 'tracks'
+    # ---------------------------------------------------------------
+
+    def write_event(self, event):
+        """
+        Appends the given event dict to the JSON-lines job log
+        """
+        line = json.dumps({'time': timestamp(), **event})
+        with self.lock:
+            with open(self.jsonlog, "a", encoding='utf-8') as jsonlog:
+                jsonlog.write(f'{line}\n')
+    # --------------------------------------------------------------------#
+
+    def write_stats(self, log, track, stats):
+        """
+        Writes to log the throughput figures of a completed
+        process, i.e. the final stats of its ProgressParser.
+        """
+        line = (f"\nSTATS: track {track}: "
+                f"{format_time(stats['position'])} of audio in "
+                f"{stats['elapsed']:.2f} sec.")
+        if stats['speed']:
+            line += f", speed {stats['speed']:.1f}x"
+        if stats['size']:
+            line += (f", {format_size(stats['size'])} written"
+                     f" at {format_size(stats['rate'])}/s")
+        with self.lock:
+            log.write(f'{line}\n')
+            log.flush()
+    # --------------------------------------------------------------------#
+
+    @staticmethod
+    def output_size(recipe):
+        """
+        Returns the size in bytes of the output files
+        written by the given recipe data.
+        """
+        size = 0
+        for item in recipe.get('tracks', [recipe]):
+            if os.path.isfile(item.get('output', '')):
+                size += os.path.getsize(item['output'])
+        return size
+    # --------------------------------------------------------------------#
+
+    def set_result(self, recipe, result, attempts):
+        """
+        Stores the result of each track of the given recipe
+        data for the summary written at the end of the job,
+        see `write_summary`. The `prepare` recipes have no
+        tracks and are left out.
+        """
+        with self.lock:
+            for item in recipe.get('tracks', [recipe]):
+                if 'index' in item:
+                    self.results[item['index']] = (item['titletrack'],
+                                                   result, attempts)
+    # --------------------------------------------------------------------#
+
+    def write_summary(self, log):
+        """
+        Writes to log the per-track summary of the job,
+        i.e. the result of each track processed in the
+        order of the album.
+        """
+        results = [item[1] for item in self.results.values()]
+        log.write(f"\nSUMMARY: {results.count('done')} done, "
+                  f"{results.count('failed')} failed, "
+                  f"{results.count('skipped')} skipped\n")
+        for index, (name, result, attempts) in sorted(self.results.items()):
+            log.write(f'  {result.upper():7} {index + 1}/{self.countmax}: '
+                      f'{name} (attempts: {attempts})\n')
@@ -0,0 +1,160 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: concurrency.py
+Porpose: adaptive number of concurrent FFmpeg processes
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import math
+import time
+
+
+class ConcurrencyController:
+    """
+    Adaptive controller of the number of ffmpeg processes
+    running at the same time, which never exceeds the given
+    `ceiling` (the maximum set by the user).
+
+    Every `INTERVAL` seconds the CPU busy and I/O wait
+    fractions of the system are sampled (from /proc/stat on
+    Linux, otherwise the busy fraction is given by the load
+    average, when available): a process is added while the
+    CPUs are not saturated and all the current slots are in
+    use, one is removed when the CPUs are oversubscribed or
+    the processes are waiting for the disk (e.g. codec copy
+    of large files). The average number of CPU cores used by
+    a single process (CPU time / wall time of the completed
+    ones) caps the number of processes, so that CPU-bound
+    encoders are not oversubscribed. Running processes are
+    never stopped: a lower limit just delays the next ones.
+
+    Usage:
+        >>> ctrl = ConcurrencyController(ceiling)
+        >>> limit = ctrl.update(running)  # before starting a process
+        >>> threads = ctrl.threads()  # `-threads` of the new process
+        >>> ctrl.record(cputime, wall)  # once a process is completed
+    """
+    INTERVAL = 2  # seconds between two adjustments
+    HIGH_LOAD = 0.95  # CPU busy fraction above which processes are removed
+    LOW_LOAD = 0.80  # CPU busy fraction below which processes are added
+    HIGH_IOWAIT = 0.25  # I/O wait fraction above which processes are removed
+
+    def __init__(self, ceiling, cpus=None):
+        """
+        ceiling: max number of concurrent processes
+        cpus: number of CPUs, default os.cpu_count()
+        """
+        self.ceiling = max(1, int(ceiling))
+        self.cpus = cpus or os.cpu_count() or 1
+        self.limit = min(self.ceiling, self.cpus)
+        self.usage = None  # average CPU cores used by a process
+        self.busy = None  # latest CPU busy fraction sampled
+        self.iowait = None  # latest I/O wait fraction sampled
+        self.last = time.monotonic()
+        self.times = self.cpu_times()
+    # ----------------------------------------------------------------#
+
+    @staticmethod
+    def cpu_times():
+        """
+        Returns a tuple (busy, iowait, total) of the CPU times
+        of the system read from /proc/stat, or None if it is
+        not available on this platform.
+        """
+        try:
+            with open('/proc/stat', 'r', encoding='utf-8') as stat:
+                fields = [int(val) for val in stat.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle, iowait = fields[3], fields[4] if len(fields) > 4 else 0
+        total = sum(fields[:8])  # guest times are part of user times
+        return total - idle - iowait, iowait, total
+    # ----------------------------------------------------------------#
+
+    def sample(self):
+        """
+        Samples and returns a tuple (busy, iowait) of the CPU
+        busy and I/O wait fractions since the previous sample,
+        or None if unknown. Without /proc/stat the busy fraction
+        is given by the load average and I/O wait is 0.
+        """
+        times = self.cpu_times()
+        if times and self.times and times[2] > self.times[2]:
+            total = times[2] - self.times[2]
+            busy = (times[0] - self.times[0]) / total
+            iowait = (times[1] - self.times[1]) / total
+            self.times = times
+            return busy, iowait
+        if times is None and hasattr(os, 'getloadavg'):
+            return os.getloadavg()[0] / self.cpus, 0
+        return None
+    # ----------------------------------------------------------------#
+
+    def record(self, cputime, wall):
+        """
+        Records the CPU time and the wall time in seconds
+        of a completed process.
+        """
+        if not cputime or wall <= 0:
+            return
+        usage = cputime / wall
+        if self.usage is None:
+            self.usage = usage
+        else:  # exponential moving average
+            self.usage = 0.7 * self.usage + 0.3 * usage
+    # ----------------------------------------------------------------#
+
+    def update(self, running):
+        """
+        Adjusts the limit given the number of processes
+        `running`, at most once every `INTERVAL` seconds.
+        Returns the max number of concurrent processes.
+        """
+        now = time.monotonic()
+        if now - self.last < ConcurrencyController.INTERVAL:
+            return self.limit
+        self.last = now
+        load = self.sample()
+        if load is None:
+            return self.limit
+        self.busy, self.iowait = load
+
+        cap = self.ceiling
+        if self.usage:
+            cap = min(cap, max(1, math.ceil(self.cpus / self.usage)))
+        if (self.busy > ConcurrencyController.HIGH_LOAD
+                or self.iowait > ConcurrencyController.HIGH_IOWAIT):
+            self.limit -= 1
+        elif (self.busy < ConcurrencyController.LOW_LOAD
+              and running >= self.limit):
+            self.limit += 1
+        self.limit = max(1, min(self.limit, cap))
+        return self.limit
+    # ----------------------------------------------------------------#
+
+    def threads(self):
+        """
+        Returns the number of threads of a new process, i.e.
+        the CPUs shared out among the processes allowed.
+        """
+        return max(1, self.cpus // self.limit)
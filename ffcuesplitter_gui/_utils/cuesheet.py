@@ -0,0 +1,132 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: cuesheet.py
+Porpose: thread-safe FFCueSplitter interface
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import logging
+from pathlib import Path
+from types import SimpleNamespace
+import chardet
+from deflacue.deflacue import CueParser
+from ffcuesplitter.cuesplitter import FFCueSplitter
+
+
+class CueSheet(FFCueSplitter):
+    """
+    FFCueSplitter opens the CUE sheet changing the current
+    working directory of the process, to resolve the relative
+    pathnames of the source audio files. This subclass resolves
+    these pathnames from the CUE sheet location instead, so that
+    several CUE sheets can be loaded at the same time by
+    different threads.
+
+    The FILE key of the `audiotracks` items is always an
+    absolute pathname.
+
+    If a ProbeCache instance is given (see `_utils.probecache`),
+    a CUE sheet already parsed and not modified since then is
+    loaded from the cache, without running ffprobe. In this
+    case the `cue` attribute only provides the CD info, i.e.
+    `cue.meta.data`.
+    """
+    def __init__(self, cache=None, **kwargs):
+        """
+        cache: a ProbeCache instance or None
+        kwargs: FFCueSplitter keyword arguments
+        """
+        self.cache = cache
+        super().__init__(**kwargs)
+    # ----------------------------------------------------------------#
+
+    def load_cached(self):
+        """
+        Loads the CUE sheet from the cache. Returns False
+        if not cached or out of date.
+        """
+        entry = self.cache.get(self.kwargs['filename'])
+        if entry is None:
+            return False
+        self.cue = SimpleNamespace(meta=SimpleNamespace(
+            data=entry['cd_info']))
+        self.cue_encoding = entry['cue_encoding']
+        self.probedata = entry['probedata']
+        self.audiotracks = entry['audiotracks']
+        if self.kwargs['collection']:
+            self.set_subdirs(entry['cd_info'].get('PERFORMER',
+                                                  'Unknown Artist'),
+                             entry['cd_info'].get('ALBUM', 'Unknown Album'))
+        return True
+    # ----------------------------------------------------------------#
+
+    def open_cuefile(self):
+        """
+        Gets cue file bytes for character set encoding
+        then starts file parsing via deflacue.
+        """
+        logging.debug("Processing: '%s'", self.kwargs['filename'])
+        self.check_cuefile()
+        if self.cache is not None and self.load_cached():
+            return
+
+        with open(self.kwargs['filename'], 'rb') as file:
+            cuebyte = file.read()
+            self.cue_encoding = chardet.detect(cuebyte)
+
+        parser = CueParser.from_file(self.kwargs['filename'],
+                                     encoding=self.cue_encoding['encoding'])
+        self.cue = parser.run()
+
+        for context in self.cue.files:
+            if not context.path.is_absolute():
+                context.path = Path(self.kwargs['dirname'], context.path)
+
+        self.deflacue_object_handler()
+        if self.cache is not None:
+            self.cache.put(self.kwargs['filename'],
+                           [str(context.path) for context in self.cue.files],
+                           {'audiotracks': self.audiotracks,
+                            'probedata': self.probedata,
+                            'cue_encoding': self.cue_encoding,
+                            'cd_info': self.cue.meta.data,
+                            })
+    # ----------------------------------------------------------------#
+
+
+def cuesheet_list(pathnames):
+    """
+    Given a list of pathnames of files and directories, returns
+    the sorted list of CUE sheets found. Directories are searched
+    recursively.
+    """
+    found = []
+    for path in pathnames:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                found += [os.path.join(root, f) for f in sorted(files)
+                          if os.path.splitext(f)[1] in ('.cue', '.CUE')]
+        elif os.path.splitext(path)[1] in ('.cue', '.CUE'):
+            found.append(path)
+    return found
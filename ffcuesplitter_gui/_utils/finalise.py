@@ -0,0 +1,198 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: finalise.py
+Porpose: moves the completed tracks to the output directory
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import errno
+import shutil
+import platform
+from ffcuesplitter_gui._utils.journal import file_checksum, WORK_DIRNAME
+
+# What to do when a track already exists in the output directory,
+# 'ask' is resolved once before the job is started.
+CONFLICT_POLICIES = ('ask', 'overwrite', 'skip', 'rename')
+COPY_BLOCK = 4 * 1024 * 1024  # bytes copied between progress updates
+FICLONE = 0x40049409  # Linux ioctl to share the blocks of a file (reflink)
+
+
+def existing_parent(pathname):
+    """
+    Returns `pathname` or its nearest parent directory
+    which exists.
+    """
+    pathname = os.path.abspath(pathname)
+    while not os.path.exists(pathname):
+        parent = os.path.dirname(pathname)
+        if parent == pathname:
+            break
+        pathname = parent
+    return pathname
+# ------------------------------------------------------------------------
+
+
+def work_root(outputdir, default):
+    """
+    Returns the directory where the working directories
+    of the jobs whose output directory is `outputdir` are
+    created, so that the completed tracks are moved with
+    a rename instead of a copy: the `default` directory
+    if it is on the same filesystem of `outputdir`, or a
+    hidden directory of `outputdir` otherwise. Returns
+    `default` if `outputdir` is not writable.
+    """
+    try:
+        outdev = os.stat(existing_parent(outputdir)).st_dev
+        if outdev == os.stat(existing_parent(default)).st_dev:
+            return default
+    except OSError:
+        return default
+    if not os.access(existing_parent(outputdir), os.W_OK):
+        return default
+    return os.path.join(outputdir, WORK_DIRNAME)
+# ------------------------------------------------------------------------
+
+
+def unique_name(outputdir, name):
+    """
+    Returns a pathname of `outputdir` for the file `name`
+    which does not exist yet, e.g. '01 - Intro (1).flac'
+    if '01 - Intro.flac' exists.
+    """
+    base, ext = os.path.splitext(name)
+    num = 1
+    while os.path.exists(os.path.join(outputdir, f'{base} ({num}){ext}')):
+        num += 1
+    return os.path.join(outputdir, f'{base} ({num}){ext}')
+# ------------------------------------------------------------------------
+
+
+def reflink(fsrc, fdst):
+    """
+    Makes `fdst` share the data blocks of `fsrc` (open
+    files) on the filesystems which support it (e.g. Btrfs,
+    XFS), without copying any data. Returns False if not
+    supported.
+    """
+    if platform.system() != 'Linux':
+        return False
+    import fcntl  # Unix only
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        return False
+    return True
+# ------------------------------------------------------------------------
+
+
+def copy_file(source, dest, progress=None):
+    """
+    Copies the file `source` to `dest` with its permission
+    bits and times, calling `progress(copied, size)` after
+    each block, if given. The data is shared with a reflink
+    if possible, otherwise copied by the kernel with
+    `os.copy_file_range` (Linux), falling back to a copy
+    through user space buffers.
+    """
+    size = os.path.getsize(source)
+    copied, done = 0, False
+    with open(source, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        if reflink(fsrc, fdst):
+            copied, done = size, True
+        elif hasattr(os, 'copy_file_range'):
+            try:
+                while copied < size:
+                    sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(),
+                                              COPY_BLOCK)
+                    if not sent:
+                        break
+                    copied += sent
+                    if progress:
+                        progress(copied, size)
+                done = True
+            except OSError as err:
+                if copied or err.errno not in (errno.EXDEV, errno.ENOSYS,
+                                               errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+        if not done:  # copy through user space buffers
+            fsrc.seek(0)
+            for block in iter(lambda: fsrc.read(COPY_BLOCK), b''):
+                fdst.write(block)
+                copied += len(block)
+                if progress:
+                    progress(copied, size)
+    if progress:
+        progress(copied, size)
+    shutil.copystat(source, dest)
+# ------------------------------------------------------------------------
+
+
+def finalise_file(source, outputdir, policy='overwrite', checksum=None,
+                  progress=None):
+    """
+    Validates the track file `source` and moves it to
+    `outputdir`, resolving a name conflict with the given
+    `policy` (see `CONFLICT_POLICIES`, 'ask' is the same
+    as 'overwrite' here).
+
+    On the same filesystem the file is just renamed. Across
+    filesystems it is copied to a hidden temporary file of
+    `outputdir`, which is checked against the `checksum` of
+    the track, if any, then renamed: a partial copy is never
+    seen in the output directory. The `progress` callable,
+    if given, is called while copying, see `copy_file`.
+
+    Returns the pathname of the destination, or None if the
+    file is left out by the 'skip' policy. Raises OSError if
+    the file is not valid or cannot be moved.
+    """
+    if not os.path.isfile(source) or not os.path.getsize(source):
+        raise OSError(f'Missing or empty file: "{source}"')
+    name = os.path.basename(source)
+    dest = os.path.join(outputdir, name)
+    if os.path.exists(dest):
+        if policy == 'skip':
+            return None
+        if policy == 'rename':
+            dest = unique_name(outputdir, name)
+    os.makedirs(outputdir, exist_ok=True)
+    try:
+        os.replace(source, dest)
+        return dest
+    except OSError as err:
+        if err.errno != errno.EXDEV:  # not a cross-device link
+            raise
+
+    part = os.path.join(outputdir, f'.{name}.part')
+    try:
+        copy_file(source, part, progress)
+        if checksum and file_checksum(part) != checksum:
+            raise OSError(f'Corrupted copy of "{source}"')
+        os.replace(part, dest)
+    except OSError:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    os.remove(source)
+    return dest
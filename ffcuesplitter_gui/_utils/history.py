@@ -0,0 +1,156 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: history.py
+Porpose: history of the past jobs for the estimates
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import shutil
+from ffcuesplitter_gui._utils.finalise import existing_parent
+from ffcuesplitter_gui._utils.scratch import source_probe, bytes_per_second
+
+
+class History:
+    """
+    Persistent on-disk history of the past jobs, which records
+    for each output `signature` (format and encoder options,
+    see `_utils.journal`) the audio seconds processed, the size
+    of the tracks written and the busy time of the FFmpeg
+    processes, i.e. the sum of the wall times of all processes,
+    however many were run at the same time. The measures of the latest
+    jobs count more, since the totals are scaled down beyond
+    `MAX_SECONDS` of audio.
+
+    Usage:
+        >>> history = History(filename)
+        >>> history.record(signature, seconds, size, busy)
+        >>> rates = history.rates(signature)
+    """
+    MAX_SECONDS = 100 * 3600  # audio seconds kept for each signature
+
+    def __init__(self, filename):
+        """
+        filename: pathname of the history file
+        """
+        self.filename = filename
+        self.data = {}
+
+        if os.path.isfile(self.filename):
+            try:
+                with open(self.filename, 'r', encoding='utf-8') as fjson:
+                    self.data = json.load(fjson)
+            except (OSError, ValueError):
+                pass  # a corrupted history is just an empty history
+    # ----------------------------------------------------------------#
+
+    def save(self):
+        """
+        Writes the history file atomically
+        """
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        tmp = f'{self.filename}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fjson:
+            json.dump(self.data, fjson, indent=4)
+        os.replace(tmp, self.filename)
+    # ----------------------------------------------------------------#
+
+    def record(self, signature, seconds, size, busy):
+        """
+        Records a job which processed `seconds` of audio,
+        writing `size` bytes in `busy` seconds of processing.
+        """
+        item = self.data.setdefault(signature, {'seconds': 0,
+                                                'size': 0,
+                                                'busy': 0})
+        item['seconds'] += seconds
+        item['size'] += size
+        item['busy'] += busy
+        if item['seconds'] > History.MAX_SECONDS:
+            scale = History.MAX_SECONDS / item['seconds']
+            for key in item:
+                item[key] *= scale
+        self.save()
+    # ----------------------------------------------------------------#
+
+    def rates(self, signature):
+        """
+        Returns a (bytes, busy) tuple of the bytes written and
+        the busy seconds per second of audio of the given
+        `signature`, or None if no job was recorded.
+        """
+        item = self.data.get(signature)
+        if not item or not item['seconds']:
+            return None
+        return (item['size'] / item['seconds'],
+                item['busy'] / item['seconds'])
+# ------------------------------------------------------------------------
+
+
+def estimate_job(history, signature, albums, workers):
+    """
+    Returns a (size, wall) tuple with the estimated size in
+    bytes of the tracks and the wall time in seconds of the
+    job, where `albums` is a list of (data, rows) tuples
+    of the FFCueSplitter instances and the indexes of their
+    tracks to process. Without history of the `signature`,
+    `size` is an upper bound (see `_utils.scratch`) and
+    `wall` is None.
+    """
+    seconds = sum(data.audiotracks[row]['DURATION']
+                  for data, rows in albums for row in rows)
+    rates = history.rates(signature)
+    if rates:
+        return seconds * rates[0], seconds * rates[1] / max(workers, 1)
+    size = 0
+    outputformat = signature.split()[0]
+    for data, rows in albums:
+        for row in rows:
+            track = data.audiotracks[row]
+            fmt, stream = source_probe(data.probedata, track['FILE'])
+            size += (bytes_per_second(outputformat, fmt, stream)
+                     * track['DURATION'])
+    return size, None
+# ------------------------------------------------------------------------
+
+
+def lacking_space(size, dirnames):
+    """
+    Returns the list of the (dirname, free bytes) tuples of
+    the given directories whose filesystem has less than `size`
+    bytes free, each filesystem is checked only once.
+    """
+    lacking, devices = [], set()
+    for dirname in dirnames:
+        path = existing_parent(dirname)
+        try:
+            device = os.stat(path).st_dev
+            free = shutil.disk_usage(path).free
+        except OSError:
+            continue
+        if device in devices:
+            continue
+        devices.add(device)
+        if free < size:
+            lacking.append((dirname, free))
+    return lacking
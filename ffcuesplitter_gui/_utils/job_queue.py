@@ -0,0 +1,346 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: job_queue.py
+Porpose: queue of the albums to process and state of the current job
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+from ffcuesplitter_gui._utils.cuesheet import cuesheet_list
+from ffcuesplitter_gui._utils.journal import Journal
+from ffcuesplitter_gui._utils.probecache import ProbeCache, CACHE_DIRNAME
+from ffcuesplitter_gui._utils.history import (History,
+                                              estimate_job,
+                                              lacking_space)
+from ffcuesplitter_gui._utils.progress import format_size, format_time
+
+
+class JobQueue:
+    """
+    The queue of the albums imported on the main panel and
+    the state of the job processing them: the job journal
+    of each album (see `_utils.journal`), the track indexes
+    of the job, their progress and the figures measured for
+    the estimates (see `_utils.history`). Nothing here is
+    shown, the panel shows the albums and asks the user.
+
+    Each album is a dict, see `add`. The tracks of a job are
+    numbered across all its albums, in the order of the
+    albums, see `_utils.split_engines.merge_recipes`.
+
+    Usage:
+        >>> queue = JobQueue(confdir, cache_size)
+        >>> queue.add(pathnames)  # then loaded in background
+        >>> queue.start(queue.pending(), signature)
+        >>> queue.record(index, output, checksum)  # each track
+        >>> queue.finish(abort, error)
+    """
+    def __init__(self, confdir, cache_size):
+        """
+        confdir: the configuration directory
+        cache_size: max size in bytes of the probe cache
+        """
+        self.albums = []  # the albums imported, see `add`
+        self.newkey = 0  # unique key of the next album added
+        self.jobs = []  # the albums being processed
+        self.jobmap = {}  # track index: (album, row) being processed
+        self.progress = {}  # percentage of each track being processed
+        self.resume = []  # CUE sheets to resume without asking
+        self.signature = ''  # output format and options of the job
+        self.measured = [0, 0]  # audio seconds and bytes of the job
+        self.journaldir = os.path.join(confdir, 'journal')
+        self.history = History(os.path.join(confdir, 'history.json'))
+        self.probecache = ProbeCache(os.path.join(confdir, CACHE_DIRNAME),
+                                     cache_size)
+    # ----------------------------------------------------------------#
+
+    def add(self, pathnames):
+        """
+        Adds to queue the CUE sheets found on the given list
+        of files and directories which are not queued yet.
+        Returns the list of the albums added.
+        """
+        queued = [album['cuefile'] for album in self.albums]
+        added = []
+        for cuefile in cuesheet_list(pathnames):
+            cuefile = os.path.abspath(cuefile)
+            if cuefile in queued:
+                continue
+            queued.append(cuefile)
+            album = {'key': self.newkey,
+                     'cuefile': cuefile,
+                     'data': None,  # the ffcuesplitter instance
+                     'state': 'loading',
+                     'errmsg': '',
+                     'journal': None,  # the Journal of the job
+                     'manifest': None,  # the Manifest of the outputdir
+                     'keys': {},  # index: (filename, key) of the tracks
+                     'skip': set(),  # indexes of the tracks not processed
+                     'failed': set(),  # indexes of the tracks failed
+                     'skipped': set(),  # indexes of the tracks skipped
+                     }
+            self.newkey += 1
+            self.albums.append(album)
+            added.append(album)
+        return added
+    # ----------------------------------------------------------------#
+
+    def get(self, key):
+        """
+        Returns the album of queue with the given key,
+        None otherwise.
+        """
+        for album in self.albums:
+            if album['key'] == key:
+                return album
+        return None
+    # ----------------------------------------------------------------#
+
+    def pending(self, auto=False, selected=None):
+        """
+        Returns the albums of queue to be processed, i.e. the
+        queued albums and, unless `auto` is True, the failed
+        or interrupted ones. If there is nothing else to do,
+        the `selected` album is processed again.
+        """
+        states = (('ready',) if auto else
+                  ('ready', 'failed', 'partial', 'interrupted'))
+        albums = [album for album in self.albums
+                  if album['state'] in states]
+        if not albums and not auto and selected is not None:
+            if selected['state'] == 'done':
+                albums = [selected]
+        return albums
+    # ----------------------------------------------------------------#
+
+    def interrupted(self):
+        """
+        Returns the list of the CUE sheets of the jobs
+        interrupted before completion, see `_utils.journal`.
+        """
+        return Journal.pending(self.journaldir)
+    # ----------------------------------------------------------------#
+
+    def discard(self, cuefiles):
+        """
+        Discards the interrupted jobs of the given CUE sheets
+        """
+        for cuefile in cuefiles:
+            Journal(self.journaldir, cuefile).remove()
+    # ----------------------------------------------------------------#
+
+    def journal(self, album):
+        """
+        Returns the Journal of a previous job of the given
+        album, which must be resumed or discarded, or None.
+        The jobs of the CUE sheets in `resume` are resumed.
+        """
+        journal = Journal(self.journaldir, album['cuefile'])
+        if not journal.exists():
+            return None
+        if album['cuefile'] in self.resume:
+            self.resume.remove(album['cuefile'])
+            album['journal'] = journal
+            return None
+        return journal
+    # ----------------------------------------------------------------#
+
+    def open_journal(self, album, signature, workroot):
+        """
+        Creates the journal of a new job of the given album,
+        whose working directory is created on `workroot`, or
+        resumes the previous one keeping only the tracks not
+        to be processed. May raise OSError.
+        """
+        journal = album['journal']
+        if journal is None:
+            journal = Journal(self.journaldir, album['cuefile'])
+            journal.reset(signature, workroot)
+            album['journal'] = journal
+        else:
+            journal.resume(signature, album['skip'])
+        album['data'].kwargs['tempdir'] = journal.workdir
+    # ----------------------------------------------------------------#
+
+    def start(self, albums, signature):
+        """
+        Starts a new job of the given albums, whose tracks
+        not to be processed are already completed.
+        """
+        self.jobs = albums
+        self.jobmap = {}
+        self.signature = signature
+        self.measured = [0, 0]
+        for album in albums:
+            album['state'] = 'processing'
+            album['failed'] = set()
+            album['skipped'] = set()
+            album['moved'] = []  # file names moved to the output directory
+            album['errors'] = []  # the tracks which could not be moved
+            for row in range(len(album['data'].audiotracks)):
+                self.jobmap[len(self.jobmap)] = (album, row)
+        self.progress = {index: 100 for index, (album, row)
+                         in self.jobmap.items() if row in album['skip']}
+    # ----------------------------------------------------------------#
+
+    def unfinalised(self):
+        """
+        Returns the list of the (index, journal, row, path,
+        outputdir, checksum) tuples of the tracks completed
+        by a previous job but not moved to the output
+        directory yet, see `_threads.finaliser`.
+        """
+        tracks, offset = [], 0
+        for album in self.jobs:
+            for row, path, checksum in album['journal'].unfinalised():
+                tracks.append((offset + row, album['journal'], row, path,
+                               album['data'].kwargs['outputdir'], checksum))
+            offset += len(album['data'].audiotracks)
+        return tracks
+    # ----------------------------------------------------------------#
+
+    def record(self, index, output, checksum):
+        """
+        Records on the album journal the track at `index`
+        of the job, completed in the `output` file, and its
+        size for the estimates. Returns its (album, row).
+        """
+        album, row = self.jobmap[index]
+        album['journal'].record(row, album['data'].audiotracks[row],
+                                os.path.basename(output), checksum)
+        try:
+            self.measured[1] += os.path.getsize(output)
+        except OSError:
+            pass
+        else:
+            self.measured[0] += album['data'].audiotracks[row]['DURATION']
+        return album, row
+    # ----------------------------------------------------------------#
+
+    def album_progress(self, album):
+        """
+        Returns the percentage of the given album of the job
+        """
+        items = [self.progress.get(key, 0) for key, val in
+                 self.jobmap.items() if val[0] is album]
+        return sum(items) / len(items)
+    # ----------------------------------------------------------------#
+
+    def cleanup(self, keep, busy):
+        """
+        Records the job on the history of the estimates,
+        unless `keep` is True (e.g. aborted), and returns
+        the list of the (journal, indexes, keep) tuples of
+        the albums, see `_threads.finaliser.Finaliser.finish`.
+        The journal of an album is kept to resume the job if
+        `keep` is True or if some of its tracks failed, so
+        that only these are processed again. `busy` is the
+        sum of the wall times of the ffmpeg processes.
+        """
+        if not keep and self.measured[0]:
+            try:
+                self.history.record(self.signature, *self.measured, busy)
+            except OSError:
+                pass  # estimates are not essential
+        offset, cleanup = 0, []
+        for album in self.jobs:
+            total = len(album['data'].audiotracks)
+            cleanup.append((album['journal'], range(offset, offset + total),
+                            keep or bool(album['failed'])))
+            offset += total
+        return cleanup
+    # ----------------------------------------------------------------#
+
+    def finish(self, abort, error):
+        """
+        Updates the state of the albums of the job once all
+        its tracks are moved to the output directory, also
+        when other tracks of the same album are failed, and
+        records the moved tracks on the manifests. Returns
+        the number of tracks failed.
+        """
+        failed = 0
+        for album in self.jobs:
+            total = len(album['data'].audiotracks)
+            failed += len(album['failed'])
+            if abort:
+                album['state'] = 'interrupted'
+            elif error or len(album['failed']) == total:
+                album['state'] = 'failed'
+            else:
+                if album['manifest'] is not None:
+                    self.update_manifest(album)
+                album['state'] = 'partial' if album['failed'] else 'done'
+            if album['state'] == 'done':
+                album['journal'] = None  # removed by the Finaliser thread
+        return failed
+    # ----------------------------------------------------------------#
+
+    @staticmethod
+    def update_manifest(album):
+        """
+        Records the tracks of the given album moved to the
+        output directory on its manifest. The manifest is
+        not essential: the tracks not recorded are only
+        processed again the next time.
+        """
+        for name, key in album['keys'].values():
+            if name in album['moved']:
+                try:
+                    album['manifest'].record(name, key)
+                except OSError:
+                    pass
+        try:
+            album['manifest'].save()
+        except OSError:
+            pass
+    # ----------------------------------------------------------------#
+
+    def estimate(self, albums, signature, settings, workroot=None):
+        """
+        Returns a (message, lacking) tuple with the estimated
+        size and processing time of the given list of (album,
+        rows) tuples with the given output `signature`, based
+        on the history of the past jobs (see `_utils.history`),
+        and the list of the (dirname, free bytes) tuples of the
+        output and working directories lacking space. `settings`
+        is a (outputdir, workers) tuple. The working directories
+        of the albums without a job yet are created on
+        `workroot`, if given.
+        """
+        outputdir, workers = settings
+        size, wall = estimate_job(self.history, signature,
+                                  [(album['data'], rows)
+                                   for album, rows in albums], workers)
+        if wall is None:
+            msg = _("Estimated output: {} at most | Time: not yet "
+                    "measured for this format").format(format_size(size))
+        else:
+            msg = _("Estimated output: {} | Time: about {}"
+                    ).format(format_size(size), format_time(wall))
+        dirnames = [outputdir]
+        for album, rows in albums:
+            if album['journal'] is not None:
+                dirnames.append(album['journal'].workdir)
+            elif workroot:
+                dirnames.append(workroot)
+        return msg, lacking_space(size, dirnames)
@@ -0,0 +1,298 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: journal.py
+Porpose: persistent journal of the split jobs
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import shutil
+import hashlib
+from threading import RLock
+
+WORK_DIRNAME = '.ffcuesplitter-work'  # hidden working root on output disk
+
+
+def file_checksum(filename):
+    """
+    Returns the SHA-256 hex digest of the given file
+    """
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as fbin:
+        for chunk in iter(lambda: fbin.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+# ------------------------------------------------------------------------
+
+
+def track_digest(track):
+    """
+    Returns a digest of the given track data (times, tags
+    and source file), used to detect tracks changed after
+    they were split.
+    """
+    data = json.dumps(track, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+# ------------------------------------------------------------------------
+
+
+class Journal:
+    """
+    Persistent on-disk journal of the split job of an album.
+    The tracks are written in a working directory which is
+    kept until the job is successfully completed, each track
+    completed is recorded with its file name and checksum,
+    so an interrupted job (abort, error or crash) can be
+    resumed encoding only the missing tracks.
+
+    The journal file is `<dirname>/<key>.json`, the working
+    directory is `<dirname>/<key>` or `<workroot>/<key>` if
+    a different `workroot` is given when the job is started,
+    where `key` is derived from the CUE sheet pathname.
+
+    Usage:
+        >>> journal = Journal(dirname, cuefile)
+        >>> skip = journal.completed(audiotracks, signature, outputdir)
+        >>> journal.resume(signature, skip)  # or to start a new job:
+        >>> journal.reset(signature, workroot)
+        >>> journal.record(index, track, titletrack, checksum)
+        >>> journal.finalise(index, pathname)  # once moved to destination
+        >>> journal.remove()  # once the job is completed
+    """
+    def __init__(self, dirname, cuefile):
+        """
+        dirname: directory of the journals
+        cuefile: pathname of the CUE sheet
+        """
+        cuefile = os.path.abspath(cuefile)
+        self.key = hashlib.sha1(cuefile.encode('utf-8')).hexdigest()[:16]
+        self.dirname = dirname
+        self.filename = os.path.join(dirname, f'{self.key}.json')
+        self.data = {'cuefile': cuefile, 'signature': '', 'tracks': {},
+                     'workdir': os.path.join(dirname, self.key)}
+        self.lock = RLock()  # tracks are finalised by another thread
+
+        if os.path.isfile(self.filename):
+            try:
+                with open(self.filename, 'r', encoding='utf-8') as fjson:
+                    self.data = {**self.data, **json.load(fjson)}
+            except (OSError, ValueError):
+                pass  # a corrupted journal is just a new journal
+        self.workdir = self.data['workdir']
+    # ----------------------------------------------------------------#
+
+    @staticmethod
+    def pending(dirname):
+        """
+        Returns the list of the CUE sheet pathnames of the
+        journals found on `dirname`, i.e. the jobs not yet
+        completed.
+        """
+        if not os.path.isdir(dirname):
+            return []
+        cuefiles = []
+        for name in sorted(os.listdir(dirname)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(dirname, name), 'r',
+                          encoding='utf-8') as fjson:
+                    data = json.load(fjson)
+            except (OSError, ValueError):
+                continue
+            if data.get('tracks') and os.path.isfile(data.get('cuefile', '')):
+                cuefiles.append(data['cuefile'])
+        return cuefiles
+    # ----------------------------------------------------------------#
+
+    def exists(self):
+        """
+        Returns True if some tracks of a previous job
+        are recorded.
+        """
+        return bool(self.data['tracks'])
+    # ----------------------------------------------------------------#
+
+    def save(self):
+        """
+        Writes the journal file atomically
+        """
+        with self.lock:
+            os.makedirs(self.dirname, exist_ok=True)
+            os.makedirs(self.workdir, exist_ok=True)
+            tmp = f'{self.filename}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fjson:
+                json.dump(self.data, fjson, indent=4)
+            os.replace(tmp, self.filename)
+    # ----------------------------------------------------------------#
+
+    def reset(self, signature, workroot=None):
+        """
+        Discards the tracks of a previous job and starts
+        a new one with the given `signature`, whose working
+        directory is created on `workroot`, if given.
+        """
+        self.remove_workdir()
+        if workroot:
+            self.workdir = os.path.join(workroot, self.key)
+            self.data['workdir'] = self.workdir
+        self.data['signature'] = signature
+        self.data['tracks'] = {}
+        self.save()
+    # ----------------------------------------------------------------#
+
+    def completed(self, audiotracks, signature, outputdir):
+        """
+        Returns the set of indexes of `audiotracks` already
+        completed by a previous job with the same output
+        `signature` (format and encoder options), in the working
+        directory or already moved to `outputdir`. Tracks whose
+        data has changed, moved to another output directory, or
+        whose file is missing or does not match its checksum are
+        not completed. Nothing is written, see `resume`.
+        """
+        if self.data['signature'] != signature:
+            return set()
+
+        outputdir = os.path.abspath(outputdir)
+        done = set()
+        for index, track in enumerate(audiotracks):
+            item = self.data['tracks'].get(str(index))
+            if not item:
+                continue
+            if item.get('final'):
+                path = item['final']
+                if os.path.dirname(os.path.abspath(path)) != outputdir:
+                    continue  # an output directory of a previous job
+            else:
+                path = os.path.join(self.workdir, item['titletrack'])
+            if (item['digest'] == track_digest(track)
+                    and os.path.isfile(path)
+                    and file_checksum(path) == item['checksum']):
+                done.add(index)
+        return done
+    # ----------------------------------------------------------------#
+
+    def resume(self, signature, done):
+        """
+        Resumes the job keeping only the tracks whose indexes
+        are in `done` (see `completed`), or starts a new one in
+        the same working directory if the output `signature`
+        has changed.
+        """
+        if self.data['signature'] != signature:
+            self.reset(signature)
+            return
+        with self.lock:
+            self.data['tracks'] = {index: item for index, item
+                                   in self.data['tracks'].items()
+                                   if int(index) in done}
+            self.save()
+    # ----------------------------------------------------------------#
+
+    def record(self, index, track, titletrack, checksum):
+        """
+        Records the track at the `index` position of
+        the album as completed.
+        """
+        with self.lock:
+            self.data['tracks'][str(index)] = {'titletrack': titletrack,
+                                               'checksum': checksum,
+                                               'digest': track_digest(track),
+                                               }
+            self.save()
+    # ----------------------------------------------------------------#
+
+    def finalise(self, index, pathname):
+        """
+        Records that the completed track at the `index`
+        position of the album was moved to `pathname`.
+        """
+        with self.lock:
+            item = self.data['tracks'].get(str(index))
+            if item:
+                item['final'] = pathname
+                self.save()
+    # ----------------------------------------------------------------#
+
+    def unfinalised(self):
+        """
+        Returns a list of (index, pathname, checksum) tuples
+        of the completed tracks which are still in the
+        working directory.
+        """
+        tracks = []
+        for index, item in self.data['tracks'].items():
+            path = os.path.join(self.workdir, item['titletrack'])
+            if not item.get('final') and os.path.isfile(path):
+                tracks.append((int(index), path, item['checksum']))
+        return sorted(tracks)
+    # ----------------------------------------------------------------#
+
+    def clean(self):
+        """
+        Removes from the working directory everything but
+        the completed tracks, e.g. the partial files and the
+        scratch files of an interrupted job.
+        """
+        if not os.path.isdir(self.workdir):
+            return
+        keep = [item['titletrack'] for item in self.data['tracks'].values()]
+        for name in os.listdir(self.workdir):
+            if name in keep:
+                continue
+            path = os.path.join(self.workdir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    # ----------------------------------------------------------------#
+
+    def remove(self):
+        """
+        Removes the journal file and the working directory
+        """
+        self.remove_workdir()
+        try:
+            os.remove(self.filename)
+        except FileNotFoundError:
+            pass
+    # ----------------------------------------------------------------#
+
+    def remove_workdir(self):
+        """
+        Removes the working directory, and its parent if it
+        is left empty and is a working root created by this
+        application (see `WORK_DIRNAME`), never a directory
+        chosen by the user.
+        """
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        workroot = os.path.dirname(self.workdir)
+        if os.path.basename(workroot) == WORK_DIRNAME:
+            try:
+                os.rmdir(workroot)
+            except OSError:
+                pass  # not empty, e.g. other jobs still pending
@@ -0,0 +1,150 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: manifest.py
+Porpose: manifest of the tracks written to an output directory
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import hashlib
+from ffcuesplitter_gui._utils.journal import file_checksum
+from ffcuesplitter_gui._utils.split_engines import (track_metadata,
+                                                    track_filename)
+
+MANIFEST = '.ffcuesplitter-manifest.json'
+
+
+class Manifest:
+    """
+    Content-addressed manifest of the tracks written to an
+    output directory. Each track is recorded with a key
+    derived from everything its output depends on: the
+    identity of the source audio file (size, mtime and
+    content hash), the track boundaries, the output format,
+    the codec and compression arguments and the tags.
+
+    A track is up to date if its output file was not modified
+    since it was recorded with the same key, so re-running an
+    album with identical settings only encodes the tracks that
+    have changed. The content hashes of the source files are
+    cached by size and mtime, so unchanged sources are hashed
+    only once.
+
+    The manifest is the hidden file `MANIFEST` of the
+    output directory.
+    """
+    def __init__(self, outputdir):
+        """
+        outputdir: the output directory of the tracks
+        """
+        self.outputdir = outputdir
+        self.filename = os.path.join(outputdir, MANIFEST)
+        self.data = {'sources': {}, 'tracks': {}}
+
+        if os.path.isfile(self.filename):
+            try:
+                with open(self.filename, 'r', encoding='utf-8') as fjson:
+                    self.data = {**self.data, **json.load(fjson)}
+            except (OSError, ValueError):
+                pass  # the tracks are just encoded again
+    # ----------------------------------------------------------------#
+
+    def save(self):
+        """
+        Writes the manifest file atomically
+        """
+        tmp = f'{self.filename}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fjson:
+            json.dump(self.data, fjson, indent=4)
+        os.replace(tmp, self.filename)
+    # ----------------------------------------------------------------#
+
+    def source_identity(self, pathname):
+        """
+        Returns the identity of the given source audio file,
+        the content hash is computed only if the file size or
+        mtime are changed since the last time.
+        """
+        stat = os.stat(pathname)
+        cached = self.data['sources'].get(pathname, {})
+        if (cached.get('size') != stat.st_size
+                or cached.get('mtime') != stat.st_mtime_ns):
+            cached = {'size': stat.st_size,
+                      'mtime': stat.st_mtime_ns,
+                      'checksum': file_checksum(pathname),
+                      }
+            self.data['sources'][pathname] = cached
+        return cached
+    # ----------------------------------------------------------------#
+
+    def track_keys(self, data):
+        """
+        Returns a dict of {index: (filename, key)} items for
+        the tracks of the given FFCueSplitter instance (`data`),
+        whose `kwargs` must be already set for processing.
+        """
+        kwargs = data.kwargs
+        total = len(data.audiotracks)
+        keys = {}
+        for index, track in enumerate(data.audiotracks):
+            fpath = os.path.join(kwargs["dirname"], track["FILE"])
+            codec, suffix = data.codec_setup(track["FILE"])
+            name = track_filename(track, suffix)
+            payload = {'source': self.source_identity(fpath),
+                       'start': track['START'],
+                       'end': track.get('END'),
+                       'format': kwargs['outputformat'],
+                       'codec': codec,
+                       'params': kwargs['ffmpeg_add_params'],
+                       'tags': track_metadata(track, total),
+                       }
+            key = json.dumps(payload, sort_keys=True, default=str)
+            keys[index] = (name, hashlib.sha256(key.encode()).hexdigest())
+        return keys
+    # ----------------------------------------------------------------#
+
+    def uptodate(self, name, key):
+        """
+        Returns True if the output file `name` was recorded with
+        the given `key` and was not modified since then.
+        """
+        item = self.data['tracks'].get(name)
+        if not item or item['key'] != key:
+            return False
+        try:
+            stat = os.stat(os.path.join(self.outputdir, name))
+        except OSError:
+            return False
+        return (item['size'] == stat.st_size
+                and item['mtime'] == stat.st_mtime_ns)
+    # ----------------------------------------------------------------#
+
+    def record(self, name, key):
+        """
+        Records the output file `name` with the given `key`
+        """
+        stat = os.stat(os.path.join(self.outputdir, name))
+        self.data['tracks'][name] = {'key': key,
+                                     'size': stat.st_size,
+                                     'mtime': stat.st_mtime_ns,
+                                     }
@@ -0,0 +1,148 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: preflight.py
+Porpose: validation of the queued albums before processing
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from ffcuesplitter.ffmpeg import FFMpeg
+from ffcuesplitter_gui._utils.split_engines import track_filename
+from ffcuesplitter_gui._utils.finalise import existing_parent
+
+MAX_WORKERS = 8  # max number of albums checked at the same time
+ENCODERS = {}  # the encoders of each FFmpeg executable, see ffmpeg_encoders
+
+
+def ffmpeg_encoders(ffmpeg_cmd):
+    """
+    Returns the set of the encoder names of the given FFmpeg
+    executable, or None if it cannot be run. Only the sets
+    found are cached, so that an FFmpeg executable installed
+    or fixed later is found again.
+    """
+    if ffmpeg_cmd in ENCODERS:
+        return ENCODERS[ffmpeg_cmd]
+    try:
+        proc = subprocess.run([ffmpeg_cmd, '-hide_banner', '-encoders'],
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              universal_newlines=True,
+                              check=True,
+                              timeout=30,
+                              )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    encoders = set()
+    for line in proc.stdout.splitlines():
+        fields = line.split()
+        if len(fields) > 1 and len(fields[0]) == 6 and fields[0][0] in 'VAS':
+            encoders.add(fields[1])
+    ENCODERS[ffmpeg_cmd] = encoders
+    return encoders
+# ------------------------------------------------------------------------
+
+
+def check_encoder(ffmpeg_cmd, outputformat):
+    """
+    Returns the error message if the given FFmpeg executable
+    cannot encode `outputformat`, an empty string otherwise.
+    """
+    encoders = ffmpeg_encoders(ffmpeg_cmd)
+    if encoders is None:
+        return _('Cannot run FFmpeg: "{}"').format(ffmpeg_cmd)
+    if outputformat == 'copy':
+        return ''
+    encoder = FFMpeg.DATACODECS[outputformat].split()[0]
+    if encoder not in encoders:
+        return _('This FFmpeg build has no "{}" encoder, required by the '
+                 '{} format').format(encoder, outputformat.upper())
+    return ''
+# ------------------------------------------------------------------------
+
+
+def check_album(data, rows):
+    """
+    Checks the tracks at `rows` of the given FFCueSplitter
+    instance (`data`), whose `kwargs` must be already set for
+    processing. Returns a (errors, conflicts) tuple, where
+    `errors` is a list of messages (missing or empty source
+    audio files, output directory not writable) and
+    `conflicts` the list of the pathnames of the tracks which
+    already exist in the output directory.
+    """
+    kwargs = data.kwargs
+    errors, conflicts, sources = [], [], set()
+    for row in sorted(rows):
+        track = data.audiotracks[row]
+        sources.add(track['FILE'])
+        name = track_filename(track, data.codec_setup(track['FILE'])[1])
+        path = os.path.join(kwargs['outputdir'], name)
+        if os.path.exists(path):
+            conflicts.append(path)
+    for source in sorted(sources):
+        fpath = os.path.join(kwargs['dirname'], source)
+        if not os.path.isfile(fpath):
+            errors.append(_('Missing source audio file: "{}"').format(fpath))
+        elif not os.path.getsize(fpath):
+            errors.append(_('Empty source audio file: "{}"').format(fpath))
+        elif not os.access(fpath, os.R_OK):
+            errors.append(_('Unreadable source audio file: "{}"'
+                            ).format(fpath))
+    if not os.access(existing_parent(kwargs['outputdir']), os.W_OK):
+        errors.append(_('Output directory not writable: "{}"'
+                        ).format(kwargs['outputdir']))
+    return errors, conflicts
+# ------------------------------------------------------------------------
+
+
+def preflight(albums, ffmpeg_cmd):
+    """
+    Checks all the queued albums at once before processing,
+    so that problems are reported in a single pass instead of
+    in the middle of the job. `albums` is a list of (name,
+    data, rows) tuples, see `check_album`; the albums are
+    checked on a pool of worker threads (e.g. sources on
+    slow network mounts).
+
+    Returns a (report, conflicts) tuple, where `report` is a
+    list of (name, errors) tuples of the albums with problems
+    (with an empty name for the FFmpeg problems) and `conflicts`
+    the list of the tracks already in the output directories.
+    """
+    report, conflicts = [], []
+    formats = sorted({data.kwargs['outputformat']
+                      for name, data, rows in albums})
+    errors = [check_encoder(ffmpeg_cmd, fmt) for fmt in formats]
+    if any(errors):
+        report.append(('', sorted(set(err for err in errors if err))))
+
+    workers = min(MAX_WORKERS, len(albums))
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = pool.map(lambda album: check_album(*album[1:]), albums)
+        for (name, data, rows), (errors, found) in zip(albums, results):
+            if errors:
+                report.append((name, errors))
+            conflicts.extend(found)
+    return report, conflicts
@@ -0,0 +1,152 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: priority.py
+Porpose: scheduling priority of the FFmpeg processes
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import errno
+import shutil
+import subprocess
+import platform
+
+# I/O scheduling classes, see the `ionice` command (util-linux)
+IONICE_CLASSES = {'default': [],
+                  'best-effort': ['-c', '2', '-n', '7'],
+                  'idle': ['-c', '3'],
+                  }
+
+
+def parse_cpulist(text):
+    """
+    Returns the set of CPU numbers of the given CPU list,
+    e.g. '0-3,6' gives {0, 1, 2, 3, 6}, an empty string
+    gives an empty set (all CPUs). Raises ValueError if
+    `text` is not a valid CPU list.
+    """
+    cpus = set()
+    for item in text.replace(' ', '').split(','):
+        if not item:
+            continue
+        first, sep, last = item.partition('-')
+        if not first.isdigit() or (sep and not last.isdigit()):
+            raise ValueError(f"Invalid CPU list: '{text}'")
+        if sep and int(last) < int(first):
+            raise ValueError(f"Invalid CPU range: '{item}'")
+        cpus.update(range(int(first), int(last if sep else first) + 1))
+    return cpus
+# ------------------------------------------------------------------------
+
+
+def ionice_available():
+    """
+    Returns True if the I/O priority can be set
+    """
+    return (platform.system() == 'Linux'
+            and shutil.which('ionice') is not None)
+# ------------------------------------------------------------------------
+
+
+def affinity_available():
+    """
+    Returns True if the CPU affinity can be set
+    """
+    return (hasattr(os, 'sched_getaffinity')
+            and shutil.which('taskset') is not None)
+# ------------------------------------------------------------------------
+
+
+class ProcessPriority:
+    """
+    Scheduling priority of the ffmpeg processes, i.e. their
+    nice level, I/O scheduling class and CPU affinity, so that
+    a batch does not slow down the other workloads of the
+    machine. Only the child processes are affected, the
+    application itself keeps its normal priority.
+
+    The priority is set before the ffmpeg executable is run,
+    by the `nice`, `ionice` and `taskset` commands, so that all
+    the threads of ffmpeg inherit it. On MS Windows the nice
+    level is mapped to a priority class, while the I/O class
+    and the CPU affinity are not supported. The I/O class
+    needs the `ionice` command of Linux, the CPU affinity the
+    `taskset` command of Linux.
+
+    Usage:
+        >>> priority = ProcessPriority(nice, ionice, cpus)
+        >>> cmdargs = priority.command(cmdargs)
+        >>> proc = Popen(cmdargs, creationflags=priority.creationflags())
+    """
+    def __init__(self, nice=0, ionice='default', cpus=''):
+        """
+        nice: nice level from 0 (normal) to 19 (lowest)
+        ionice: one of the IONICE_CLASSES keys
+        cpus: CPU list, e.g. '0-3,6', empty for all CPUs
+        """
+        self.nice = max(0, min(int(nice), 19))
+        self.ionice = IONICE_CLASSES.get(ionice, [])
+        try:
+            self.cpus = parse_cpulist(cpus)
+        except ValueError:
+            self.cpus = set()
+        if self.cpus and affinity_available():
+            self.cpus &= os.sched_getaffinity(0)  # only the available ones
+    # ----------------------------------------------------------------#
+
+    def command(self, cmdargs):
+        """
+        Returns the given command (a list of arguments) run
+        with the nice level, the I/O scheduling class and the
+        CPU affinity, if any. Raises FileNotFoundError if the
+        executable of a wrapped command is not found, as the
+        command itself would do (the wrappers would exit with
+        status 127 instead).
+        """
+        if not isinstance(cmdargs, list) or platform.system() == 'Windows':
+            return cmdargs
+        wrappers = []
+        if self.nice and shutil.which('nice'):
+            wrappers += ['nice', '-n', str(self.nice)]
+        if self.ionice and ionice_available():
+            wrappers += ['ionice', *self.ionice]
+        if self.cpus and affinity_available():
+            cpus = ','.join(str(cpu) for cpu in sorted(self.cpus))
+            wrappers += ['taskset', '-c', cpus]
+        if not wrappers:
+            return cmdargs
+        if shutil.which(cmdargs[0]) is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT),
+                                    cmdargs[0])
+        return [*wrappers, *cmdargs]
+    # ----------------------------------------------------------------#
+
+    def creationflags(self):
+        """
+        Returns the priority class flags of the process
+        creation on MS Windows, 0 otherwise.
+        """
+        if not platform.system() == 'Windows' or not self.nice:
+            return 0
+        if self.nice >= 15:
+            return subprocess.IDLE_PRIORITY_CLASS
+        return subprocess.BELOW_NORMAL_PRIORITY_CLASS
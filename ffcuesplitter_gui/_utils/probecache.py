@@ -0,0 +1,180 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: probecache.py
+Porpose: on-disk cache of the parsed CUE sheets
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from threading import Lock
+
+CACHE_DIRNAME = 'probecache'  # directory of the cache in the config dir
+
+
+def file_stat(pathname):
+    """
+    Returns the [size, mtime] list of the given file,
+    or None if it does not exist.
+    """
+    try:
+        stat = os.stat(pathname)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+# ------------------------------------------------------------------------
+
+
+class ProbeCache:
+    """
+    Persistent on-disk cache of the parsed CUE sheets, so
+    that reopening a CUE sheet costs neither the character
+    set detection nor the ffprobe subprocesses. Each entry
+    stores the tracks, the ffprobe data, the character set
+    and the CD info of a CUE sheet (see `_utils.cuesheet`),
+    keyed on its pathname, and is valid as long as the size
+    and the modification time of the CUE sheet and of its
+    source audio files (found or not) do not change.
+
+    Each entry is a file of the cache directory, the least
+    recently used entries are removed when the total size
+    exceeds `maxsize` bytes (0 disables the cache). It can be
+    used by several threads at the same time.
+
+    Usage:
+        >>> cache = ProbeCache(dirname, maxsize)
+        >>> entry = cache.get(cuefile)  # None if missing or stale
+        >>> cache.put(cuefile, sources, entry)
+    """
+    def __init__(self, dirname, maxsize):
+        """
+        dirname: directory of the cache entries
+        maxsize: maximum size of the cache, in bytes
+        """
+        self.dirname = dirname
+        self.maxsize = maxsize
+        self.lock = Lock()  # serializes the removal of old entries
+    # ----------------------------------------------------------------#
+
+    def entryname(self, cuefile):
+        """
+        Returns the pathname of the entry of the given CUE sheet
+        """
+        cuefile = os.path.abspath(cuefile)
+        key = hashlib.sha1(cuefile.encode('utf-8')).hexdigest()
+        return os.path.join(self.dirname, f'{key}.json')
+    # ----------------------------------------------------------------#
+
+    def get(self, cuefile):
+        """
+        Returns the cached entry dict of the given CUE sheet,
+        or None if missing or out of date.
+        """
+        if not self.maxsize:
+            return None
+        filename = self.entryname(cuefile)
+        try:
+            with open(filename, 'r', encoding='utf-8') as fjson:
+                entry = json.load(fjson)
+        except (OSError, ValueError):
+            return None
+        if (entry.get('cuefile') != os.path.abspath(cuefile)
+                or entry.get('stat') != file_stat(cuefile)
+                or any(file_stat(source) != stat for source, stat
+                       in entry.get('sources', {}).items())):
+            return None
+        try:
+            os.utime(filename)  # most recently used
+        except OSError:
+            pass
+        return entry
+    # ----------------------------------------------------------------#
+
+    def put(self, cuefile, sources, entry):
+        """
+        Stores the `entry` dict of the given CUE sheet, whose
+        source audio files are the pathnames of `sources`.
+        Errors are ignored, the cache is not essential.
+        """
+        if not self.maxsize:
+            return
+        entry = {**entry,
+                 'cuefile': os.path.abspath(cuefile),
+                 'stat': file_stat(cuefile),
+                 'sources': {source: file_stat(source) for source in sources},
+                 }
+        try:
+            os.makedirs(self.dirname, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.dirname)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fjson:
+                json.dump(entry, fjson)
+            os.replace(tmp, self.entryname(cuefile))
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp)  # partially written
+            except OSError:
+                pass
+            return
+        self.prune()
+    # ----------------------------------------------------------------#
+
+    def prune(self):
+        """
+        Removes the least recently used entries until the
+        cache fits in `maxsize` bytes.
+        """
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.dirname):
+                try:
+                    stat = os.stat(os.path.join(self.dirname, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+            total = sum(size for mtime, size, name in entries)
+            for mtime, size, name in sorted(entries):
+                if total <= self.maxsize:
+                    break
+                try:
+                    os.remove(os.path.join(self.dirname, name))
+                except OSError:
+                    continue
+                total -= size
+    # ----------------------------------------------------------------#
+
+    def clear(self):
+        """
+        Removes all the entries
+        """
+        with self.lock:
+            if not os.path.isdir(self.dirname):
+                return
+            for name in os.listdir(self.dirname):
+                try:
+                    os.remove(os.path.join(self.dirname, name))
+                except OSError:
+                    pass
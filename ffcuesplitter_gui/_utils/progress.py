@@ -0,0 +1,183 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: progress.py
+Porpose: parser of the FFmpeg -progress output
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import time
+import datetime
+
+
+def format_size(size):
+    """
+    Returns a human readable string of the given
+    size in bytes, e.g. '3.2 MiB'
+    """
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            break
+        size /= 1024
+    return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+# ------------------------------------------------------------------------
+
+
+def format_time(secs):
+    """
+    Returns a H:MM:SS string of the given seconds
+    """
+    return str(datetime.timedelta(seconds=round(secs)))
+# ------------------------------------------------------------------------
+
+
+def format_stats(stats):
+    """
+    Returns a short string of the given stats (see
+    `ProgressParser.update`), e.g. '24.5x | 1.2 MiB/s | ETA 0:01:23'
+    """
+    items = []
+    if stats.get('speed'):
+        items.append(f"{stats['speed']:.1f}x")
+    if stats.get('rate'):
+        items.append(f"{format_size(stats['rate'])}/s")
+    if stats.get('eta') is not None:
+        items.append(_('ETA {}').format(format_time(stats['eta'])))
+    return ' | '.join(items)
+# ------------------------------------------------------------------------
+
+
+class ProgressParser:
+    """
+    Parser of the `-progress` output of FFmpeg, which is made
+    of blocks of key=value lines, each one terminated by the
+    `progress` key (`continue` or `end`), e.g.:
+
+        out_time_us=12000000
+        out_time_ms=12000000
+        out_time=00:00:12.000000
+        total_size=1048576
+        speed=24.5x
+        progress=continue
+
+    For each block, it computes the realtime factor (seconds of
+    audio processed per second), the output bytes per second and
+    the estimated time to the end of the given `duration`.
+
+    Usage:
+        >>> parser = ProgressParser(duration)
+        >>> for line in proc.stdout:
+        >>>     stats = parser.feed(line)
+        >>>     if stats:
+        >>>         ...
+    """
+    def __init__(self, duration):
+        """
+        duration: the duration in seconds of the audio
+                  to be processed
+        """
+        self.duration = duration
+        self.start = time.monotonic()
+        self.block = {}
+        self.stats = {'position': 0,
+                      'elapsed': 0,
+                      'speed': None,
+                      'size': None,
+                      'rate': None,
+                      'eta': None,
+                      'end': False,
+                      }
+    # ----------------------------------------------------------------#
+
+    def feed(self, line):
+        """
+        Parses a line of the `-progress` output. Returns the
+        stats dict once a block is completed, None otherwise.
+        """
+        key, sep, val = line.strip().partition('=')
+        if not sep:
+            return None
+        self.block[key] = val
+        if key != 'progress':
+            return None
+        block, self.block = self.block, {}
+        return self.update(block)
+    # ----------------------------------------------------------------#
+
+    def update(self, block):
+        """
+        Updates and returns the stats dict with the given block of
+        values. Missing or 'N/A' values are estimated from the
+        elapsed time, when possible:
+
+            position: seconds of audio processed
+            elapsed: seconds since the start of the process
+            speed: realtime factor
+            size: bytes written, or None
+            rate: bytes written per second, or None
+            eta: estimated seconds to the end, or None
+            end: True if the process is terminated
+        """
+        position = self.stats['position']
+        for key in ('out_time_us', 'out_time_ms'):
+            if block.get(key, 'N/A').lstrip('-').isdigit():
+                position = max(int(block[key]), 0) / 1_000_000
+                break
+        elapsed = time.monotonic() - self.start
+        speed = None
+        if block.get('speed', 'N/A').rstrip('x').replace('.', '', 1).isdigit():
+            speed = float(block['speed'].rstrip('x'))
+        elif elapsed > 0:
+            speed = position / elapsed
+
+        size = self.stats['size']
+        if block.get('total_size', 'N/A').isdigit():
+            size = int(block['total_size'])
+
+        self.stats = {'position': position,
+                      'elapsed': elapsed,
+                      'speed': speed or None,
+                      'size': size,
+                      'rate': size / elapsed if size and elapsed else None,
+                      'eta': self.eta(self.duration, position, elapsed),
+                      'end': block.get('progress') == 'end',
+                      }
+        return self.stats
+    # ----------------------------------------------------------------#
+
+    def position(self, position):
+        """
+        Updates and returns the stats dict given only the
+        position in seconds of the audio processed, for the
+        processes that do not write the `-progress` output.
+        """
+        return self.update({'out_time_us': str(round(position * 1_000_000))})
+    # ----------------------------------------------------------------#
+
+    @staticmethod
+    def eta(end, position, elapsed):
+        """
+        Returns the estimated seconds to reach the `end` position,
+        at the average speed so far, or None if unknown.
+        """
+        if position <= 0 or elapsed <= 0:
+            return None
+        return max(end - position, 0) * elapsed / position
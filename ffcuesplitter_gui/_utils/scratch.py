@@ -0,0 +1,152 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: scratch.py
+Porpose: RAM-backed working directories of the jobs
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+from ffcuesplitter_gui._utils.split_engines import group_by_source, pcm_codec
+from ffcuesplitter_gui._utils.finalise import WORK_DIRNAME
+
+# The highest bitrates of the lossy formats, in kbit/s
+LOSSY_KBPS = {'mp3': 320, 'ogg': 500, 'opus': 512}
+PCM_BYTES = {'pcm_s16le': 2, 'pcm_s24le': 3, 'pcm_s32le': 4,
+             'pcm_f32le': 4, 'pcm_f64le': 8}
+
+
+def source_probe(probedata, filename):
+    """
+    Returns a (format, stream) tuple of the ffprobe data of
+    the given source audio file, with empty dicts if missing.
+    `probedata` is the list of ffprobe data of the
+    FFCueSplitter instance.
+    """
+    for probe in probedata:
+        if probe.get('format', {}).get('filename') != filename:
+            continue
+        for stream in probe.get('streams', []):
+            if stream.get('codec_type') == 'audio':
+                return probe['format'], stream
+        return probe['format'], {}
+    return {}, {}
+# ------------------------------------------------------------------------
+
+
+def bytes_per_second(outputformat, fmt, stream):
+    """
+    Returns an upper bound of the bytes per second of a track
+    in the given output format, from the ffprobe `fmt` and
+    `stream` data of its source audio file. The lossless
+    formats are as big as PCM at most (see `DATACODECS` of
+    the FFMpeg class, which resamples to 44100 Hz).
+    """
+    channels = int(stream.get('channels') or 2)
+    if outputformat == 'copy':
+        try:
+            return float(fmt['bit_rate']) / 8
+        except (KeyError, ValueError):
+            try:
+                return float(fmt['size']) / float(fmt['duration'])
+            except (KeyError, ValueError, ZeroDivisionError):
+                return 44100 * channels * 4
+    if outputformat == 'flac':
+        depth = 3 if str(stream.get('bits_per_raw_sample')) == '24' else 2
+        return 44100 * channels * depth
+    if outputformat == 'wav':
+        return 44100 * channels * 2
+    return LOSSY_KBPS.get(outputformat, 512) * 1000 / 8
+# ------------------------------------------------------------------------
+
+
+def estimate_scratch(data, engine, workers=1, skip=()):
+    """
+    Returns an upper bound, in bytes, of the space taken on
+    the working directory by the job of the given FFCueSplitter
+    instance (`data`), whose `kwargs` must be already set for
+    processing, with the given split `engine` and `workers`
+    (see `_utils.split_engines.build_recipes`): the tracks not
+    in `skip`, and the scratch files of the split engine, i.e.
+    the PCM intermediates or the copied segments.
+    """
+    outputformat = data.kwargs['outputformat']
+    intermediate = (engine == 'track' and workers > 1
+                    and outputformat != 'copy')
+    size = 0
+    for group in group_by_source(data.audiotracks):
+        if all(index in skip for index, track in group):
+            continue
+        filename = group[0][1]['FILE']
+        fmt, stream = source_probe(data.probedata, filename)
+        rate = bytes_per_second(outputformat, fmt, stream)
+        tracks = sum(track['DURATION'] for index, track in group
+                     if index not in skip)
+        size += rate * tracks
+        if engine == 'single' and outputformat == 'copy':
+            size += rate * tracks  # segments, then tagged copies
+        pcm = pcm_codec(data.probedata, filename) if intermediate else None
+        if pcm:
+            duration = group[-1][1]['START'] / 44100 + group[-1][1]['DURATION']
+            size += (duration * int(stream.get('sample_rate') or 44100)
+                     * int(stream.get('channels') or 2) * PCM_BYTES[pcm])
+    return int(size)
+# ------------------------------------------------------------------------
+
+
+def available_ram():
+    """
+    Returns the memory available for new data without
+    swapping, in bytes (the MemAvailable value of Linux),
+    or None if unknown.
+    """
+    try:
+        with open('/proc/meminfo', 'r', encoding='utf-8') as fmem:
+            for line in fmem:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+# ------------------------------------------------------------------------
+
+
+def ram_root(dirname, size, fraction):
+    """
+    Returns the directory of the RAM-backed filesystem
+    `dirname` (e.g. /dev/shm) where the working directories
+    of the jobs are created, if `size` bytes fit within the
+    given `fraction` of the available memory and the free
+    space of `dirname`. Returns None otherwise, so that the
+    job falls back to disk.
+    """
+    avail = available_ram()
+    if not dirname or avail is None or not os.path.isdir(dirname):
+        return None
+    try:
+        stat = os.statvfs(dirname)
+    except (OSError, AttributeError):
+        return None
+    if (size > avail * fraction
+            or size > stat.f_bavail * stat.f_frsize
+            or not os.access(dirname, os.W_OK)):
+        return None
+    return os.path.join(dirname, WORK_DIRNAME)
@@ -0,0 +1,584 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: split_engines.py
+Porpose: builds the FFmpeg recipes for the available split engines
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import platform
+
+# The position probe prints the timestamp of the decoded source audio
+# to stdout (`pipe:1`). The colon of the URL must be escaped for the
+# filter option parser and the backslash must survive the command line
+# parsing, which differs between shlex (Unix) and MS Windows.
+if platform.system() == 'Windows':
+    PROBE_URL = r'pipe\\:1'
+else:
+    PROBE_URL = r'pipe\\\\:1'
+
+POSITION_PROBE = ('[0:a:0]asetnsamples=n=44100:p=0,'
+                  'ametadata=mode=add:key=pos:value=1,'
+                  'ametadata=mode=print:key=pos:direct=1:'
+                  f'file={PROBE_URL}[pos]')
+
+# Encoders whose chunks can be joined by stream copy without gaps:
+# {format: (frame size, encoder delay, sample rate, extra options)}.
+# The frame size and the encoder delay (priming samples) are those
+# of the default encoder settings, the bit reservoir of LAME must be
+# disabled so that a frame does not depend on the previous ones.
+CHUNK_CODECS = {'opus': (960, 312, 48000, ''),
+                'mp3': (1152, 1105, 44100, '-reservoir 0'),
+                }
+CHUNK_OPTIONS = ('-ar', '-frame_duration', '-application')  # not chunked
+CHUNK_OVERLAP = 1  # seconds of audio encoded and dropped at each cut
+CHUNK_MIN_LENGTH = 120  # seconds, min length of a chunk
+
+# Codecs slow to decode or to seek into (ffprobe codec names), whose
+# source audio is decoded once into a PCM intermediate shared by the
+# parallel encoders. Other sources (PCM, FLAC, MP3...) are read directly.
+INTERMEDIATE_CODECS = ('ape', 'tak', 'wavpack')
+
+
+def track_metadata(track, total):
+    """
+    Returns the tags of the given track in the same
+    way as the `FFMpeg.commandargs` method does.
+    """
+    return {'ARTIST': track.get('PERFORMER', ''),
+            'ALBUM': track.get('ALBUM', ''),
+            'TITLE': track.get('TITLE', ''),
+            'TRACK': (str(track['TRACK_NUM']) + '/' + str(total)),
+            'DISCNUMBER': track.get('DISCNUMBER', ''),
+            'GENRE': track.get('GENRE', ''),
+            'DATE': track.get('DATE', ''),
+            'COMMENT': track.get('COMMENT', ''),
+            'DISCID': track.get('DISCID', ''),
+            }
+# ------------------------------------------------------------------------
+
+
+def track_filename(track, suffix):
+    """
+    Returns the output file name of the given track
+    """
+    num = str(track['TRACK_NUM']).rjust(2, '0')
+    return f'{num} - {track["TITLE"]}.{suffix}'
+# ------------------------------------------------------------------------
+
+
+def group_by_source(audiotracks):
+    """
+    Groups the tracks by source audio file, preserving the
+    order of the CUE sheet. Returns a list of lists of
+    (index, track) tuples, where `index` is the position
+    of the track on `audiotracks`.
+    """
+    groups = {}
+    for index, track in enumerate(audiotracks):
+        groups.setdefault(track['FILE'], []).append((index, track))
+    return list(groups.values())
+# ------------------------------------------------------------------------
+
+
+def single_pass_args(data, skip=()):
+    """
+    Builds one FFmpeg command for each source audio file of
+    the given FFCueSplitter instance (`data`). Each command
+    decodes the source once and writes one output for each
+    track, with its own encoder settings and metadata. The
+    tracks whose index is in `skip` are not written.
+
+    The progress of these commands is given by the position
+    probe (see `POSITION_PROBE`) which prints lines like
+    `frame:12   pts:529200  pts_time:12` on stdout.
+
+    Returns:
+        dict(recipes)
+    """
+    kwargs = data.kwargs
+    total = len(data.audiotracks)
+    recipes = []
+
+    for group in group_by_source(data.audiotracks):
+        group = [(index, track) for index, track in group
+                 if index not in skip]
+        if not group:
+            continue
+        fpath = os.path.join(kwargs["dirname"], group[0][1]["FILE"])
+        cmd = f'"{kwargs["ffmpeg_cmd"]}"'
+        cmd += f' -loglevel {kwargs["ffmpeg_loglevel"]} -nostats -nostdin'
+        cmd += f' -y -i "{fpath}"'
+        tracks = []
+        for index, track in group:
+            codec, suffix = data.codec_setup(track["FILE"])
+            cmd += f" -ss {round(track['START'] / 44100, 6)}"
+            if 'END' in track:
+                cmd += f" -to {round(track['END'] / 44100, 6)}"
+            for key, val in track_metadata(track, total).items():
+                cmd += f' -metadata {key}="{val}"'
+            cmd += f' {codec}'
+            cmd += f" {kwargs['ffmpeg_add_params']}"
+            name = track_filename(track, suffix)
+            output = os.path.join(kwargs["tempdir"], name)
+            cmd += f' "{output}"'
+            tracks.append({'index': index,
+                           'start': track['START'] / 44100,
+                           'duration': track['DURATION'],
+                           'titletrack': name,
+                           'output': output,
+                           })
+        cmd += f' -filter_complex "{POSITION_PROBE}" -map "[pos]" -f null -'
+        duration = tracks[-1]['start'] + tracks[-1]['duration']
+        recipes.append((cmd, {'duration': duration, 'tracks': tracks}))
+
+    return {'recipes': recipes}
+# ------------------------------------------------------------------------
+
+
+def segment_args(data, skip=()):
+    """
+    Builds the recipes of the codec copy mode for the given
+    FFCueSplitter instance (`data`). For each source audio
+    file, one FFmpeg command writes all tracks in a single
+    sequential read of the source using the segment muxer,
+    cutting at the CUE sheet INDEX points. Each segment is
+    then tagged by a `post` command (a quick stream copy)
+    that writes the track to the temporary directory. The
+    segments are written in the hidden `scratch` directory.
+    The tracks whose index is in `skip` are not tagged.
+
+    Returns:
+        dict(recipes)
+    """
+    kwargs = data.kwargs
+    total = len(data.audiotracks)
+    recipes = []
+
+    for num, group in enumerate(group_by_source(data.audiotracks)):
+        if all(index in skip for index, track in group):
+            continue
+        fpath = os.path.join(kwargs["dirname"], group[0][1]["FILE"])
+        codec, suffix = data.codec_setup(group[0][1]["FILE"])
+        scratch = os.path.join(kwargs["tempdir"], f'.segments{num}')
+        starts = [track['START'] / 44100 for index, track in group]
+        offset = 0
+        if starts[0] > 0:  # drops the audio before the first track
+            offset = 1
+        else:
+            starts = starts[1:]
+        cmd = f'"{kwargs["ffmpeg_cmd"]}"'
+        cmd += f' -loglevel {kwargs["ffmpeg_loglevel"]}'
+        cmd += ' -progress pipe:1 -nostats -nostdin'
+        cmd += f' -y -i "{fpath}" -map 0:a:0 {codec} -f segment'
+        if starts:
+            times = ','.join(str(round(secs, 6)) for secs in starts)
+            cmd += f' -segment_times {times}'
+        cmd += ' -reset_timestamps 1'
+        cmd += f' "{os.path.join(scratch, f"%03d.{suffix}")}"'
+        tracks, post = [], []
+        for seg, (index, track) in enumerate(group, start=offset):
+            if index in skip:
+                continue
+            name = track_filename(track, suffix)
+            output = os.path.join(kwargs["tempdir"], name)
+            tag = f'"{kwargs["ffmpeg_cmd"]}"'
+            tag += f' -loglevel {kwargs["ffmpeg_loglevel"]} -nostdin'
+            tag += f' -y -i "{os.path.join(scratch, f"{seg:03d}.{suffix}")}"'
+            tag += ' -map 0 -c copy'
+            for key, val in track_metadata(track, total).items():
+                tag += f' -metadata {key}="{val}"'
+            tag += f' "{output}"'
+            post.append(tag)
+            tracks.append({'index': index,
+                           'start': track['START'] / 44100,
+                           'duration': track['DURATION'],
+                           'titletrack': name,
+                           'output': output,
+                           })
+        duration = tracks[-1]['start'] + tracks[-1]['duration']
+        recipes.append((cmd, {'duration': duration,
+                              'tracks': tracks,
+                              'post': post,
+                              'scratch': scratch,
+                              }))
+
+    return {'recipes': recipes}
+# ------------------------------------------------------------------------
+
+
+def pcm_codec(probedata, filename):
+    """
+    Returns the PCM codec which preserves the sample format of
+    the given source audio file, or None if the source audio can
+    be read directly, i.e. its codec is not one of the slow codecs
+    of `INTERMEDIATE_CODECS`. `probedata` is the list of ffprobe
+    data of the FFCueSplitter instance.
+    """
+    sample_fmts = {'s16': 'pcm_s16le', 's16p': 'pcm_s16le',
+                   'flt': 'pcm_f32le', 'fltp': 'pcm_f32le',
+                   'dbl': 'pcm_f64le', 'dblp': 'pcm_f64le',
+                   }
+    for probe in probedata:
+        if probe.get('format', {}).get('filename') != filename:
+            continue
+        for stream in probe.get('streams', []):
+            if stream.get('codec_type') != 'audio':
+                continue
+            if stream.get('codec_name') not in INTERMEDIATE_CODECS:
+                return None
+            if str(stream.get('bits_per_raw_sample')) == '24':
+                return 'pcm_s24le'
+            return sample_fmts.get(stream.get('sample_fmt'), 'pcm_s32le')
+    return None
+# ------------------------------------------------------------------------
+
+
+def chunk_bounds(samples, parts, frame, delay):
+    """
+    Returns the list of the `parts` + 1 boundaries, in samples,
+    of the chunks of a track of the given length (`samples`).
+    The inner boundaries fall on a frame of the encoder output,
+    i.e. a multiple of `frame` less the encoder `delay`, so that
+    the chunks can be joined packet by packet.
+    """
+    bounds = [0]
+    for part in range(1, parts):
+        frames = round((samples * part / parts + delay) / frame)
+        bounds.append(frames * frame - delay)
+    return bounds + [samples]
+# ------------------------------------------------------------------------
+
+
+def chunk_args(data, track, index, source, workers, threshold):
+    """
+    Builds the recipes which encode a long track (e.g. a DJ mix
+    or a live set) of the given FFCueSplitter instance (`data`)
+    in chunks, so that the chunks are encoded in parallel, then
+    joined by stream copy. `source` is the audio file to read
+    (e.g. the PCM intermediate), `index` is the track position.
+
+    Only the encoders in `CHUNK_CODECS` are supported and only
+    the tracks longer than `threshold` seconds are chunked, in
+    at most `workers` chunks of at least `CHUNK_MIN_LENGTH`
+    seconds. Each chunk but the first is encoded starting
+    `CHUNK_OVERLAP` seconds earlier, each chunk but the last
+    ends as much later, and the packets of the overlapping
+    audio are dropped (`noise` bitstream filter), so that the
+    encoder priming and the end padding only fall on dropped
+    audio and the cuts are gapless. The chunks are written in
+    the hidden `.chunks<index>` directory.
+
+    Returns a tuple (chunks, join) of the chunk recipes and
+    of the recipe which joins them, or None if the track is
+    not chunked.
+    """
+    kwargs = data.kwargs
+    if kwargs['outputformat'] not in CHUNK_CODECS or not threshold:
+        return None
+    if any(opt in kwargs['ffmpeg_add_params'].split()
+           for opt in CHUNK_OPTIONS):
+        return None
+    duration = track['DURATION']
+    if 'END' in track:
+        duration = (track['END'] - track['START']) / 44100
+    parts = min(workers, int(duration // CHUNK_MIN_LENGTH))
+    if duration <= threshold or parts < 2:
+        return None
+
+    frame, delay, rate, extra = CHUNK_CODECS[kwargs['outputformat']]
+    codec, suffix = data.codec_setup(track["FILE"])
+    name = track_filename(track, suffix)
+    scratch = os.path.join(kwargs["tempdir"], f'.chunks{index}')
+    start = track['START'] / 44100
+    bounds = chunk_bounds(round(duration * rate), parts, frame, delay)
+    overlap = CHUNK_OVERLAP * rate
+    primed = -(-(overlap + delay) // frame)  # packets to drop, ceil
+    chunks, files = [], []
+
+    for part in range(parts):
+        first = bounds[part] - (primed * frame - delay if part else 0)
+        seek = max(first // rate - 1, 0)  # whole seconds, exact at any rate
+        trim = f'aresample={rate},atrim=start_sample={first - seek * rate}'
+        cmd = f'"{kwargs["ffmpeg_cmd"]}"'
+        cmd += f' -loglevel {kwargs["ffmpeg_loglevel"]}'
+        cmd += ' -progress pipe:1 -nostats -nostdin'
+        cmd += f" -ss {round(start + seek, 6)}"
+        if part < parts - 1:
+            last = bounds[part + 1] + overlap
+            trim += f':end_sample={last - seek * rate}'
+            cmd += f" -t {round(last / rate - seek + CHUNK_OVERLAP, 6)}"
+            keep = (bounds[part + 1] - bounds[part]) // frame
+            if part:
+                drop = f'not(between(n\\,{primed}\\,{primed + keep - 1}))'
+            else:
+                drop = f'gte(n\\,{(bounds[1] + delay) // frame})'
+        else:
+            if 'END' in track:
+                cmd += f" -t {round(duration - seek, 6)}"
+            drop = f'lt(n\\,{primed})'
+        cmd += f' -i "{source}" -map 0:a:0 -af {trim} {codec} {extra}'
+        cmd += f" {kwargs['ffmpeg_add_params']}"
+        cmd += f' -bsf:a "noise=drop={drop}"'
+        output = os.path.join(scratch, f'{part:03d}.{suffix}')
+        cmd += f' -y "{output}"'
+        length = (bounds[part + 1] - first) / rate
+        chunks.append((cmd, {'duration': length,
+                             'titletrack': name,
+                             'index': index,
+                             'output': output,
+                             'scratch': scratch,
+                             'chunk': {'part': part,
+                                       'parts': parts,
+                                       'length': 0,
+                                       },
+                             }))
+        files.append(os.path.basename(output))
+    length = sum(recipe[1]['duration'] for recipe in chunks)
+    for recipe in chunks:
+        recipe[1]['chunk']['length'] = length  # of all chunks
+
+    listfile = os.path.join(scratch, 'chunks.txt')
+    cmd = f'"{kwargs["ffmpeg_cmd"]}"'
+    cmd += f' -loglevel {kwargs["ffmpeg_loglevel"]}'
+    cmd += ' -progress pipe:1 -nostats -nostdin'
+    cmd += f' -f concat -safe 0 -i "{listfile}" -map 0:a -c copy'
+    for key, val in track_metadata(track, len(data.audiotracks)).items():
+        cmd += f' -metadata {key}="{val}"'
+    output = os.path.join(kwargs["tempdir"], name)
+    cmd += f' -y "{output}"'
+    join = (cmd, {'duration': duration,
+                  'titletrack': name,
+                  'index': index,
+                  'output': output,
+                  'scratch': scratch,
+                  'join': (listfile, files),
+                  })
+    return chunks, join
+# ------------------------------------------------------------------------
+
+
+def intermediate_args(data, skip=(), workers=1, chunk=0):
+    """
+    Builds the recipes for parallel encoders of the given
+    FFCueSplitter instance (`data`). Each source audio file slow
+    to decode or to seek into (APE, TAK, WavPack, see
+    `INTERMEDIATE_CODECS`) is decoded only once into a PCM WAV
+    intermediate by a `prepare` recipe, written in the hidden
+    `.pcm` directory of the temporary directory. The encoders
+    (one for each track) then seek into the intermediate by byte
+    offset, reading only their own slice, which is page-cache
+    friendly. The other sources (PCM, FLAC, MP3...) are read
+    directly. The intermediates are removed along with the
+    temporary directory. The tracks whose index is in `skip`
+    are not encoded.
+
+    The tracks longer than `chunk` seconds (0 disables it) are
+    encoded in chunks by up to `workers` encoders, which are then
+    joined by the `join` recipes, see `chunk_args`.
+
+    Returns:
+        dict(recipes, prepare, join)
+    """
+    kwargs = data.kwargs
+    total = len(data.audiotracks)
+    scratch = os.path.join(kwargs["tempdir"], '.pcm')
+    recipes, prepare, joins = [], [], []
+
+    for num, group in enumerate(group_by_source(data.audiotracks)):
+        if all(index in skip for index, track in group):
+            continue
+        fpath = os.path.join(kwargs["dirname"], group[0][1]["FILE"])
+        pcm = pcm_codec(data.probedata, group[0][1]["FILE"])
+        if pcm:
+            source = os.path.join(scratch, f'{num:03d}.wav')
+            cmd = f'"{kwargs["ffmpeg_cmd"]}"'
+            cmd += f' -loglevel {kwargs["ffmpeg_loglevel"]}'
+            cmd += ' -progress pipe:1 -nostats -nostdin'
+            cmd += f' -y -i "{fpath}" -map 0:a:0 -c:a {pcm} -rf64 auto'
+            cmd += f' "{source}"'
+            duration = (group[-1][1]['START'] / 44100
+                        + group[-1][1]['DURATION'])
+            depends = [{'index': index,
+                        'titletrack': track_filename(
+                            track, data.codec_setup(track["FILE"])[1]),
+                        'duration': track['DURATION'],
+                        } for index, track in group if index not in skip]
+            prepare.append((cmd, {'duration': duration,
+                                  'prepare': True,
+                                  'scratch': scratch,
+                                  'depends': depends,
+                                  }))
+        else:
+            source = fpath
+
+        for index, track in group:
+            if index in skip:
+                continue
+            chunked = chunk_args(data, track, index, source, workers, chunk)
+            if chunked:
+                recipes.extend(chunked[0])
+                joins.append(chunked[1])
+                continue
+            codec, suffix = data.codec_setup(track["FILE"])
+            cmd = f'"{kwargs["ffmpeg_cmd"]}"'
+            cmd += f' -loglevel {kwargs["ffmpeg_loglevel"]}'
+            cmd += ' -progress pipe:1 -nostats -nostdin'
+            cmd += f" -ss {round(track['START'] / 44100, 6)}"
+            if 'END' in track:
+                secs = (track['END'] - track['START']) / 44100
+                cmd += f" -t {round(secs, 6)}"
+            cmd += f' -i "{source}"'
+            for key, val in track_metadata(track, total).items():
+                cmd += f' -metadata {key}="{val}"'
+            cmd += f' {codec}'
+            cmd += f" {kwargs['ffmpeg_add_params']}"
+            name = track_filename(track, suffix)
+            output = os.path.join(kwargs["tempdir"], name)
+            cmd += f' -y "{output}"'
+            recipes.append((cmd, {'duration': track['DURATION'],
+                                  'titletrack': name,
+                                  'index': index,
+                                  'output': output,
+                                  }))
+
+    return {'recipes': recipes, 'prepare': prepare, 'join': joins}
+# ------------------------------------------------------------------------
+
+
+def build_recipes(data, engine, workers=1, skip=(), chunk=0):
+    """
+    Returns the recipes of the given FFCueSplitter instance
+    (`data`) for the given split `engine`, one of:
+
+        'track': one FFmpeg process for each track (default)
+        'single': one FFmpeg process for each source audio file,
+                  in codec copy mode the segment muxer is used.
+
+    With the 'track' engine and more than one `workers`, a slow
+    source audio (e.g. APE) is decoded once into a PCM intermediate
+    shared by the parallel encoders (not in codec copy mode), and the
+    tracks longer than `chunk` seconds are encoded in chunks
+    (see `chunk_args`), 0 disables it.
+
+    The tracks whose index is in `skip` (e.g. the tracks already
+    completed by a resumed job) are left out. The `total` key
+    of the returned dict is the number of tracks of the album.
+
+    Each recipe is a (command, data) tuple processed by the
+    Processing thread, whose data has the `duration` of the
+    decoded audio and, for a single track, its `index`, its
+    `titletrack` and its `output` file. The data may also have:
+
+        `tracks`: the tracks split by a single ffmpeg process,
+                  whose progress is given by the position of
+                  the decoded source.
+        `post`: commands run one at a time once the ffmpeg
+                process is successfully completed.
+        `scratch`: directory removed once the recipe is
+                   completed, kept for the other recipes if
+                   the recipe is a `prepare` or `chunk` one.
+        `prepare`: True for the recipes in the `prepare` list
+                   (e.g. the decoding of a PCM intermediate),
+                   processed before all others.
+        `depends`: the tracks (index, titletrack, duration) of
+                   a `prepare` recipe, failed along with it.
+        `chunk`: the position of a chunk of a long track; the
+                 chunks are joined by a recipe of the `join`
+                 list (with a `join` key), processed once all
+                 the others are completed.
+    """
+    if engine == 'single':
+        if data.kwargs['outputformat'] == 'copy':
+            args = segment_args(data, skip)
+        else:
+            args = single_pass_args(data, skip)
+    elif workers > 1 and data.kwargs['outputformat'] != 'copy':
+        args = intermediate_args(data, skip, workers, chunk)
+    else:
+        args = data.commandargs(data.audiotracks)
+        for index, recipe in enumerate(args['recipes']):
+            recipe[1]['index'] = index
+            recipe[1]['output'] = os.path.join(data.kwargs['tempdir'],
+                                               recipe[1]['titletrack'])
+        args['recipes'] = [recipe for recipe in args['recipes']
+                           if recipe[1]['index'] not in skip]
+    args['total'] = len(data.audiotracks)
+    return args
+# ------------------------------------------------------------------------
+
+
+def merge_recipes(albums):
+    """
+    Merges the recipes of several albums into a single job.
+    `albums` is a list of the dict objects returned by
+    `build_recipes`. The track indexes are offset so that
+    they are unique across the job, and the position of
+    the album in the list is added to each recipe data
+    with the `album` key.
+
+    Returns:
+        dict(recipes, prepare, join)
+    """
+    job = {'recipes': [], 'prepare': [], 'join': []}
+    offset = 0
+    for album, args in enumerate(albums):
+        for stage in ('prepare', 'recipes', 'join'):
+            for cmd, info in args.get(stage, []):
+                info = {**info, 'album': album}
+                if 'index' in info:
+                    info['index'] += offset
+                if 'tracks' in info:
+                    info['tracks'] = [{**item,
+                                       'index': item['index'] + offset}
+                                      for item in info['tracks']]
+                if 'depends' in info:
+                    info['depends'] = [{**item,
+                                        'index': item['index'] + offset}
+                                       for item in info['depends']]
+                job[stage].append((cmd, info))
+        offset += args['total']
+    return job
+# ------------------------------------------------------------------------
+
+
+def schedule_recipes(job, workers):
+    """
+    Orders the recipes of the given job (see `merge_recipes`)
+    for a pool of `workers` concurrent processes, using the
+    longest-processing-time-first rule: the processing time
+    of a recipe is assumed proportional to the duration of
+    its audio, so the longest recipes of all albums are
+    started first and the shortest ones fill the gaps at the
+    end, instead of a long closing track running alone on a
+    single core. Recipes of the same duration keep their
+    order. In serial mode (one worker) the order is kept.
+
+    Returns the job dict.
+    """
+    if workers < 2:
+        return job
+    for stage in ('prepare', 'recipes', 'join'):
+        job[stage] = sorted(job.get(stage, []),
+                            key=lambda recipe: recipe[1]['duration'] or 0,
+                            reverse=True)
+    return job
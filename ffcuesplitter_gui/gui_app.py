@@ -203,6 +203,8 @@ class CuesplitterGUI(wx.App):
                 if flist:
                     for logname in flist:
                         logfile = os.path.join(logdir, logname)
+                        if not os.path.isfile(logfile):
+                            continue  # e.g. the directory of track logs
                         try:
                             del_filecontents(logfile)
                         except Exception as err:
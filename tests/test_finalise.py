@@ -0,0 +1,153 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: test_finalise.py
+Porpose: tests of the finalisation of the tracks
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from ffcuesplitter_gui._utils.finalise import (copy_file,
+                                               finalise_file,
+                                               unique_name)
+from ffcuesplitter_gui._utils.journal import file_checksum
+
+
+class FinaliseTestCase(unittest.TestCase):
+    """
+    Test the move of the tracks to the output directory
+    and the name conflict policies
+    """
+    def setUp(self):
+        """
+        A completed track and an output directory with a
+        track of the same name
+        """
+        self.tmp = tempfile.mkdtemp()
+        self.workdir = os.path.join(self.tmp, 'work')
+        self.outputdir = os.path.join(self.tmp, 'output')
+        self.name = '01 - Intro.flac'
+        self.source = self.write(self.workdir, self.name, b'new')
+        self.dest = self.write(self.outputdir, self.name, b'old')
+
+    def tearDown(self):
+        """
+        Removes the temporary files
+        """
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    @staticmethod
+    def write(dirname, name, data):
+        """
+        Writes a file, returns its pathname
+        """
+        os.makedirs(dirname, exist_ok=True)
+        path = os.path.join(dirname, name)
+        with open(path, 'wb') as fbin:
+            fbin.write(data)
+        return path
+
+    @staticmethod
+    def read(path):
+        """
+        Returns the data of a file
+        """
+        with open(path, 'rb') as fbin:
+            return fbin.read()
+
+    def test_unique_name(self):
+        """
+        The first free numbered name is returned
+        """
+        self.assertEqual(unique_name(self.outputdir, self.name),
+                         os.path.join(self.outputdir, '01 - Intro (1).flac'))
+        self.write(self.outputdir, '01 - Intro (1).flac', b'old')
+        self.assertEqual(unique_name(self.outputdir, self.name),
+                         os.path.join(self.outputdir, '01 - Intro (2).flac'))
+
+    def test_new_file(self):
+        """
+        A track without conflicts is moved, creating the
+        output directory
+        """
+        outputdir = os.path.join(self.tmp, 'new', 'output')
+        dest = finalise_file(self.source, outputdir, 'skip')
+        self.assertEqual(dest, os.path.join(outputdir, self.name))
+        self.assertEqual(self.read(dest), b'new')
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_overwrite(self):
+        """
+        The existing file is replaced
+        """
+        for policy in ('overwrite', 'ask'):
+            source = self.write(self.workdir, self.name, policy.encode())
+            self.assertEqual(finalise_file(source, self.outputdir, policy),
+                             self.dest)
+            self.assertEqual(self.read(self.dest), policy.encode())
+
+    def test_skip(self):
+        """
+        The existing file is kept, the track is left out
+        """
+        self.assertIsNone(finalise_file(self.source, self.outputdir, 'skip'))
+        self.assertEqual(self.read(self.dest), b'old')
+        self.assertTrue(os.path.exists(self.source))
+
+    def test_rename(self):
+        """
+        The track is moved with a unique name
+        """
+        dest = finalise_file(self.source, self.outputdir, 'rename')
+        self.assertEqual(os.path.basename(dest), '01 - Intro (1).flac')
+        self.assertEqual(self.read(dest), b'new')
+        self.assertEqual(self.read(self.dest), b'old')
+
+    def test_empty_file(self):
+        """
+        A missing or empty track is not moved
+        """
+        empty = self.write(self.workdir, '02 - Outro.flac', b'')
+        with self.assertRaises(OSError):
+            finalise_file(empty, self.outputdir)
+        with self.assertRaises(OSError):
+            finalise_file(os.path.join(self.workdir, 'missing.flac'),
+                          self.outputdir)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.outputdir, '02 - Outro.flac')))
+
+    def test_copy_file(self):
+        """
+        A copy has the same data and reports its progress
+        """
+        copied = []
+        dest = os.path.join(self.tmp, 'copy.flac')
+        copy_file(self.source, dest,
+                  lambda done, size: copied.append((done, size)))
+        self.assertEqual(file_checksum(dest), file_checksum(self.source))
+        self.assertEqual(copied[-1], (3, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
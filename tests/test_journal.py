@@ -0,0 +1,153 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: test_journal.py
+Porpose: tests of the job journal
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from ffcuesplitter_gui._utils.journal import Journal, file_checksum
+
+
+class JournalTestCase(unittest.TestCase):
+    """
+    Test the completed tracks of a job and its resume
+    """
+    def setUp(self):
+        """
+        An album of two tracks, the first completed
+        """
+        self.tmp = tempfile.mkdtemp()
+        self.dirname = os.path.join(self.tmp, 'journal')
+        self.outputdir = os.path.join(self.tmp, 'output')
+        self.cuefile = os.path.join(self.tmp, 'album.cue')
+        self.tracks = [{'TITLE': 'Intro', 'START': 0, 'END': 60},
+                       {'TITLE': 'Outro', 'START': 60, 'END': 120},
+                       ]
+        self.journal = Journal(self.dirname, self.cuefile)
+        self.journal.reset('flac')
+        self.track = self.write(self.journal.workdir, '01 - Intro.flac')
+        self.journal.record(0, self.tracks[0], '01 - Intro.flac',
+                            file_checksum(self.track))
+
+    def tearDown(self):
+        """
+        Removes the temporary files
+        """
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    @staticmethod
+    def write(dirname, name, data=b'audio data'):
+        """
+        Writes a track file, returns its pathname
+        """
+        os.makedirs(dirname, exist_ok=True)
+        path = os.path.join(dirname, name)
+        with open(path, 'wb') as fbin:
+            fbin.write(data)
+        return path
+
+    def completed(self, signature='flac', outputdir=None):
+        """
+        Returns the completed tracks of a reloaded journal
+        """
+        journal = Journal(self.dirname, self.cuefile)
+        return journal.completed(self.tracks, signature,
+                                 outputdir or self.outputdir)
+
+    def test_completed(self):
+        """
+        A recorded track is completed
+        """
+        self.assertTrue(Journal(self.dirname, self.cuefile).exists())
+        self.assertEqual(Journal.pending(self.dirname), [])  # no CUE sheet
+        self.assertEqual(self.completed(), {0})
+
+    def test_signature_mismatch(self):
+        """
+        Nothing is completed with another output signature
+        """
+        self.assertEqual(self.completed('mp3'), set())
+
+    def test_changed_track(self):
+        """
+        A track whose data has changed is not completed
+        """
+        self.tracks[0]['END'] = 61
+        self.assertEqual(self.completed(), set())
+
+    def test_changed_file(self):
+        """
+        A track file not matching its checksum is not completed
+        """
+        self.write(self.journal.workdir, '01 - Intro.flac', b'corrupted')
+        self.assertEqual(self.completed(), set())
+
+    def test_finalised(self):
+        """
+        A track moved to the output directory is completed
+        only for that output directory
+        """
+        final = os.path.join(self.outputdir, '01 - Intro.flac')
+        os.makedirs(self.outputdir)
+        shutil.move(self.track, final)
+        self.journal.finalise(0, final)
+        self.assertEqual(self.journal.unfinalised(), [])
+        self.assertEqual(self.completed(), {0})
+        other = os.path.join(self.tmp, 'other')
+        self.assertEqual(self.completed(outputdir=other), set())
+
+    def test_resume(self):
+        """
+        Resuming keeps only the given tracks
+        """
+        self.journal.record(1, self.tracks[1], '02 - Outro.flac', 'abc')
+        self.journal.resume('flac', {0})
+        journal = Journal(self.dirname, self.cuefile)
+        self.assertEqual(list(journal.data['tracks']), ['0'])
+        self.assertEqual(journal.unfinalised(),
+                         [(0, self.track, file_checksum(self.track))])
+
+    def test_resume_signature_mismatch(self):
+        """
+        Resuming with another output signature starts a new job
+        """
+        self.journal.resume('mp3', {0})
+        journal = Journal(self.dirname, self.cuefile)
+        self.assertFalse(journal.exists())
+        self.assertEqual(journal.data['signature'], 'mp3')
+        self.assertFalse(os.path.exists(self.track))
+
+    def test_remove(self):
+        """
+        Removing the journal removes the working directory
+        """
+        self.journal.remove()
+        self.assertFalse(os.path.exists(self.journal.workdir))
+        self.assertFalse(Journal(self.dirname, self.cuefile).exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
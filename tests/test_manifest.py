@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: test_manifest.py
+Porpose: tests of the manifest of the output directory
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from ffcuesplitter_gui._utils.manifest import Manifest
+
+
+class ManifestTestCase(unittest.TestCase):
+    """
+    Test the up-to-date check of the output tracks
+    """
+    def setUp(self):
+        """
+        An output directory with a recorded track
+        """
+        self.outputdir = tempfile.mkdtemp()
+        self.name = '01 - Intro.flac'
+        self.write(b'audio data')
+        manifest = Manifest(self.outputdir)
+        manifest.record(self.name, 'key')
+        manifest.save()
+
+    def tearDown(self):
+        """
+        Removes the temporary files
+        """
+        shutil.rmtree(self.outputdir, ignore_errors=True)
+
+    def write(self, data):
+        """
+        Writes the output track
+        """
+        with open(os.path.join(self.outputdir, self.name), 'wb') as fbin:
+            fbin.write(data)
+
+    def test_uptodate(self):
+        """
+        A recorded track is up to date with the same key
+        """
+        self.assertTrue(Manifest(self.outputdir).uptodate(self.name, 'key'))
+
+    def test_other_key(self):
+        """
+        A recorded track is not up to date with another key
+        """
+        manifest = Manifest(self.outputdir)
+        self.assertFalse(manifest.uptodate(self.name, 'other'))
+        self.assertFalse(manifest.uptodate('02 - Outro.flac', 'key'))
+
+    def test_modified(self):
+        """
+        A track modified since recorded is not up to date
+        """
+        self.write(b'modified audio data')
+        self.assertFalse(Manifest(self.outputdir).uptodate(self.name, 'key'))
+
+    def test_removed(self):
+        """
+        A removed track is not up to date
+        """
+        os.remove(os.path.join(self.outputdir, self.name))
+        self.assertFalse(Manifest(self.outputdir).uptodate(self.name, 'key'))
+
+    def test_corrupted(self):
+        """
+        A corrupted manifest is just empty
+        """
+        with open(Manifest(self.outputdir).filename, 'w',
+                  encoding='utf-8') as fjson:
+            fjson.write('{')
+        self.assertFalse(Manifest(self.outputdir).uptodate(self.name, 'key'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# -*- coding: UTF-8 -*-
+"""
+Name: test_split_engines.py
+Porpose: tests of the recipe helpers of the split engines
+Compatibility: Python3
+Author: Gianluca Pernigotto <jeanlucperni@gmail.com>
+Copyright: 2023 Gianluca Pernigotto <jeanlucperni@gmail.com>
+license: GPL3
+Rev: Oct.18.2026
+Code checker: flake8, pylint .
+
+This file is part of FFcuesplitter-GUI.
+
+   FFcuesplitter-GUI is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   FFcuesplitter-GUI is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with FFcuesplitter-GUI.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import unittest
+from ffcuesplitter_gui._utils.split_engines import (chunk_bounds,
+                                                    merge_recipes,
+                                                    schedule_recipes)
+
+
+def recipe(duration, **data):
+    """
+    Returns a recipe of the given duration
+    """
+    return ('cmd', {'duration': duration, **data})
+# ------------------------------------------------------------------------
+
+
+class ChunkBoundsTestCase(unittest.TestCase):
+    """
+    Test the boundaries of the chunks of a long track
+    """
+    def test_endpoints(self):
+        """
+        The first and last boundaries are the track ends
+        """
+        bounds = chunk_bounds(48000 * 600, 4, 960, 312)
+        self.assertEqual(len(bounds), 5)
+        self.assertEqual(bounds[0], 0)
+        self.assertEqual(bounds[-1], 48000 * 600)
+
+    def test_frame_alignment(self):
+        """
+        The inner boundaries fall on an encoder frame
+        """
+        for samples, frame, delay in ((48000 * 600 + 7, 960, 312),
+                                      (44100 * 901, 1152, 1105)):
+            for bound in chunk_bounds(samples, 3, frame, delay)[1:-1]:
+                self.assertEqual((bound + delay) % frame, 0)
+
+    def test_increasing(self):
+        """
+        The chunks are in order and about the same length
+        """
+        samples = 44100 * 1800
+        bounds = chunk_bounds(samples, 6, 1152, 1105)
+        lengths = [end - start for start, end in zip(bounds, bounds[1:])]
+        self.assertTrue(all(length > 0 for length in lengths))
+        for length in lengths:
+            self.assertLessEqual(abs(length - samples / 6), 1152)
+
+    def test_single_part(self):
+        """
+        A single chunk is the whole track
+        """
+        self.assertEqual(chunk_bounds(1000, 1, 960, 312), [0, 1000])
+# ------------------------------------------------------------------------
+
+
+class ScheduleRecipesTestCase(unittest.TestCase):
+    """
+    Test the longest-processing-time-first order of the recipes
+    """
+    def setUp(self):
+        """
+        A job with tracks of different durations
+        """
+        self.job = {'prepare': [],
+                    'recipes': [recipe(60, index=0), recipe(300, index=1),
+                                recipe(60, index=2), recipe(120, index=3)],
+                    'join': [recipe(10, index=4), recipe(90, index=5)],
+                    }
+
+    def test_longest_first(self):
+        """
+        The longest recipes are started first, the recipes of
+        the same duration keep their order
+        """
+        job = schedule_recipes(self.job, 4)
+        self.assertEqual([info['index'] for cmd, info in job['recipes']],
+                         [1, 3, 0, 2])
+        self.assertEqual([info['index'] for cmd, info in job['join']],
+                         [5, 4])
+
+    def test_serial(self):
+        """
+        In serial mode the order is kept
+        """
+        job = schedule_recipes(self.job, 1)
+        self.assertEqual([info['index'] for cmd, info in job['recipes']],
+                         [0, 1, 2, 3])
+# ------------------------------------------------------------------------
+
+
+class MergeRecipesTestCase(unittest.TestCase):
+    """
+    Test the merge of the recipes of several albums in a job
+    """
+    def test_offsets(self):
+        """
+        The track indexes are unique across the job
+        """
+        first = {'total': 2,
+                 'prepare': [],
+                 'recipes': [recipe(10, index=0), recipe(20, index=1)],
+                 }
+        second = {'total': 3,
+                  'prepare': [recipe(30, depends=[{'index': 0},
+                                                  {'index': 2}])],
+                  'recipes': [recipe(10, index=0), recipe(20, index=2)],
+                  'join': [recipe(5, tracks=[{'index': 1}])],
+                  }
+        job = merge_recipes([first, second])
+        self.assertEqual([info['index'] for cmd, info in job['recipes']],
+                         [0, 1, 2, 4])
+        self.assertEqual([info['album'] for cmd, info in job['recipes']],
+                         [0, 0, 1, 1])
+        self.assertEqual(job['prepare'][0][1]['depends'],
+                         [{'index': 2}, {'index': 4}])
+        self.assertEqual(job['join'][0][1]['tracks'], [{'index': 3}])
+
+    def test_not_modified(self):
+        """
+        The recipes of the albums are not modified
+        """
+        album = {'total': 1, 'recipes': [recipe(10, index=0)]}
+        merge_recipes([{'total': 4, 'recipes': []}, album])
+        self.assertEqual(album['recipes'][0][1], {'duration': 10, 'index': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()